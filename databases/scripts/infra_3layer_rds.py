@@ -1,11 +1,88 @@
+import argparse
 import boto3
+import os
+import sys
 import time
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from mck21 import sg
+from mck21.ami import resolve_ami
+from mck21.rds_fleet import RdsFleet
+
 # Cliente de EC2
 ec2 = boto3.client('ec2')
 rds = boto3.client('rds')
 
-def create_infrastructure():
+RDS_COUNT = 3   # instancias RDS (--rds)
+
+# Security Groups: nombre -> (descripción, reglas de entrada en formato IpPermissions).
+# En UserIdGroupPairs el GroupId es el nombre del SG origen; se resuelve al reconciliar
+SECURITY_GROUPS = {
+    'mck21-gs-ec2': ('Security group para instancias EC2', [{
+        'IpProtocol': 'tcp',
+        'FromPort': 22,
+        'ToPort': 22,
+        'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'SSH access'}]
+    }]),
+    'mck21-gs-proxy': ('Security group proxy intermediario', [{
+        'IpProtocol': 'tcp',
+        'FromPort': 3306,
+        'ToPort': 3306,
+        'UserIdGroupPairs': [{'GroupId': 'mck21-gs-ec2', 'Description': 'MySQL from EC2'}]
+    }]),
+    'mck21-gs-rds': ('Security group para RDS MySQL', [{
+        'IpProtocol': 'tcp',
+        'FromPort': 3306,
+        'ToPort': 3306,
+        'UserIdGroupPairs': [{'GroupId': 'mck21-gs-proxy', 'Description': 'MySQL from Proxy'}]
+    }]),
+}
+
+def ensure_security_groups(vpc_id):
+    """Crea los SG de SECURITY_GROUPS que falten y deja sus reglas de entrada como
+    están declaradas: un describe para todos y, por grupo, como mucho un authorize
+    y un revoke con la diferencia. Devuelve {nombre: GroupId}"""
+    existing = ec2.describe_security_groups(Filters=[
+        {'Name': 'vpc-id', 'Values': [vpc_id]},
+        {'Name': 'group-name', 'Values': list(SECURITY_GROUPS)}
+    ])['SecurityGroups']
+    sg_ids = {group['GroupName']: group['GroupId'] for group in existing}
+    current = {group['GroupId']: group['IpPermissions'] for group in existing}
+    
+    for name, (description, _) in SECURITY_GROUPS.items():
+        if name in sg_ids:
+            print(f"Security Group {name} ya existe: {sg_ids[name]}")
+            continue
+        sg_ids[name] = ec2.create_security_group(
+            GroupName=name,
+            Description=description,
+            VpcId=vpc_id,
+            TagSpecifications=[{
+                'ResourceType': 'security-group',
+                'Tags': [{'Key': 'Name', 'Value': name}, {'Key': 'Project', 'Value': 'mck21'}]
+            }]
+        )['GroupId']
+        current[sg_ids[name]] = []
+        print(f"Security Group {name} creado: {sg_ids[name]}")
+    
+    # Nombres de SG origen -> IDs
+    desired = {}
+    for name, (_, rules) in SECURITY_GROUPS.items():
+        desired[sg_ids[name]] = [
+            dict(perm, UserIdGroupPairs=[dict(pair, GroupId=sg_ids[pair['GroupId']])
+                                         for pair in perm['UserIdGroupPairs']])
+            if 'UserIdGroupPairs' in perm else perm
+            for perm in rules
+        ]
+    
+    names = {group_id: name for name, group_id in sg_ids.items()}
+    for group_id, (added, removed) in sg.reconcile_all(ec2, desired, current).items():
+        if added or removed:
+            print(f"Reglas de {names[group_id]}: +{len(added)} -{len(removed)}")
+    return sg_ids
+
+def create_infrastructure(rds_count=RDS_COUNT):
     # 1. Crear VPC
     print("Creando VPC...")
     vpc = ec2.create_vpc(
@@ -90,90 +167,17 @@ def create_infrastructure():
     for subnet_id in public_subnets:
         ec2.associate_route_table(SubnetId=subnet_id, RouteTableId=public_rt_id)
     
-    # 5. Crear Security Groups
+    # 5. Crear (o reconciliar) Security Groups
     print("Creando Security Groups...")
-    
-    # gs-ec2 (permite SSH)
-    sg_ec2 = ec2.create_security_group(
-        GroupName='mck21-gs-ec2',
-        Description='Security group para instancias EC2',
-        VpcId=vpc_id,
-        TagSpecifications=[{
-            'ResourceType': 'security-group',
-            'Tags': [{'Key': 'Name', 'Value': 'mck21-gs-ec2'}, {'Key': 'Project', 'Value': 'mck21'}]
-        }]
-    )
-    sg_ec2_id = sg_ec2['GroupId']
-    
-    ec2.authorize_security_group_ingress(
-        GroupId=sg_ec2_id,
-        IpPermissions=[{
-            'IpProtocol': 'tcp',
-            'FromPort': 22,
-            'ToPort': 22,
-            'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': 'SSH access'}]
-        }]
-    )
-    print(f"Security Group EC2 creado: {sg_ec2_id}")
-    
-    # gs-proxy (intermediario)
-    sg_proxy = ec2.create_security_group(
-        GroupName='mck21-gs-proxy',
-        Description='Security group proxy intermediario',
-        VpcId=vpc_id,
-        TagSpecifications=[{
-            'ResourceType': 'security-group',
-            'Tags': [{'Key': 'Name', 'Value': 'mck21-gs-proxy'}, {'Key': 'Project', 'Value': 'mck21'}]
-        }]
-    )
-    sg_proxy_id = sg_proxy['GroupId']
-    
-    # Permitir MySQL desde gs-ec2
-    ec2.authorize_security_group_ingress(
-        GroupId=sg_proxy_id,
-        IpPermissions=[{
-            'IpProtocol': 'tcp',
-            'FromPort': 3306,
-            'ToPort': 3306,
-            'UserIdGroupPairs': [{'GroupId': sg_ec2_id, 'Description': 'MySQL from EC2'}]
-        }]
-    )
-    print(f"Security Group Proxy creado: {sg_proxy_id}")
-    
-    # gs-rds (permite MySQL desde gs-proxy)
-    sg_rds = ec2.create_security_group(
-        GroupName='mck21-gs-rds',
-        Description='Security group para RDS MySQL',
-        VpcId=vpc_id,
-        TagSpecifications=[{
-            'ResourceType': 'security-group',
-            'Tags': [{'Key': 'Name', 'Value': 'mck21-gs-rds'}, {'Key': 'Project', 'Value': 'mck21'}]
-        }]
-    )
-    sg_rds_id = sg_rds['GroupId']
-    
-    ec2.authorize_security_group_ingress(
-        GroupId=sg_rds_id,
-        IpPermissions=[{
-            'IpProtocol': 'tcp',
-            'FromPort': 3306,
-            'ToPort': 3306,
-            'UserIdGroupPairs': [{'GroupId': sg_proxy_id, 'Description': 'MySQL from Proxy'}]
-        }]
-    )
-    print(f"Security Group RDS creado: {sg_rds_id}")
+    sg_ids = ensure_security_groups(vpc_id)
+    sg_ec2_id = sg_ids['mck21-gs-ec2']
+    sg_proxy_id = sg_ids['mck21-gs-proxy']
+    sg_rds_id = sg_ids['mck21-gs-rds']
     
     # 6. Crear Instancias EC2
     print("Creando instancias EC2...")
-    # Obtener la AMI más reciente de Amazon Linux 2
-    amis = ec2.describe_images(
-        Owners=['amazon'],
-        Filters=[
-            {'Name': 'name', 'Values': ['amzn2-ami-hvm-*-x86_64-gp2']},
-            {'Name': 'state', 'Values': ['available']}
-        ]
-    )
-    latest_ami = sorted(amis['Images'], key=lambda x: x['CreationDate'], reverse=True)[0]['ImageId']
+    # AMI más reciente de Amazon Linux 2 (parámetro de SSM, con caché en disco)
+    latest_ami = resolve_ami(ec2)
     
     ec2_instances = []
     for i, subnet_id in enumerate(public_subnets):
@@ -208,25 +212,30 @@ def create_infrastructure():
         Tags=[{'Key': 'Project', 'Value': 'mck21'}]
     )
     
-    # 8. Crear instancias RDS
-    print("Creando instancias RDS (esto puede tardar varios minutos)...")
-    rds_instances = []
-    for i in range(3):
-        db_instance = rds.create_db_instance(
-            DBInstanceIdentifier=f'mck21-rds-{i+1}',
-            DBInstanceClass='db.t3.micro',
-            Engine='mysql',
-            MasterUsername='admin',
-            MasterUserPassword='Mck21Password123!',
-            AllocatedStorage=20,
-            VpcSecurityGroupIds=[sg_rds_id],
-            DBSubnetGroupName='mck21-db-subnet-group',
-            BackupRetentionPeriod=0,
-            PubliclyAccessible=False,
-            Tags=[{'Key': 'Project', 'Value': 'mck21'}]
-        )
-        rds_instances.append(db_instance['DBInstance']['DBInstanceIdentifier'])
-        print(f"Instancia RDS {i+1} en creación: {db_instance['DBInstance']['DBInstanceIdentifier']}")
+    # 8. Crear instancias RDS (todas a la vez) y seguirlas hasta que estén disponibles
+    print(f"Creando {rds_count} instancias RDS (esto puede tardar varios minutos)...")
+    fleet = RdsFleet(rds, [dict(
+        DBInstanceIdentifier=f'mck21-rds-{i+1}',
+        DBInstanceClass='db.t3.micro',
+        Engine='mysql',
+        MasterUsername='admin',
+        MasterUserPassword='Mck21Password123!',
+        AllocatedStorage=20,
+        VpcSecurityGroupIds=[sg_rds_id],
+        DBSubnetGroupName='mck21-db-subnet-group',
+        BackupRetentionPeriod=0,
+        PubliclyAccessible=False,
+        Tags=[{'Key': 'Project', 'Value': 'mck21'}]
+    ) for i in range(rds_count)])
+    for db_id, error in fleet.create().items():
+        print(f"Error creando {db_id}: {error}")
+    
+    start = time.time()
+    for event in fleet.track():
+        elapsed = event.time - start
+        stamp = time.strftime('%H:%M:%S', time.localtime(event.time))
+        print(f"[{stamp} +{elapsed:.0f}s] {event.instance}: {event.old or '-'} -> {event.new}"
+              + (f" ({event.endpoint})" if event.endpoint else ""))
     
     print("\n=== RESUMEN DE RECURSOS CREADOS ===")
     print(f"VPC: {vpc_id}")
@@ -237,9 +246,17 @@ def create_infrastructure():
     print(f"Security Group Proxy: {sg_proxy_id}")
     print(f"Security Group RDS: {sg_rds_id}")
     print(f"Instancias EC2: {ec2_instances}")
-    print(f"Instancias RDS: {rds_instances}")
+    print("Instancias RDS:")
+    for db_id in fleet.ids:
+        print(f"  {db_id}: {fleet.endpoints.get(db_id) or fleet.failed.get(db_id)}")
+    print(f"(estado de las RDS seguido con {fleet.polls} consultas)")
+    if fleet.failed:
+        print("\nAlgunas instancias RDS no llegaron a estar disponibles")
+        sys.exit(1)
     print("\nInfraestructura creada exitosamente!")
-    print("NOTA: Las instancias RDS pueden tardar 10-15 minutos en estar disponibles.")
 
 if __name__ == '__main__':
-    create_infrastructure()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description='Crea la infraestructura de 3 capas con RDS')
+    parser.add_argument('--rds', type=int, default=RDS_COUNT, help='Número de instancias RDS')
+    args = parser.parse_args()
+    create_infrastructure(args.rds)
\ No newline at end of file
@@ -0,0 +1,35 @@
+"""
+mck21: utilidades para los recursos de prácticas etiquetados con tag=mck21.
+
+    python -m mck21 --help          limpieza de todos los recursos con el tag
+    python -m mck21.bench           benchmark contra un EC2 simulado
+    python -m mck21.bench_provision benchmark del aprovisionamiento (launch_infra.py)
+
+Módulos:
+    common      colores, tag, parámetros de espera y ApiStats
+    registry    registro de tipos de recurso (describe, borrado, espera, dependencias)
+    resources   tipos EC2/VPC/TGW registrados
+    inventory   inventario por Tagging API o describe por tipo
+    waiters     esperas por lotes (BatchWaiter)
+    teardown    grafo de dependencias y motor de borrado en paralelo
+    journal     diario para reanudar una limpieza interrumpida
+    regions     limpieza de varias regiones a la vez
+    plan        plan de borrado (camino crítico, duración y llamadas previstas)
+    provision   motor de pasos en paralelo para los scripts de creación
+    readiness   esperas a condiciones reales (ruta activa, NAT, IGW, instancias)
+    snapshot    foto de una VPC para las comprobaciones de existencia
+    topology    topología declarativa con plan/apply contra esa foto
+    sg          reglas de Security Groups como conjuntos (authorize/revoke por diferencia)
+    nacl        entradas y asociaciones de NACLs por diferencias
+    rds_fleet   flotas de instancias RDS creadas a la vez y seguidas con un describe por consulta
+    ami         AMIs por SSM o describe acotado, con caché en disco
+    fleet       instancias lanzadas en bloque (MaxCount) y esperadas con un único BatchWaiter
+    peering     peering entre Transit Gateways de dos regiones como máquina de estados
+"""
+
+from . import resources     # registra los tipos
+from .common import TAG_KEY, TAG_VALUE, ApiStats, Colors, print_color
+from .inventory import get_resources
+from .journal import Journal
+from .registry import REGISTRY, ResourceType, register
+from .teardown import build_dependency_graph, run_teardown
@@ -0,0 +1,106 @@
+"""
+Resolución de AMIs para los scripts de creación. La última Amazon Linux sale del
+parámetro público de SSM (una llamada, sin listar imágenes). Si el patrón no
+tiene parámetro o SSM no está permitido, se usa un describe_images acotado por
+dueño, arquitectura, estado y tipo de imagen. El resultado se guarda en una
+caché en disco por (región, patrón, arquitectura) con caducidad AMI_CACHE_TTL.
+
+    resolve_ami(ec2)                            # Amazon Linux 2 x86_64 de la región de ec2
+    resolve_ami(ec2, AMAZON_LINUX_2023, 'arm64')
+"""
+
+import json
+import os
+import threading
+import time
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+from . import common
+from .common import Colors, print_color
+
+AMI_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'mck21', 'amis.json')
+
+# Patrones de nombre ({arch}: x86_64 o arm64)
+AMAZON_LINUX_2 = 'amzn2-ami-hvm-*-{arch}-gp2'
+AMAZON_LINUX_2023 = 'al2023-ami-2023.*-kernel-6.1-{arch}'
+
+# Patrón -> parámetro público de SSM con la última AMI
+SSM_PARAMETERS = {
+    AMAZON_LINUX_2: '/aws/service/ami-amazon-linux-latest/amzn2-ami-hvm-{arch}-gp2',
+    AMAZON_LINUX_2023: '/aws/service/ami-amazon-linux-latest/al2023-ami-kernel-6.1-{arch}',
+}
+
+_lock = threading.Lock()
+_key_locks = {}
+
+def ssm_client(region):
+    """Cliente SSM de la región (en el hilo principal, como los de regions.make_clients)"""
+    return boto3.client('ssm', region_name=region)
+
+def _load(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _store(path, key, entry):
+    """Añade una entrada a la caché (escritura atómica: otro proceso nunca ve el fichero a medias)"""
+    with _lock:
+        cache = _load(path)
+        cache[key] = entry
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'w') as f:
+            json.dump(cache, f, indent=1)
+        os.replace(tmp, path)
+
+def from_ssm(ssm, pattern, arch):
+    """AMI del parámetro público de SSM del patrón (None si no tiene o no se puede leer)"""
+    parameter = SSM_PARAMETERS.get(pattern)
+    if parameter is None:
+        return None
+    try:
+        return ssm.get_parameter(Name=parameter.format(arch=arch))['Parameter']['Value']
+    except (ClientError, BotoCoreError) as e:
+        print_color(Colors.YELLOW, f"  SSM sin la AMI de {pattern.format(arch=arch)} ({e}); se usa describe_images")
+        return None
+
+def from_describe(ec2, pattern, arch, owners=('amazon',)):
+    """La imagen más reciente que cumple el patrón, con los filtros en el servidor
+    para que la respuesta sea lo más corta posible"""
+    images = ec2.describe_images(Owners=list(owners), Filters=[
+        {'Name': 'name', 'Values': [pattern.format(arch=arch)]},
+        {'Name': 'architecture', 'Values': [arch]},
+        {'Name': 'state', 'Values': ['available']},
+        {'Name': 'image-type', 'Values': ['machine']},
+        {'Name': 'root-device-type', 'Values': ['ebs']},
+        {'Name': 'virtualization-type', 'Values': ['hvm']},
+    ])['Images']
+    if not images:
+        raise LookupError(f"Sin AMIs para {pattern.format(arch=arch)} en {ec2.meta.region_name}")
+    return max(images, key=lambda image: image['CreationDate'])['ImageId']
+
+def resolve_ami(ec2, pattern=AMAZON_LINUX_2, arch='x86_64', ssm=None, ttl=None, cache_path=None):
+    """ID de la última AMI del patrón en la región de ec2: caché en disco, después
+    SSM y por último describe_images. ttl=0 ignora la caché. Desde un hilo hay que
+    pasar ssm, creado antes en el hilo principal (boto3.client no es thread-safe)"""
+    region = ec2.meta.region_name
+    ttl = common.AMI_CACHE_TTL if ttl is None else ttl
+    path = cache_path or AMI_CACHE_PATH
+    key = f"{region}|{pattern}|{arch}"
+    with _lock:
+        key_lock = _key_locks.setdefault(key, threading.Lock())
+    # Varias instancias con el mismo patrón a la vez: solo una consulta a AWS
+    with key_lock:
+        entry = _load(path).get(key)
+        if entry and time.time() - entry['time'] < ttl:
+            return entry['ami']
+        ami = from_ssm(ssm or ssm_client(region), pattern, arch)
+        source = 'ssm'
+        if ami is None:
+            ami, source = from_describe(ec2, pattern, arch), 'describe'
+        _store(path, key, {'ami': ami, 'time': time.time(), 'source': source})
+        return ami
@@ -0,0 +1,697 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark de la limpieza mck21 contra un backend EC2 simulado en memoria (no llama a AWS)
+  - inventario: describe por tipo vs Tagging API (llamadas API y latencia)
+  - borrado: orden por fases original vs motor DAG en paralelo
+  - regiones: dos regiones unidas por un TGW peering, una sola región vs todas
+  - reanudación: se "mata" la limpieza en la llamada N y se repite con y sin diario
+  - reintentos: ENIs que tardan en liberarse y throttling, con y sin cola de reintentos
+  - ENIs: subnets/SG esperando a su última ENI de instancias vs a ciegas (la de Lambda no se espera)
+  - plan: duración y llamadas estimadas (historial de una ejecución previa) vs reales
+  - instancias: muchas instancias por subnet, terminate uno a uno vs por lotes
+Cada llamada tarda API_LATENCY y los borrados asíncronos (instancias, NAT,
+TGW attachments) tardan lo indicado en DELETE_DELAY antes de completarse.
+
+Uso:
+    python -m mck21.bench [--vpcs 1 10]
+"""
+
+import argparse
+import contextlib
+import functools
+import importlib.util
+import io
+import itertools
+import os
+import random
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from botocore.exceptions import ClientError
+
+from . import common, registry
+from .common import ApiStats
+from .inventory import get_resources
+from .journal import Journal
+from .plan import History, region_plan
+from .regions import clean_region
+from .teardown import SharedClaims, run_teardown
+
+API_LATENCY = 0.02          # segundos por llamada
+POLL_INTERVAL = 0.05        # sustituye a los 5s reales
+MAX_POLL_INTERVAL = 0.2     # sustituye a los 30s reales
+PAGE_SIZE = 100             # elementos por página en describes y Tagging API
+DELETE_DELAY = {            # tiempo hasta que el borrado se completa
+    'instance': 0.6,
+    'natgateway': 0.8,
+    'transit-gateway-attachment': 0.4,
+}
+ENI_DELAY = 0.5             # la ENI de una instancia sigue viva tras terminarla
+LAMBDA_ENI_DELAY = 1.5      # ENI gestionada (Lambda) que se libera sola pasado un rato
+INSTANCES_PER_SUBNET = 25   # escenario de instancias: 50 por VPC
+THROTTLE_RATE = 0.05        # fracción de llamadas de borrado con RequestLimitExceeded
+MUTATING = ('Terminate', 'Delete', 'Release', 'Detach', 'Disassociate')
+# Tipo interno -> tipo del ARN en la Tagging API
+ARN_TYPES = {v: k for k, v in registry.arn_types().items()}
+
+class Killed(Exception):
+    """El proceso ha muerto: ninguna llamada posterior llega a AWS"""
+
+def _error(code, msg):
+    return ClientError({'Error': {'Code': code, 'Message': msg}}, 'FakeEC2')
+
+def api(fn):
+    """Marca un método como llamada API: latencia, contador y eventos before/after-call"""
+    operation = ''.join(part.title() for part in fn.__name__.split('_'))
+
+    @functools.wraps(fn)
+    def wrapper(self, **kwargs):
+        self._call(operation)
+        try:
+            return fn(self, **kwargs)
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'DependencyViolation':
+                with self.lock:
+                    self.violations += 1
+            raise
+    return wrapper
+
+class FakeEvents:
+    """Subconjunto de los eventos de botocore que usa ApiStats"""
+
+    def __init__(self):
+        self.handlers = []
+
+    def register(self, event, handler):
+        self.handlers.append((event, handler))
+
+    def emit(self, event, **kwargs):
+        for name, handler in self.handlers:
+            if event.startswith(name):
+                handler(**kwargs)
+
+class FakeClient:
+    service = 'ec2'
+
+    def __init__(self, region='us-east-1'):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.violations = 0     # DependencyViolation devueltos
+        self.budget = None      # llamadas hasta "matar" el proceso (None = sin límite)
+        self.throttle = 0.0     # probabilidad de RequestLimitExceeded en llamadas de borrado
+        self.latency = API_LATENCY
+        self.meta = SimpleNamespace(events=FakeEvents(), region_name=region)
+
+    def _call(self, operation):
+        model = SimpleNamespace(name=operation, service_model=SimpleNamespace(service_name=self.service))
+        context = {}
+        self.meta.events.emit(f'before-call.{self.service}.{operation}', model=model, context=context)
+        with self.lock:
+            if self.budget is not None and self.calls >= self.budget:
+                raise Killed(operation)
+            self.calls += 1
+        time.sleep(self.latency)
+        if self.throttle and operation.startswith(MUTATING) and random.random() < self.throttle:
+            raise _error('RequestLimitExceeded', 'Request limit exceeded.')
+        self.meta.events.emit(f'after-call.{self.service}.{operation}', model=model, context=context)
+
+    def can_paginate(self, operation):
+        return operation != 'describe_addresses'
+
+    def get_paginator(self, operation):
+        return FakePaginator(self, operation)
+
+class FakePaginator:
+    """Cada página extra cuenta como una llamada más"""
+
+    def __init__(self, client, operation):
+        self.client, self.operation = client, operation
+
+    def paginate(self, PaginationConfig=None, **kwargs):
+        page = getattr(self.client, self.operation)(**kwargs)
+        key = next(k for k, v in page.items() if isinstance(v, list))
+        items = page[key]
+        for i in range(0, max(len(items), 1), PAGE_SIZE):
+            if i:
+                self.client._call(self.operation)
+            yield {key: items[i:i + PAGE_SIZE]}
+
+class FakeWaiter:
+    def __init__(self, ec2):
+        self.ec2 = ec2
+
+    def wait(self, InstanceIds, WaiterConfig=None):
+        delay = (WaiterConfig or {}).get('Delay', POLL_INTERVAL)
+        while True:
+            resp = self.ec2.describe_instances(InstanceIds=InstanceIds)
+            states = [i['State']['Name'] for res in resp['Reservations'] for i in res['Instances']]
+            if all(s == 'terminated' for s in states):
+                return
+            time.sleep(delay)
+
+class FakeEC2(FakeClient):
+    """Backend EC2 en memoria que respeta las dependencias reales de borrado"""
+
+    def __init__(self, vpcs=1, region='us-east-1', eni_delay=0.0, lambda_eni_delay=None, instances=1):
+        super().__init__(region)
+        self.eni_delay = eni_delay
+        self.lambda_eni_delay = lambda_eni_delay
+        self.instances = instances  # instancias por subnet
+        self.ids = itertools.count(1)
+        self.res = {}       # id -> dict(type, deleted_at, ...)
+        self.redundant = 0  # borrados sobre recursos ya borrados o en borrado
+        for _ in range(vpcs):
+            self._build_vpc()
+
+    # --- utilidades internas ---
+    def _new(self, rtype, prefix, **attrs):
+        rid = f"{prefix}-{next(self.ids):08x}"
+        self.res[rid] = dict(type=rtype, deleted_at=None, **attrs)
+        return rid
+
+    def _alive(self, rid):
+        r = self.res.get(rid)
+        return r is not None and (r['deleted_at'] is None or r['deleted_at'] > time.time())
+
+    def _live(self, rtype, **match):
+        return [rid for rid, r in self.res.items()
+                if r['type'] == rtype and self._alive(rid) and all(r.get(k) == v for k, v in match.items())]
+
+    def _select(self, rtype, filters, id_filter, ids=None):
+        """IDs vivos del tipo que cumplen los filtros por ID (los de tag se asumen ciertos)"""
+        found = ids or self._live(rtype)
+        for f in filters or []:
+            if f['Name'] == id_filter:
+                found = [rid for rid in found if rid in f['Values']]
+            elif f['Name'] == 'transit-gateway-id':
+                found = [rid for rid in found if self.res[rid]['tgw'] in f['Values']]
+        return found
+
+    def _delete(self, rid, delay=0.0):
+        if rid in self.res and self.res[rid]['deleted_at'] is not None:
+            self.redundant += 1
+        if not self._alive(rid):
+            raise _error('InvalidID.NotFound', f"{rid} does not exist")
+        if self.res[rid]['deleted_at'] is None:
+            self.res[rid]['deleted_at'] = time.time() + delay
+            peer = self.res[rid].get('peer')
+            if peer:
+                peer.res[rid]['deleted_at'] = self.res[rid]['deleted_at']
+
+    def _state(self, rid, alive, gone):
+        r = self.res[rid]
+        if r['deleted_at'] is None:
+            return alive
+        return gone if r['deleted_at'] <= time.time() else 'deleting'
+
+    def _build_vpc(self):
+        vpc = self._new('vpc', 'vpc')
+        self._new('internet-gateway', 'igw', vpcs=[vpc])
+        subnets = [self._new('subnet', 'subnet', vpc=vpc) for _ in range(2)]
+        sgs = [self._new('security-group', 'sg', vpc=vpc) for _ in range(2)]
+        for subnet in subnets:
+            self._new('route-table', 'rtb', vpc=vpc, assoc=[f"rtbassoc-{subnet[7:]}"])
+        for subnet, sg in zip(subnets, sgs):
+            for _ in range(self.instances):
+                instance = self._new('instance', 'i', vpc=vpc, subnet=subnet, sgs=[sg])
+                self._new('network-interface', 'eni', vpc=vpc, subnet=subnet, sgs=[sg], instance=instance)
+        if self.lambda_eni_delay is not None:
+            lambda_eni = self._new('network-interface', 'eni', vpc=vpc, subnet=subnets[1], sgs=[sgs[1]],
+                                   instance=None, managed='AWS Lambda VPC ENI-mck21-fn')
+            self.res[lambda_eni]['deleted_at'] = time.time() + self.lambda_eni_delay
+        eip = self._new('address', 'eipalloc')
+        self._new('natgateway', 'nat', vpc=vpc, subnet=subnets[0], eip=eip)
+        tgw = self._live('transit-gateway')
+        tgw = tgw[0] if tgw else self._new('transit-gateway', 'tgw')
+        self._new('transit-gateway-attachment', 'tgw-attach', vpc=vpc, tgw=tgw)
+
+    def link_peering(self, other):
+        """TGW peering entre dos regiones: el mismo attachment visible desde ambos TGW"""
+        tgw, other_tgw = self._live('transit-gateway')[0], other._live('transit-gateway')[0]
+        att = self._new('transit-gateway-attachment', 'tgw-attach', tgw=tgw, peer=other)
+        other.res[att] = dict(type='transit-gateway-attachment', deleted_at=None, tgw=other_tgw, peer=self)
+
+    # --- describe ---
+    @api
+    def describe_instances(self, Filters=None, InstanceIds=None):
+        ids = self._select('instance', Filters, 'instance-id', InstanceIds)
+        return {'Reservations': [{'Instances': [{
+            'InstanceId': i, 'VpcId': self.res[i]['vpc'], 'SubnetId': self.res[i]['subnet'],
+            'SecurityGroups': [{'GroupId': g} for g in self.res[i]['sgs']],
+            'State': {'Name': self._state(i, 'running', 'terminated').replace('deleting', 'shutting-down')},
+        }]} for i in ids]}
+
+    @api
+    def describe_subnets(self, Filters=None):
+        return {'Subnets': [{'SubnetId': s, 'VpcId': self.res[s]['vpc']}
+                            for s in self._select('subnet', Filters, 'subnet-id')]}
+
+    @api
+    def describe_nat_gateways(self, Filter=None, NatGatewayIds=None):
+        ids = self._select('natgateway', Filter, 'nat-gateway-id', NatGatewayIds)
+        return {'NatGateways': [{
+            'NatGatewayId': n, 'VpcId': self.res[n]['vpc'], 'SubnetId': self.res[n]['subnet'],
+            'NatGatewayAddresses': [{'AllocationId': self.res[n]['eip']}],
+            'State': self._state(n, 'available', 'deleted'),
+        } for n in ids]}
+
+    @api
+    def describe_addresses(self, Filters=None):
+        return {'Addresses': [{'AllocationId': a} for a in self._select('address', Filters, 'allocation-id')]}
+
+    @api
+    def describe_route_tables(self, Filters=None, RouteTableIds=None):
+        ids = self._select('route-table', Filters, 'route-table-id', RouteTableIds)
+        return {'RouteTables': [{
+            'RouteTableId': r, 'VpcId': self.res[r]['vpc'],
+            'Associations': [{'RouteTableAssociationId': a, 'Main': False} for a in self.res[r]['assoc']],
+        } for r in ids]}
+
+    @api
+    def describe_security_groups(self, Filters=None):
+        return {'SecurityGroups': [{'GroupId': g, 'GroupName': g, 'VpcId': self.res[g]['vpc']}
+                                   for g in self._select('security-group', Filters, 'group-id')]}
+
+    @api
+    def describe_internet_gateways(self, Filters=None, InternetGatewayIds=None):
+        ids = self._select('internet-gateway', Filters, 'internet-gateway-id', InternetGatewayIds)
+        return {'InternetGateways': [{
+            'InternetGatewayId': g, 'Attachments': [{'VpcId': v} for v in self.res[g]['vpcs']],
+        } for g in ids]}
+
+    @api
+    def describe_vpcs(self, Filters=None):
+        return {'Vpcs': [{'VpcId': v} for v in self._select('vpc', Filters, 'vpc-id')]}
+
+    @api
+    def describe_transit_gateways(self, Filters=None):
+        return {'TransitGateways': [{'TransitGatewayId': t}
+                                    for t in self._select('transit-gateway', Filters, 'transit-gateway-id')]}
+
+    @api
+    def describe_transit_gateway_attachments(self, Filters=None, TransitGatewayAttachmentIds=None):
+        ids = self._select('transit-gateway-attachment', Filters, 'transit-gateway-attachment-id',
+                           TransitGatewayAttachmentIds)
+        return {'TransitGatewayAttachments': [{
+            'TransitGatewayAttachmentId': a, 'TransitGatewayId': self.res[a]['tgw'],
+            'ResourceType': 'peering' if self.res[a].get('peer') else 'vpc',
+            'ResourceId': self.res[a].get('vpc'),
+            'State': self._state(a, 'available', 'deleted'),
+        } for a in ids]}
+
+    @api
+    def describe_network_interfaces(self, Filters=None):
+        vpcs = next(f['Values'] for f in Filters if f['Name'] == 'vpc-id')
+        return {'NetworkInterfaces': [{
+            'NetworkInterfaceId': e, 'VpcId': self.res[e]['vpc'], 'SubnetId': self.res[e]['subnet'],
+            'Groups': [{'GroupId': g} for g in self.res[e]['sgs']],
+            **({'Attachment': {'InstanceId': self.res[e]['instance']}} if self.res[e]['instance'] else {}),
+            **({'RequesterManaged': True, 'Description': self.res[e]['managed']} if self.res[e].get('managed') else {}),
+            'Status': 'in-use',
+        } for e in self._live('network-interface') if self.res[e]['vpc'] in vpcs]}
+
+    @api
+    def describe_vpc_peering_connections(self, Filters=None, VpcPeeringConnectionIds=None):
+        return {'VpcPeeringConnections': []}
+
+    def get_waiter(self, name):
+        return FakeWaiter(self)
+
+    # --- delete (con comprobación de dependencias) ---
+    def _blocked(self, rid, **match):
+        for rtype in ('instance', 'natgateway', 'transit-gateway-attachment'):
+            if self._live(rtype, **match):
+                raise _error('DependencyViolation', f"{rid} has dependencies and cannot be deleted")
+
+    @api
+    def terminate_instances(self, InstanceIds):
+        for i in InstanceIds:
+            self._delete(i, DELETE_DELAY['instance'])
+            # La ENI (sin tag, fuera del inventario) se libera un rato después
+            for eni in self._live('network-interface', instance=i):
+                self.res[eni]['deleted_at'] = self.res[i]['deleted_at'] + self.eni_delay
+
+    @api
+    def delete_nat_gateway(self, NatGatewayId):
+        self._delete(NatGatewayId, DELETE_DELAY['natgateway'])
+
+    @api
+    def delete_transit_gateway_vpc_attachment(self, TransitGatewayAttachmentId):
+        self._delete(TransitGatewayAttachmentId, DELETE_DELAY['transit-gateway-attachment'])
+
+    @api
+    def delete_transit_gateway_peering_attachment(self, TransitGatewayAttachmentId):
+        self._delete(TransitGatewayAttachmentId, DELETE_DELAY['transit-gateway-attachment'])
+
+    @api
+    def delete_transit_gateway(self, TransitGatewayId):
+        self._blocked(TransitGatewayId, tgw=TransitGatewayId)
+        self._delete(TransitGatewayId)
+
+    @api
+    def release_address(self, AllocationId):
+        self._blocked(AllocationId, eip=AllocationId)
+        self._delete(AllocationId)
+
+    @api
+    def delete_subnet(self, SubnetId):
+        self._blocked(SubnetId, subnet=SubnetId)
+        for att in self._live('transit-gateway-attachment', vpc=self.res[SubnetId]['vpc']):
+            raise _error('DependencyViolation', f"{SubnetId} is used by {att}")
+        if self._live('network-interface', subnet=SubnetId):
+            raise _error('DependencyViolation', f"The subnet '{SubnetId}' has dependencies and cannot be deleted.")
+        self._delete(SubnetId)
+
+    @api
+    def disassociate_route_table(self, AssociationId):
+        pass
+
+    @api
+    def delete_route_table(self, RouteTableId):
+        self._delete(RouteTableId)
+
+    @api
+    def delete_security_group(self, GroupId):
+        if any(GroupId in self.res[i]['sgs'] for i in self._live('instance') + self._live('network-interface')):
+            raise _error('DependencyViolation', f"resource {GroupId} has a dependent object")
+        self._delete(GroupId)
+
+    @api
+    def detach_internet_gateway(self, InternetGatewayId, VpcId):
+        if self._live('instance', vpc=VpcId) or self._live('natgateway', vpc=VpcId):
+            raise _error('DependencyViolation', f"Network {VpcId} has some mapped public address(es)")
+        if VpcId not in self.res[InternetGatewayId]['vpcs']:
+            self.redundant += 1
+            raise _error('Gateway.NotAttached', f"resource {InternetGatewayId} is not attached to network {VpcId}")
+        self.res[InternetGatewayId]['vpcs'] = []
+
+    @api
+    def delete_internet_gateway(self, InternetGatewayId):
+        if self.res[InternetGatewayId]['vpcs']:
+            raise _error('DependencyViolation', f"{InternetGatewayId} is attached")
+        self._delete(InternetGatewayId)
+
+    @api
+    def delete_vpc(self, VpcId):
+        for rtype in ('subnet', 'security-group', 'route-table', 'instance', 'natgateway', 'network-interface'):
+            if self._live(rtype, vpc=VpcId):
+                raise _error('DependencyViolation', f"The vpc '{VpcId}' has dependencies and cannot be deleted.")
+        if any(VpcId in self.res[g]['vpcs'] for g in self._live('internet-gateway')):
+            raise _error('DependencyViolation', f"The vpc '{VpcId}' has dependencies and cannot be deleted.")
+        self._delete(VpcId)
+
+    def leftovers(self):
+        return sum(1 for rid in self.res if self._alive(rid))
+
+class FakeTagging(FakeClient):
+    """Resource Groups Tagging API sobre el mismo backend: devuelve los ARN etiquetados"""
+    service = 'resourcegroupstaggingapi'
+
+    def __init__(self, ec2):
+        super().__init__()
+        self.ec2 = ec2
+
+    @api
+    def get_resources(self, TagFilters=None, ResourceTypeFilters=None):
+        return {'ResourceTagMappingList': [
+            {'ResourceARN': f"arn:aws:ec2:us-east-1:123456789012:{ARN_TYPES[r['type']]}/{rid}"}
+            for rid, r in self.ec2.res.items() if r['type'] in ARN_TYPES and self.ec2._alive(rid)
+        ]}
+
+def load_script(path):
+    """Importa un script sin ejecutarlo (todo va detrás de main())"""
+    spec = importlib.util.spec_from_file_location(os.path.splitext(os.path.basename(path))[0], path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+def legacy_teardown(ec2, resources):
+    """Reproduce el main() original: una fase por tipo, cada una esperando a la anterior"""
+    of = lambda rtype: [r for r in resources if r['ResourceType'] == rtype]
+    ctx = SimpleNamespace(ec2=ec2, issue=lambda key, call: call(), wait_drained=lambda rid: None)
+
+    def swallow(fn, *args):
+        try:
+            fn(*args)
+        except ClientError:
+            pass
+
+    ids = [r['ResourceId'] for r in of('instance')]
+    if ids:
+        ec2.terminate_instances(InstanceIds=ids)
+        ec2.get_waiter('instance_terminated').wait(InstanceIds=ids)
+    for r in of('natgateway'):
+        ec2.delete_nat_gateway(NatGatewayId=r['ResourceId'])
+        while ec2.describe_nat_gateways(NatGatewayIds=[r['ResourceId']])['NatGateways'][0]['State'] != 'deleted':
+            time.sleep(POLL_INTERVAL)
+    for r in of('address'):
+        swallow(registry.get('address').delete, ctx, r)
+    for r in of('transit-gateway'):
+        for att in of('transit-gateway-attachment'):
+            if att['TransitGatewayId'] == r['ResourceId']:
+                swallow(lambda att_id: ec2.delete_transit_gateway_vpc_attachment(
+                    TransitGatewayAttachmentId=att_id), att['ResourceId'])
+        time.sleep(2 * POLL_INTERVAL)   # el time.sleep(10) original, escalado
+        swallow(registry.get('transit-gateway').delete, ctx, r)
+    for rtype in ('subnet', 'route-table', 'security-group', 'internet-gateway', 'vpc'):
+        for r in of(rtype):
+            swallow(registry.get(rtype).delete, ctx, r)
+
+def bench_inventory(vpcs):
+    rows = []
+    for mode in ('describe', 'tagging'):
+        ec2 = FakeEC2(vpcs)
+        stats = ApiStats()
+        stats.attach(ec2)
+        tagging = stats.attach(FakeTagging(ec2))
+        start = time.time()
+        resources = get_resources(ec2, mode=mode, tagging=tagging)
+        calls, latency = stats.total()
+        rows.append((mode, vpcs, len(resources), time.time() - start, calls, latency))
+    return rows
+
+def bench_teardown(vpcs):
+    rows = []
+    for mode in ('fases', 'dag'):
+        ec2 = FakeEC2(vpcs)
+        resources = get_resources(ec2, mode='describe')
+        ec2.calls = 0
+        start = time.time()
+        if mode == 'fases':
+            legacy_teardown(ec2, resources)
+        else:
+            run_teardown(ec2, resources)
+        rows.append((mode, vpcs, len(resources), time.time() - start, ec2.calls, ec2.leftovers()))
+    return rows
+
+def bench_regions(vpcs):
+    """Antes solo se limpiaba la región por defecto; ahora todas a la vez"""
+    rows = []
+    for mode in ('una', 'secuencial', 'concurrente'):
+        regions = {name: FakeEC2(vpcs, name) for name in ('us-east-1', 'us-west-2')}
+        regions['us-east-1'].link_peering(regions['us-west-2'])
+        targets = ['us-east-1'] if mode == 'una' else list(regions)
+        clients = {}
+        for name in targets:
+            stats = ApiStats()
+            clients[name] = (stats.attach(regions[name]), stats.attach(FakeTagging(regions[name])), stats)
+        claims = SharedClaims()
+        run = lambda name: clean_region(name, clients[name], 'tagging',
+                                                    common.MAX_WORKERS, claims)
+        start = time.time()
+        if mode == 'concurrente':
+            with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+                results = list(pool.map(run, targets))
+        else:
+            results = [run(name) for name in targets]
+        rows.append((mode, len(targets), sum(r['resources'] for r in results), time.time() - start,
+                     sum(r['failed'] for r in results), sum(ec2.leftovers() for ec2 in regions.values())))
+    return rows
+
+def bench_resume(vpcs, cut):
+    """Mata la limpieza tras `cut` (fracción) de sus llamadas y la repite: sin diario
+    (inventario nuevo, como antes) o reanudando desde el diario"""
+    full = FakeEC2(vpcs)
+    resources = get_resources(full, mode='describe')
+    full.calls = 0
+    run_teardown(full, resources)
+    budget = int(full.calls * cut)
+
+    rows = []
+    for mode in ('sin diario', 'diario'):
+        ec2 = FakeEC2(vpcs)
+        tagging = FakeTagging(ec2)
+        clients = (ec2, tagging, ApiStats())
+        path = os.path.join(tempfile.mkdtemp(), 'journal.jsonl')
+
+        # Primera ejecución: muere en la llamada `budget`; las esperas vencen enseguida
+        journal = Journal(path)
+        journal.begin([ec2.meta.region_name])
+        journal.plan(ec2.meta.region_name, resources)
+        ec2.calls, ec2.budget, tagging.budget = 0, budget, 0
+        timeouts = common.WAIT_TIMEOUT, common.ENI_DRAIN_TIMEOUT
+        common.WAIT_TIMEOUT = common.ENI_DRAIN_TIMEOUT = 0.3
+        run_teardown(ec2, resources, journal=journal)
+        common.WAIT_TIMEOUT, common.ENI_DRAIN_TIMEOUT = timeouts
+        journal.close()
+
+        # Segunda ejecución (proceso nuevo)
+        ec2.calls, ec2.budget, tagging.budget, ec2.redundant = 0, None, None, 0
+        if mode == 'diario':
+            journal = Journal(path)
+            journal.begin([ec2.meta.region_name])
+            claims = SharedClaims()
+            claims.ids.update(journal.all_issued())
+        else:
+            journal, claims = None, SharedClaims()
+        start = time.time()
+        row = clean_region(ec2.meta.region_name, clients, 'describe',
+                                       common.MAX_WORKERS, claims, journal)
+        rows.append((mode, vpcs, f"{budget}/{full.calls}", time.time() - start, ec2.calls,
+                     ec2.redundant, row['skipped'], ec2.leftovers()))
+    return rows
+
+def bench_retries(vpcs):
+    """ENIs que tardan en liberarse y throttling: antes hacía falta otra ejecución"""
+    rows = []
+    for mode in ('sin reintentos', 'reintentos'):
+        ec2 = FakeEC2(vpcs, eni_delay=ENI_DELAY)
+        resources = get_resources(ec2, mode='describe')
+        ec2.calls, ec2.throttle = 0, THROTTLE_RATE
+        timeouts = common.RETRY_TIMEOUT, common.ENI_DRAIN_TIMEOUT
+        if mode == 'sin reintentos':
+            # Una instancia que no se llegó a terminar deja su ENI: sin tope la subnet la esperaría 600s
+            common.RETRY_TIMEOUT, common.ENI_DRAIN_TIMEOUT = 0, 1.0
+        start = time.time()
+        summary = run_teardown(ec2, resources)
+        common.RETRY_TIMEOUT, common.ENI_DRAIN_TIMEOUT = timeouts
+        rows.append((mode, vpcs, time.time() - start, ec2.calls, summary['retries'], summary['failed'],
+                     ec2.leftovers()))
+    return rows
+
+def bench_enis(vpcs):
+    """Subnets y SG que esperan a su última ENI frente a intentarlo y reintentar"""
+    rows = []
+    for mode in ('a ciegas', 'rastreo'):
+        ec2 = FakeEC2(vpcs, eni_delay=ENI_DELAY, lambda_eni_delay=LAMBDA_ENI_DELAY)
+        resources = get_resources(ec2, mode='describe')
+        ec2.calls = 0
+        drain = common.ENI_DRAIN_TIMEOUT
+        if mode == 'a ciegas':
+            common.ENI_DRAIN_TIMEOUT = 0
+        start = time.time()
+        summary = run_teardown(ec2, resources)
+        common.ENI_DRAIN_TIMEOUT = drain
+        rows.append((mode, vpcs, time.time() - start, ec2.calls, ec2.violations, summary['retries'],
+                     ec2.leftovers()))
+    return rows
+
+def bench_plan(vpcs):
+    """Plan con el historial de una ejecución anterior frente a la limpieza real"""
+    history = History(None)
+    warmup = FakeEC2(vpcs)
+    history.record(run_teardown(warmup, get_resources(warmup, mode='describe'))['durations'])
+
+    ec2 = FakeEC2(vpcs)
+    resources = get_resources(ec2, mode='describe')
+    plan = region_plan(resources, history)
+    ec2.calls = 0
+    summary = run_teardown(ec2, resources)
+    return [(vpcs, len(resources), plan['estimated_seconds'], summary['elapsed'],
+             sum(plan['api_calls']['ec2'].values()), ec2.calls, len(plan['critical_path']))]
+
+def bench_instances(vpcs, per_subnet):
+    """Muchas instancias: antes un terminate_instances por instancia, ahora por lotes.
+    Las subnets y SG se borran en cuanto terminan sus instancias"""
+    rows = []
+    instance = registry.get('instance')
+    for mode in ('una a una', 'lotes'):
+        ec2 = FakeEC2(vpcs, instances=per_subnet)
+        stats = ApiStats()
+        stats.attach(ec2)
+        resources = get_resources(ec2, mode='describe')
+        stats.reset()
+        batch = instance.delete_batch
+        if mode == 'una a una':
+            instance.delete_batch = None
+        start = time.time()
+        summary = run_teardown(ec2, resources)
+        instance.delete_batch = batch
+        count = sum(r['ResourceType'] == 'instance' for r in resources)
+        rows.append((mode, vpcs, count, time.time() - start, stats.calls['ec2:TerminateInstances'],
+                     stats.calls['ec2:DescribeInstances'], sum(stats.calls.values()), summary['failed'],
+                     ec2.leftovers()))
+    return rows
+
+def quiet(bench, *args):
+    """Ejecuta un escenario sin el detalle por recurso que imprime la limpieza"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return bench(*args)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark de la limpieza mck21 con EC2 simulado')
+    parser.add_argument('--vpcs', type=int, nargs='+', default=[1, 10])
+    args = parser.parse_args()
+
+    common.POLL_INTERVAL = POLL_INTERVAL
+    common.MAX_POLL_INTERVAL = MAX_POLL_INTERVAL
+
+    print("INVENTARIO")
+    print(f"{'modo':<10}{'vpcs':>6}{'recursos':>10}{'tiempo(s)':>12}{'llamadas':>10}{'latencia(s)':>13}")
+    for vpcs in args.vpcs:
+        for mode, n, total, elapsed, calls, latency in quiet(bench_inventory, vpcs):
+            print(f"{mode:<10}{n:>6}{total:>10}{elapsed:>12.2f}{calls:>10}{latency:>13.2f}")
+
+    print("\nBORRADO")
+    print(f"{'modo':<10}{'vpcs':>6}{'recursos':>10}{'tiempo(s)':>12}{'llamadas':>10}{'restos':>13}")
+    for vpcs in args.vpcs:
+        for mode, n, total, elapsed, calls, left in quiet(bench_teardown, vpcs):
+            print(f"{mode:<10}{n:>6}{total:>10}{elapsed:>12.2f}{calls:>10}{left:>13}")
+
+    print("\nREGIONES (us-east-1 <-> us-west-2 con TGW peering)")
+    print(f"{'modo':<12}{'regiones':>9}{'recursos':>10}{'tiempo(s)':>12}{'errores':>9}{'restos':>8}")
+    for vpcs in args.vpcs:
+        for mode, n, total, elapsed, failed, left in quiet(bench_regions, vpcs):
+            print(f"{mode:<12}{n:>9}{total:>10}{elapsed:>12.2f}{failed:>9}{left:>8}")
+
+    print(f"\nREINTENTOS (ENIs {ENI_DELAY}s, throttling {THROTTLE_RATE:.0%})")
+    print(f"{'modo':<16}{'vpcs':>6}{'tiempo(s)':>12}{'llamadas':>10}{'reintentos':>12}{'errores':>9}{'restos':>8}")
+    for vpcs in args.vpcs:
+        for mode, n, elapsed, calls, retries, failed, left in quiet(bench_retries, vpcs):
+            print(f"{mode:<16}{n:>6}{elapsed:>12.2f}{calls:>10}{retries:>12}{failed:>9}{left:>8}")
+
+    print(f"\nENIs (instancia {ENI_DELAY}s, Lambda {LAMBDA_ENI_DELAY}s)")
+    print(f"{'modo':<10}{'vpcs':>6}{'tiempo(s)':>12}{'llamadas':>10}{'violaciones':>13}{'reintentos':>12}{'restos':>8}")
+    for vpcs in args.vpcs:
+        for mode, n, elapsed, calls, violations, retries, left in quiet(bench_enis, vpcs):
+            print(f"{mode:<10}{n:>6}{elapsed:>12.2f}{calls:>10}{violations:>13}{retries:>12}{left:>8}")
+
+    print("\nPLAN (estimado con el historial de una ejecución previa vs real)")
+    print(f"{'vpcs':>6}{'recursos':>10}{'est.(s)':>10}{'real(s)':>10}{'est.llam.':>11}{'llamadas':>10}{'camino':>8}")
+    for vpcs in args.vpcs:
+        for n, total, estimated, elapsed, planned, calls, path in quiet(bench_plan, vpcs):
+            print(f"{n:>6}{total:>10}{estimated:>10.2f}{elapsed:>10.2f}{planned:>11}{calls:>10}{path:>8}")
+
+    print(f"\nINSTANCIAS ({INSTANCES_PER_SUBNET} por subnet, lotes de {common.BATCH_CHUNK})")
+    print(f"{'modo':<11}{'vpcs':>6}{'instancias':>12}{'tiempo(s)':>12}{'terminate':>11}{'describe':>10}"
+          f"{'llamadas':>10}{'errores':>9}{'restos':>8}")
+    for vpcs in args.vpcs:
+        for mode, n, count, elapsed, terminate, describe, calls, failed, left in quiet(
+                bench_instances, vpcs, INSTANCES_PER_SUBNET):
+            print(f"{mode:<11}{n:>6}{count:>12}{elapsed:>12.2f}{terminate:>11}{describe:>10}"
+                  f"{calls:>10}{failed:>9}{left:>8}")
+
+    print("\nREANUDACIÓN (segunda ejecución tras matar la primera)")
+    print(f"{'modo':<12}{'vpcs':>6}{'corte':>10}{'tiempo(s)':>12}{'llamadas':>10}{'redundantes':>13}"
+          f"{'omitidos':>10}{'restos':>8}")
+    for vpcs in args.vpcs:
+        for cut in (0.25, 0.5, 0.75):
+            for mode, n, point, elapsed, calls, redundant, skipped, left in quiet(bench_resume, vpcs, cut):
+                print(f"{mode:<12}{n:>6}{point:>10}{elapsed:>12.2f}{calls:>10}{redundant:>13}"
+                      f"{skipped:>10}{left:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,915 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark del aprovisionamiento de networks/exam/launch_infra.py contra un EC2
+simulado en memoria (no llama a AWS). Las latencias son las reales escaladas
+por SCALE: llamada API ~150ms, NAT Gateway ~2 min hasta 'available', instancia
+~30s hasta 'running', waiters de boto3 que consultan cada 15s.
+  - secuencial: las acciones del plan de una en una (lo que hacía el script plano)
+  - grafo: acciones independientes a la vez con sus dependencias explícitas
+  - convergencia: el plan sobre la infraestructura ya creada, sin cambios y con
+    una regla de SG y otra de NACL añadidas a la topología
+  - RDS: flota de instancias con un waiter por instancia frente a RdsFleet
+    (creaciones a la vez y un describe por consulta para todas)
+  - capa: N instancias iguales lanzadas una a una con su waiter frente a un
+    run_instances con MaxCount y una única espera por lotes
+  - AMI: describe_images ordenado en Python frente a SSM, caché en disco y
+    describe acotado
+  - SG: grupo con cientos de reglas, creación y cambio de unas pocas con una
+    llamada por regla frente a la diferencia en un authorize y un revoke
+  - ej3: transit gateways en dos regiones, todo en orden con esperas de 10s
+    frente a las dos regiones a la vez y el peering como máquina de estados
+
+Uso:
+    python -m mck21.bench_provision [--runs 3]
+"""
+
+import argparse
+import contextlib
+import copy
+import fnmatch
+import io
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .bench import FakeClient, _error, api, load_script
+from . import ami, common, fleet, sg
+from .common import ApiStats, MAX_WORKERS
+from .provision import run_steps
+from .rds_fleet import RdsFleet
+from .snapshot import VpcSnapshot
+from .topology import Instance, NetworkAcl, Plan, SecurityGroup, Subnet, Topology
+
+SCALE = 0.02                    # 1s real = 20ms simulados
+API_LATENCY = 0.15 * SCALE
+READY_DELAY = {                 # tiempo hasta el estado final
+    'natgateway': 120 * SCALE,
+    'instance': 30 * SCALE,
+    'transit-gateway': 150 * SCALE,
+}
+PEERING_DELAY = (60 * SCALE, 120 * SCALE)  # hasta pendingAcceptance, y de aceptado a available
+OLD_SLEEP = 10 * SCALE          # pausa fija de los bucles de espera de ej3.py original
+EJ3 = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'networks', 'exam2', 'ej3.py')
+WAITER_DELAY = 15 * SCALE       # Delay por defecto de los waiters de EC2
+RDS_DELAY = (360 * SCALE, 60 * SCALE)   # creating, backing-up (±20% en creating)
+RDS_WAITER_DELAY = 30 * SCALE   # Delay del waiter db_instance_available
+IMAGES = 3000                   # imágenes de Amazon Linux 2 publicadas en la región
+IMAGE_LATENCY = 0.001 * SCALE   # ~1ms por imagen en la respuesta de describe_images (varios MB)
+LAUNCH_INFRA = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'networks', 'exam', 'launch_infra.py')
+
+class FakeWaiter:
+    """Waiter de boto3: consulta, y si no ha terminado duerme Delay y repite"""
+
+    def __init__(self, ec2, rtype, done):
+        self.ec2, self.rtype, self.done = ec2, rtype, done
+
+    def wait(self, WaiterConfig=None, **kwargs):
+        ids = next(iter(kwargs.values()))
+        ids = [ids] if isinstance(ids, str) else ids
+        delay = (WaiterConfig or {}).get('Delay', WAITER_DELAY)
+        while True:
+            self.ec2._call(f"Describe{self.rtype}")
+            if all(self.ec2._state(rid) == self.done for rid in ids):
+                return
+            time.sleep(delay)
+
+class FakeProvisionEC2(FakeClient):
+    """Backend EC2 en memoria para los scripts de creación"""
+
+    WAITERS = {'nat_gateway_available': ('NatGateways', 'available'),
+               'instance_running': ('Instances', 'running')}
+
+    def __init__(self, region='us-east-1'):
+        super().__init__(region)
+        self.latency = API_LATENCY
+        self.ids = itertools.count(1)
+        self.res = {}       # id -> dict(type, tags, ready_at, ...)
+        self.regions = {region: self}   # otras regiones (peering entre TGW)
+
+    # --- utilidades internas ---
+    def _new(self, rtype, prefix, TagSpecifications=None, **attrs):
+        rid = f"{prefix}-{next(self.ids):08x}"
+        tags = {t['Key']: t['Value'] for spec in TagSpecifications or [] for t in spec['Tags']}
+        delay = READY_DELAY.get(rtype)
+        with self.lock:
+            self.res[rid] = dict(type=rtype, tags=tags, ready_at=time.time() + delay if delay else None, **attrs)
+        return rid
+
+    def _state(self, rid):
+        r = self.res[rid]
+        if r['ready_at'] is None:
+            return 'available'
+        if r['ready_at'] > time.time():
+            return 'pending'
+        return 'running' if r['type'] == 'instance' else 'available'
+
+    def _value(self, rid, name):
+        """Valores de un recurso para un filtro de describe"""
+        r = self.res[rid]
+        if name.startswith('tag:'):
+            return [r['tags'].get(name[4:])]
+        if name in ('state', 'instance-state-name'):
+            return [self._state(rid)]
+        if name == 'vpc-id':
+            return [r.get('vpc')]
+        if name == 'group-name':
+            return [r.get('name')]
+        if name == 'attachment.vpc-id':
+            return r.get('attachments', [])
+        if name == 'association.subnet-id':
+            return list(r.get('associations', {}))
+        return [rid]
+
+    def _find(self, rtype, filters=None, ids=None):
+        found = [rid for rid, r in list(self.res.items()) if r['type'] == rtype and (ids is None or rid in ids)]
+        for f in filters or []:
+            found = [rid for rid in found if set(self._value(rid, f['Name'])) & set(f['Values'])]
+        return found
+
+    def _tags(self, rid):
+        return [{'Key': k, 'Value': v} for k, v in self.res[rid]['tags'].items()]
+
+    def get_waiter(self, name):
+        key, done = self.WAITERS[name]
+        return FakeWaiter(self, key, done)
+
+    # --- VPC ---
+    @api
+    def create_vpc(self, CidrBlock, TagSpecifications=None):
+        vpc = self._new('vpc', 'vpc', TagSpecifications, cidr=CidrBlock)
+        # La VPC trae su tabla de rutas principal, su NACL y su SG por defecto
+        self._new('route-table', 'rtb', vpc=vpc, routes=[], associations={})
+        self._new('network-acl', 'acl', vpc=vpc, default=True, associations={}, entries=[])
+        self._new('security-group', 'sg', vpc=vpc, name='default', rules={})
+        return {'Vpc': {'VpcId': vpc, 'CidrBlock': CidrBlock}}
+
+    @api
+    def modify_vpc_attribute(self, VpcId, **kwargs):
+        return {}
+
+    @api
+    def describe_vpcs(self, Filters=None, VpcIds=None):
+        return {'Vpcs': [{'VpcId': v, 'CidrBlock': self.res[v]['cidr'], 'Tags': self._tags(v)}
+                         for v in self._find('vpc', Filters, VpcIds)]}
+
+    # --- subredes ---
+    @api
+    def create_subnet(self, VpcId, CidrBlock, AvailabilityZone=None, TagSpecifications=None):
+        subnet = self._new('subnet', 'subnet', TagSpecifications, vpc=VpcId, cidr=CidrBlock, az=AvailabilityZone)
+        default = next(a for a in self._find('network-acl', [{'Name': 'vpc-id', 'Values': [VpcId]}])
+                       if self.res[a]['default'])
+        self.res[default]['associations'][subnet] = f"aclassoc-{subnet[7:]}"
+        return {'Subnet': {'SubnetId': subnet, 'VpcId': VpcId, 'CidrBlock': CidrBlock}}
+
+    @api
+    def modify_subnet_attribute(self, SubnetId, MapPublicIpOnLaunch=None, **kwargs):
+        if MapPublicIpOnLaunch is not None:
+            self.res[SubnetId]['public'] = MapPublicIpOnLaunch['Value']
+        return {}
+
+    @api
+    def describe_subnets(self, Filters=None, SubnetIds=None):
+        return {'Subnets': [{'SubnetId': s, 'VpcId': self.res[s]['vpc'], 'CidrBlock': self.res[s]['cidr'],
+                             'AvailabilityZone': self.res[s]['az'], 'Tags': self._tags(s),
+                             'MapPublicIpOnLaunch': self.res[s].get('public', False)}
+                            for s in self._find('subnet', Filters, SubnetIds)]}
+
+    # --- Internet Gateway ---
+    @api
+    def create_internet_gateway(self, TagSpecifications=None):
+        return {'InternetGateway': {'InternetGatewayId': self._new('internet-gateway', 'igw', TagSpecifications,
+                                                                   attachments=[])}}
+
+    @api
+    def attach_internet_gateway(self, InternetGatewayId, VpcId):
+        self.res[InternetGatewayId]['attachments'].append(VpcId)
+
+    @api
+    def describe_internet_gateways(self, Filters=None, InternetGatewayIds=None):
+        return {'InternetGateways': [{'InternetGatewayId': i, 'Tags': self._tags(i),
+                                      'Attachments': [{'VpcId': v, 'State': 'available'}
+                                                      for v in self.res[i]['attachments']]}
+                                     for i in self._find('internet-gateway', Filters, InternetGatewayIds)]}
+
+    # --- EIP / NAT ---
+    @api
+    def allocate_address(self, Domain='vpc', TagSpecifications=None):
+        eip = self._new('address', 'eipalloc', TagSpecifications)
+        return {'AllocationId': eip, 'PublicIp': f"198.51.100.{int(eip[9:], 16) % 256}"}
+
+    @api
+    def describe_addresses(self, Filters=None, AllocationIds=None):
+        users = {self.res[n]['eip']: n for n in self._find('natgateway')}
+        addresses = []
+        for a in self._find('address', Filters, AllocationIds):
+            address = {'AllocationId': a, 'PublicIp': f"198.51.100.{int(a[9:], 16) % 256}", 'Tags': self._tags(a)}
+            if a in users:
+                address['AssociationId'] = f"eipassoc-{users[a][4:]}"
+            addresses.append(address)
+        return {'Addresses': addresses}
+
+    @api
+    def create_nat_gateway(self, SubnetId, AllocationId, TagSpecifications=None):
+        nat = self._new('natgateway', 'nat', TagSpecifications, subnet=SubnetId, eip=AllocationId,
+                        vpc=self.res[SubnetId]['vpc'])
+        return {'NatGateway': {'NatGatewayId': nat, 'State': 'pending'}}
+
+    @api
+    def describe_nat_gateways(self, Filter=None, NatGatewayIds=None):
+        return {'NatGateways': [{'NatGatewayId': n, 'State': self._state(n), 'VpcId': self.res[n]['vpc'],
+                                 'SubnetId': self.res[n]['subnet'], 'Tags': self._tags(n),
+                                 'NatGatewayAddresses': [{'AllocationId': self.res[n]['eip']}]}
+                                for n in self._find('natgateway', Filter, NatGatewayIds)]}
+
+    # --- tablas de ruteo ---
+    @api
+    def create_route_table(self, VpcId, TagSpecifications=None):
+        rt = self._new('route-table', 'rtb', TagSpecifications, vpc=VpcId, routes=[], associations={})
+        return {'RouteTable': {'RouteTableId': rt, 'VpcId': VpcId}}
+
+    @api
+    def create_route(self, RouteTableId, DestinationCidrBlock, **target):
+        self.res[RouteTableId]['routes'].append(dict(DestinationCidrBlock=DestinationCidrBlock, State='active', **target))
+
+    @api
+    def replace_route(self, RouteTableId, DestinationCidrBlock, **target):
+        routes = self.res[RouteTableId]['routes']
+        routes[:] = [r for r in routes if r['DestinationCidrBlock'] != DestinationCidrBlock]
+        routes.append(dict(DestinationCidrBlock=DestinationCidrBlock, State='active', **target))
+
+    @api
+    def delete_route(self, RouteTableId, DestinationCidrBlock):
+        routes = self.res[RouteTableId]['routes']
+        routes[:] = [r for r in routes if r['DestinationCidrBlock'] != DestinationCidrBlock]
+
+    @api
+    def replace_route_table_association(self, AssociationId, RouteTableId):
+        self._disassociate(AssociationId)
+        self.res[RouteTableId]['associations'][f"subnet-{AssociationId[9:]}"] = AssociationId
+        return {'NewAssociationId': AssociationId}
+
+    @api
+    def disassociate_route_table(self, AssociationId):
+        self._disassociate(AssociationId)
+
+    def _disassociate(self, AssociationId):
+        with self.lock:
+            for r in self.res.values():
+                if r['type'] == 'route-table':
+                    for subnet, assoc in list(r['associations'].items()):
+                        if assoc == AssociationId:
+                            del r['associations'][subnet]
+
+    @api
+    def associate_route_table(self, SubnetId, RouteTableId):
+        assoc = f"rtbassoc-{SubnetId[7:]}"
+        self.res[RouteTableId]['associations'][SubnetId] = assoc
+        return {'AssociationId': assoc}
+
+    @api
+    def describe_route_tables(self, Filters=None, RouteTableIds=None):
+        return {'RouteTables': [{'RouteTableId': t, 'VpcId': self.res[t]['vpc'], 'Tags': self._tags(t),
+                                 'Routes': list(self.res[t]['routes']),
+                                 'Associations': [{'SubnetId': s, 'RouteTableAssociationId': a,
+                                                   'AssociationState': {'State': 'associated'}}
+                                                  for s, a in self.res[t]['associations'].items()]}
+                                for t in self._find('route-table', Filters, RouteTableIds)]}
+
+    # --- NACLs ---
+    @api
+    def create_network_acl(self, VpcId, TagSpecifications=None):
+        acl = self._new('network-acl', 'acl', TagSpecifications, vpc=VpcId, default=False, associations={},
+                        entries=[])
+        return {'NetworkAcl': {'NetworkAclId': acl, 'VpcId': VpcId}}
+
+    @api
+    def create_network_acl_entry(self, NetworkAclId, **entry):
+        self.res[NetworkAclId]['entries'].append(entry)
+
+    @api
+    def replace_network_acl_entry(self, NetworkAclId, **entry):
+        entries = self.res[NetworkAclId]['entries']
+        entries[:] = [e for e in entries if (e['Egress'], e['RuleNumber']) != (entry['Egress'], entry['RuleNumber'])]
+        entries.append(entry)
+
+    @api
+    def delete_network_acl_entry(self, NetworkAclId, Egress, RuleNumber):
+        entries = self.res[NetworkAclId]['entries']
+        entries[:] = [e for e in entries if (e['Egress'], e['RuleNumber']) != (Egress, RuleNumber)]
+
+    @api
+    def describe_network_acls(self, Filters=None, NetworkAclIds=None):
+        return {'NetworkAcls': [{'NetworkAclId': a, 'VpcId': self.res[a]['vpc'], 'IsDefault': self.res[a]['default'],
+                                 'Tags': self._tags(a), 'Entries': list(self.res[a]['entries']),
+                                 'Associations': [{'SubnetId': s, 'NetworkAclAssociationId': assoc, 'NetworkAclId': a}
+                                                  for s, assoc in self.res[a]['associations'].items()]}
+                                for a in self._find('network-acl', Filters, NetworkAclIds)]}
+
+    @api
+    def replace_network_acl_association(self, AssociationId, NetworkAclId):
+        with self.lock:
+            for r in self.res.values():
+                for subnet, assoc in list(r.get('associations', {}).items()):
+                    if r['type'] == 'network-acl' and assoc == AssociationId:
+                        del r['associations'][subnet]
+                        self.res[NetworkAclId]['associations'][subnet] = AssociationId
+        return {'NewAssociationId': AssociationId}
+
+    # --- Security Groups ---
+    # Las reglas se guardan como {Rule: descripción}: AWS también las compara una a una
+    @api
+    def create_security_group(self, GroupName, Description, VpcId, TagSpecifications=None):
+        return {'GroupId': self._new('security-group', 'sg', TagSpecifications, vpc=VpcId, name=GroupName,
+                                     rules={})}
+
+    @api
+    def authorize_security_group_ingress(self, GroupId, IpPermissions):
+        with self.lock:
+            self.res[GroupId]['rules'].update(sg.rule_set(IpPermissions))
+
+    @api
+    def revoke_security_group_ingress(self, GroupId, IpPermissions):
+        with self.lock:
+            for rule in sg.rule_set(IpPermissions):
+                self.res[GroupId]['rules'].pop(rule, None)
+
+    @api
+    def describe_security_groups(self, Filters=None, GroupIds=None):
+        return {'SecurityGroups': [{'GroupId': g, 'GroupName': self.res[g]['name'], 'VpcId': self.res[g]['vpc'],
+                                    'Tags': self._tags(g), 'IpPermissions': sg.permissions(self.res[g]['rules'])}
+                                   for g in self._find('security-group', Filters, GroupIds)]}
+
+    # --- etiquetas y Transit Gateways ---
+    @api
+    def create_tags(self, Resources, Tags):
+        for rid in Resources:
+            self.res[rid]['tags'].update({t['Key']: t['Value'] for t in Tags})
+
+    @api
+    def create_transit_gateway(self, TagSpecifications=None, **kwargs):
+        return {'TransitGateway': {'TransitGatewayId': self._new('transit-gateway', 'tgw', TagSpecifications)}}
+
+    @api
+    def describe_transit_gateways(self, TransitGatewayIds=None, Filters=None):
+        return {'TransitGateways': [{'TransitGatewayId': t, 'State': self._state(t), 'Tags': self._tags(t)}
+                                    for t in self._find('transit-gateway', Filters, TransitGatewayIds)]}
+
+    @api
+    def create_transit_gateway_vpc_attachment(self, TransitGatewayId, VpcId, SubnetIds, TagSpecifications=None):
+        if self._state(TransitGatewayId) != 'available':
+            raise _error('IncorrectState', f"tgw {TransitGatewayId} is in invalid state")
+        att = self._new('transit-gateway-attachment', 'tgw-attach', TagSpecifications, tgw=TransitGatewayId,
+                        vpc=VpcId)
+        return {'TransitGatewayVpcAttachment': {'TransitGatewayAttachmentId': att, 'State': 'pending'}}
+
+    @api
+    def create_transit_gateway_peering_attachment(self, TransitGatewayId, PeerTransitGatewayId, PeerAccountId,
+                                                  PeerRegion, TagSpecifications=None):
+        # El mismo adjunto (mismo dict) en las dos regiones; el otro lado lo ve pasado un rato
+        att = self._new('transit-gateway-attachment', 'tgw-attach', TagSpecifications, tgw=TransitGatewayId,
+                        peer_tgw=PeerTransitGatewayId, peering={'visible_at': time.time() + PEERING_DELAY[0], 'accepted_at': None})
+        self.regions[PeerRegion].res[att] = self.res[att]
+        return {'TransitGatewayPeeringAttachment': {'TransitGatewayAttachmentId': att,
+                                                    'State': 'initiatingRequest'}}
+
+    def _peering_state(self, att):
+        peering, now = self.res[att]['peering'], time.time()
+        if peering['accepted_at'] is None:
+            return 'pendingAcceptance' if now >= peering['visible_at'] else 'initiatingRequest'
+        return 'available' if now >= peering['accepted_at'] + PEERING_DELAY[1] else 'pending'
+
+    @api
+    def describe_transit_gateway_peering_attachments(self, Filters=None, TransitGatewayAttachmentIds=None):
+        found = []
+        for att in self._find('transit-gateway-attachment', None, TransitGatewayAttachmentIds):
+            r = self.res[att]
+            if 'peering' not in r:
+                continue
+            state = self._peering_state(att)
+            values = {'transit-gateway-attachment-id': [att], 'state': [state],
+                      'transit-gateway-id': [r['tgw'], r['peer_tgw']]}
+            if state == 'initiatingRequest' and r['tgw'] not in self.res:
+                continue    # en la región que acepta aún no aparece
+            if all(set(values.get(f['Name'], [])) & set(f['Values']) for f in Filters or []):
+                found.append({'TransitGatewayAttachmentId': att, 'State': state})
+        return {'TransitGatewayPeeringAttachments': found}
+
+    @api
+    def accept_transit_gateway_peering_attachment(self, TransitGatewayAttachmentId):
+        if self._peering_state(TransitGatewayAttachmentId) != 'pendingAcceptance':
+            raise _error('IncorrectState', f"{TransitGatewayAttachmentId} is not pendingAcceptance")
+        self.res[TransitGatewayAttachmentId]['peering']['accepted_at'] = time.time()
+        return {'TransitGatewayPeeringAttachment': {'TransitGatewayAttachmentId': TransitGatewayAttachmentId,
+                                                    'State': 'pending'}}
+
+    # --- AMIs ---
+    def _images(self):
+        """Catálogo público: varias arquitecturas y variantes por fecha de publicación"""
+        variants = [('x86_64', 'gp2'), ('x86_64', 'ebs'), ('arm64', 'gp2')]
+        return [{'ImageId': f"ami-{i:017x}", 'Name': f"amzn2-ami-hvm-2.0.{20180000 + i // 3}.0-{arch}-{root}",
+                 'Architecture': arch, 'CreationDate': f"20{18 + i // 600}-01-01T00:00:{i % 60:02d}.000Z",
+                 'State': 'available', 'ImageType': 'machine', 'RootDeviceType': 'ebs',
+                 'VirtualizationType': 'hvm'}
+                for i, (arch, root) in ((i, variants[i % 3]) for i in range(IMAGES))]
+
+    @api
+    def describe_images(self, Owners=None, Filters=None, ImageIds=None):
+        fields = {'name': 'Name', 'architecture': 'Architecture', 'state': 'State', 'image-type': 'ImageType',
+                  'root-device-type': 'RootDeviceType', 'virtualization-type': 'VirtualizationType'}
+        images = self._images()
+        for f in Filters or []:
+            images = [image for image in images
+                      if any(fnmatch.fnmatchcase(image[fields[f['Name']]], value) for value in f['Values'])]
+        # El tamaño de la respuesta cuenta: descargar y parsear miles de imágenes
+        time.sleep(len(images) * IMAGE_LATENCY)
+        self.images_sent = getattr(self, 'images_sent', 0) + len(images)
+        return {'Images': images}
+
+    # --- instancias ---
+    @api
+    def run_instances(self, MinCount=1, MaxCount=1, NetworkInterfaces=None, SubnetId=None,
+                      SecurityGroupIds=None, TagSpecifications=None, **kwargs):
+        nic = (NetworkInterfaces or [{}])[0]
+        subnet = nic.get('SubnetId', SubnetId)
+        instances = [self._new('instance', 'i', TagSpecifications, subnet=subnet, vpc=self.res[subnet]['vpc'],
+                               sgs=nic.get('Groups', SecurityGroupIds or []),
+                               public=nic.get('AssociatePublicIpAddress', False))
+                     for _ in range(MaxCount)]
+        return {'Instances': [{'InstanceId': i, 'State': {'Name': 'pending'}} for i in instances]}
+
+    @api
+    def describe_instances(self, Filters=None, InstanceIds=None):
+        instances = []
+        for i in self._find('instance', Filters, InstanceIds):
+            n = int(i[2:], 16)
+            instance = {'InstanceId': i, 'State': {'Name': self._state(i)}, 'VpcId': self.res[i]['vpc'],
+                        'SubnetId': self.res[i]['subnet'], 'Tags': self._tags(i),
+                        'PrivateIpAddress': f"10.10.{n // 256 % 256}.{n % 256}"}
+            if self.res[i]['public']:
+                instance['PublicIpAddress'] = f"203.0.113.{n % 256}"
+            instances.append(instance)
+        return {'Reservations': [{'Instances': instances}] if instances else []}
+
+    @api
+    def describe_instance_status(self, InstanceIds=None, IncludeAllInstances=False):
+        statuses = []
+        for i in self._find('instance', None, InstanceIds):
+            state = self._state(i)
+            if state == 'running' or IncludeAllInstances:
+                # Simplificado: los status checks pasan a 'ok' junto con 'running'
+                checks = 'ok' if state == 'running' else 'initializing'
+                statuses.append({'InstanceId': i, 'InstanceState': {'Name': state},
+                                 'InstanceStatus': {'Status': checks}, 'SystemStatus': {'Status': checks}})
+        return {'InstanceStatuses': statuses}
+
+class FakeRDS(FakeClient):
+    """Backend RDS en memoria: cada instancia pasa por creating -> backing-up ->
+    available según RDS_DELAY (con algo de variación entre instancias)"""
+
+    service = 'rds'
+
+    def __init__(self, region='us-east-1'):
+        super().__init__(region)
+        self.latency = API_LATENCY
+        self.dbs = {}       # id -> (inicio, fin de creating, fin de backing-up)
+
+    def _state(self, db_id):
+        _, created, backed_up = self.dbs[db_id]
+        now = time.time()
+        return 'creating' if now < created else 'backing-up' if now < backed_up else 'available'
+
+    @api
+    def create_db_instance(self, DBInstanceIdentifier, **kwargs):
+        with self.lock:
+            if DBInstanceIdentifier in self.dbs:
+                raise _error('DBInstanceAlreadyExists', f"DB instance {DBInstanceIdentifier} already exists")
+            start = time.time()
+            creating, backing_up = RDS_DELAY
+            created = start + creating * random.uniform(0.8, 1.2)
+            self.dbs[DBInstanceIdentifier] = (start, created, created + backing_up)
+        return {'DBInstance': {'DBInstanceIdentifier': DBInstanceIdentifier, 'DBInstanceStatus': 'creating'}}
+
+    @api
+    def describe_db_instances(self, DBInstanceIdentifier=None, Filters=None):
+        ids = [DBInstanceIdentifier] if DBInstanceIdentifier else list(self.dbs)
+        for f in Filters or []:
+            ids = [i for i in ids if i in f['Values']]
+        instances = []
+        for db_id in ids:
+            db = {'DBInstanceIdentifier': db_id, 'DBInstanceStatus': self._state(db_id)}
+            if db['DBInstanceStatus'] != 'creating':
+                db['Endpoint'] = {'Address': f"{db_id}.abc123.us-east-1.rds.amazonaws.com", 'Port': 3306}
+            instances.append(db)
+        return {'DBInstances': instances}
+
+    def get_waiter(self, name):
+        return FakeWaiter(self, 'DBInstances', 'available')
+
+class FakeSSM(FakeClient):
+    """Parámetros públicos de SSM con la última AMI de cada patrón. denied: la cuenta
+    no tiene permiso (como en algunos laboratorios) y get_parameter falla"""
+
+    service = 'ssm'
+
+    def __init__(self, region='us-east-1', denied=False):
+        super().__init__(region)
+        self.latency = API_LATENCY
+        self.denied = denied
+
+    @api
+    def get_parameter(self, Name):
+        if self.denied:
+            raise _error('AccessDeniedException', f"not authorized to perform: ssm:GetParameter on {Name}")
+        return {'Parameter': {'Name': Name, 'Value': 'ami-0latest00000000'}}
+
+def converge(ec2, topology, max_workers=MAX_WORKERS):
+    """Foto + plan + apply de una topología, como hace el script"""
+    start = time.time()
+    plan = Plan(topology, VpcSnapshot.load(ec2, topology.vpc))
+    run = plan.apply(ec2, max_workers=max_workers)
+    run['elapsed'] = time.time() - start
+    return plan, run
+
+def bench_launch_infra(script):
+    """Mismo plan de launch_infra.py aplicado paso a paso frente al grafo en paralelo"""
+    rows = []
+    for mode, workers in (('secuencial', 1), ('grafo', MAX_WORKERS)):
+        ec2 = FakeProvisionEC2()
+        stats = ApiStats()
+        stats.attach(ec2)
+        _, run = converge(ec2, script.TOPOLOGY, workers)
+        nat_end = next(end for name, (_, end) in run['timings'].items() if name.startswith('natgateway:'))
+        rows.append((mode, run['elapsed'] / SCALE, nat_end / SCALE, stats.total()[0], len(run['failed'])))
+    return rows
+
+def bench_rerun(script):
+    """Sobre lo ya creado: la topología sin cambios y con una regla de SG y otra de
+    NACL nuevas (llamadas y tiempo del plan + apply)"""
+    ec2 = FakeProvisionEC2()
+    converge(ec2, script.TOPOLOGY)
+    changed = copy.deepcopy(script.TOPOLOGY)
+    changed.security_groups[0].ingress.append({'Protocol': 'tcp', 'FromPort': 443, 'ToPort': 443,
+                                               'CidrBlock': '0.0.0.0/0'})
+    changed.network_acls[0].ingress.append({'RuleNumber': 140, 'Protocol': '17', 'RuleAction': 'allow',
+                                            'CidrBlock': '0.0.0.0/0', 'PortRange': {'From': 53, 'To': 53}})
+    rows = []
+    for mode, topology in (('repetición', script.TOPOLOGY), ('1 regla+1', changed)):
+        stats = ApiStats()
+        stats.attach(ec2)
+        plan, run = converge(ec2, topology)
+        rows.append((mode, run['elapsed'] / SCALE, len(plan.actions), stats.total()[0], len(run['failed'])))
+    return rows
+
+NACL_RULES = 40
+
+def bench_nacl(rules=NACL_RULES):
+    """NACL con muchas reglas: entradas de una en una frente a NACL_WORKERS a la vez, y
+    convergencia tras cambiar 3 reglas y quitar 2 (con throttling en los borrados)"""
+    def topology(changed=False):
+        entries = [{'RuleNumber': 100 + i, 'Protocol': '6', 'RuleAction': 'allow', 'CidrBlock': '0.0.0.0/0',
+                    'PortRange': {'From': 1000 + i, 'To': 1000 + i}} for i in range(rules)]
+        if changed:
+            for entry in entries[:3]:
+                entry['RuleAction'] = 'deny'
+            entries = entries[:-2]
+        return Topology('vpc-nacl-mck21', '10.20.0.0/16',
+                        subnets=[Subnet(f'subnet-{i}-mck21', f'10.20.{i}.0/24', 'us-east-1a') for i in range(4)],
+                        network_acls=[NetworkAcl('nacl-mck21', [f'subnet-{i}-mck21' for i in range(4)], entries,
+                                                 [{'RuleNumber': 100, 'Protocol': '-1', 'RuleAction': 'allow',
+                                                   'CidrBlock': '0.0.0.0/0'}])])
+    rows = []
+    workers = common.NACL_WORKERS
+    for mode, limit in (('1 a 1', 1), (f'{workers} a la vez', workers)):
+        common.NACL_WORKERS = limit
+        ec2 = FakeProvisionEC2()
+        stats = ApiStats()
+        stats.attach(ec2)
+        _, run = converge(ec2, topology())
+        rows.append((mode, run['elapsed'] / SCALE, stats.total()[0], stats.calls['ec2:DescribeNetworkAcls'],
+                     len(run['failed'])))
+    common.NACL_WORKERS = workers
+    ec2.throttle = 0.3
+    stats = ApiStats()
+    stats.attach(ec2)
+    _, run = converge(ec2, topology(changed=True))
+    rows.append(('3~ 2- (thr.)', run['elapsed'] / SCALE, stats.total()[0], stats.calls['ec2:DescribeNetworkAcls'],
+                 len(run['failed'])))
+    return rows
+
+SG_RULES = 300
+
+def bench_sg(rules=SG_RULES, changed=10):
+    """Grupo con muchas reglas (puertos sueltos desde varios CIDR): creación y
+    cambio de 'changed' reglas, una llamada por regla frente a sg.reconcile"""
+    def permissions(shift=0):
+        return [{'IpProtocol': 'tcp', 'FromPort': port, 'ToPort': port,
+                 'IpRanges': [{'CidrIp': f'10.{port % 8}.0.0/16', 'Description': f'regla {port}'}]}
+                for port in range(1000 + shift, 1000 + shift + rules)]
+
+    def one_by_one(ec2, group_id, desired):
+        missing, extra = sg.diff(ec2.describe_security_groups(GroupIds=[group_id])['SecurityGroups'][0]
+                                 ['IpPermissions'], desired)
+        for rule, desc in missing.items():
+            ec2.authorize_security_group_ingress(GroupId=group_id, IpPermissions=sg.permissions({rule: desc}))
+        for rule, desc in extra.items():
+            ec2.revoke_security_group_ingress(GroupId=group_id, IpPermissions=sg.permissions({rule: desc}))
+
+    rows = []
+    for mode, apply in (('regla a regla', one_by_one), ('diferencia', sg.reconcile)):
+        ec2 = FakeProvisionEC2()
+        group_id = ec2.create_security_group(GroupName='gs-bench-mck21', Description='bench', VpcId='vpc-bench')['GroupId']
+        for step, desired in (('crear', permissions()), (f'{changed}~', permissions(changed))):
+            stats = ApiStats()
+            stats.attach(ec2)
+            start = time.time()
+            apply(ec2, group_id, desired)
+            elapsed, calls = time.time() - start, stats.total()[0]
+            ok = sg.rule_set(ec2.describe_security_groups(GroupIds=[group_id])['SecurityGroups'][0]
+                             ['IpPermissions']) == sg.rule_set(desired)
+            rows.append((f'{mode} {step}', elapsed / SCALE, calls, ok))
+    return rows
+
+def bench_ami():
+    """AMI de Amazon Linux 2: describe_images con solo el nombre y ordenando todo en
+    Python (como hacía infra_3layer_rds.py) frente a resolve_ami en frío (SSM), con
+    la caché ya escrita y sin permiso de SSM (describe acotado)"""
+    rows = []
+    ec2 = FakeProvisionEC2()
+    stats = ApiStats()
+    stats.attach(ec2)
+    start = time.time()
+    images = ec2.describe_images(Owners=['amazon'], Filters=[
+        {'Name': 'name', 'Values': ['amzn2-ami-hvm-*-x86_64-gp2']},
+        {'Name': 'state', 'Values': ['available']}])['Images']
+    sorted(images, key=lambda x: x['CreationDate'], reverse=True)[0]['ImageId']
+    rows.append(('describe+sort', (time.time() - start) / SCALE, stats.total()[0], len(images)))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = os.path.join(tmp, 'amis.json')
+        for mode, ssm in (('SSM (frío)', FakeSSM()), ('caché', FakeSSM()),
+                          ('describe acotado', FakeSSM(denied=True))):
+            ec2 = FakeProvisionEC2()
+            stats = ApiStats()
+            stats.attach(ec2)
+            stats.attach(ssm)
+            start = time.time()
+            ami.resolve_ami(ec2, ssm=ssm, cache_path=cache, ttl=0 if mode == 'describe acotado' else None)
+            rows.append((mode, (time.time() - start) / SCALE, stats.total()[0], getattr(ec2, 'images_sent', 0)))
+    return rows
+
+def linked_regions(*regions):
+    """Un FakeProvisionEC2 por región que se ven entre sí (peering) y no repiten IDs"""
+    fakes = {region: FakeProvisionEC2(region) for region in regions}
+    ids = itertools.count(1)
+    for fake in fakes.values():
+        fake.regions, fake.ids = fakes, ids
+    return fakes
+
+def bench_ej3(script):
+    """ej3.py: la versión original (todo en orden, esperas de TGW una tras otra y
+    bucles de 10s hasta pendingAcceptance) frente al grafo con las dos regiones a
+    la vez y el peering como máquina de estados"""
+    east_region, west_region = script.REGION_EAST, script.REGION_WEST
+
+    def sequential(east, west):
+        def wait_tgw(client, tgw_id):
+            while client.describe_transit_gateways(TransitGatewayIds=[tgw_id])['TransitGateways'][0]['State'] != 'available':
+                time.sleep(OLD_SLEEP)
+        clients = {east_region: east, west_region: west}
+        vpcs, subnets, sgs = {}, {}, {}
+        for region, (key_name, stack) in script.STACKS.items():
+            for name, vpc_cidr, _, _, _ in stack:
+                vpcs[name] = script.create_vpc(clients[region], vpc_cidr)
+        for region, (key_name, stack) in script.STACKS.items():
+            for name, _, subnet_cidr, az, _ in stack:
+                subnets[name] = script.create_subnet(clients[region], vpcs[name], subnet_cidr, az)
+        for region, (key_name, stack) in script.STACKS.items():
+            for name, _, _, _, sg_name in stack:
+                sgs[name] = script.create_security_group(clients[region], vpcs[name], sg_name, 'ICMP')
+        # Como el original: las instancias de las dos regiones a la vez, y los TGW después
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            list(pool.map(lambda region: script.create_ec2(clients[region], [
+                script.ec2_spec(subnets[name], sgs[name], 'ami-0bench', script.STACKS[region][0])
+                for name, *_ in script.STACKS[region][1]]), clients))
+        tgws = {region: script.create_tgw(client) for region, client in clients.items()}
+        for region, client in clients.items():
+            wait_tgw(client, tgws[region])
+        for region, (key_name, stack) in script.STACKS.items():
+            for name, *_ in stack:
+                clients[region].create_transit_gateway_vpc_attachment(
+                    TransitGatewayId=tgws[region], VpcId=vpcs[name], SubnetIds=[subnets[name]])
+        east.create_transit_gateway_peering_attachment(
+            TransitGatewayId=tgws[east_region], PeerTransitGatewayId=tgws[west_region], PeerAccountId='0',
+            PeerRegion=west_region)
+        while True:
+            found = west.describe_transit_gateway_peering_attachments(Filters=[
+                {'Name': 'transit-gateway-id', 'Values': [tgws[west_region]]},
+                {'Name': 'state', 'Values': ['pendingAcceptance']}])['TransitGatewayPeeringAttachments']
+            if found:
+                break
+            time.sleep(OLD_SLEEP)
+        west.accept_transit_gateway_peering_attachment(TransitGatewayAttachmentId=found[0]['TransitGatewayAttachmentId'])
+        return time.time()
+
+    def graph(east, west):
+        script.ec2_east, script.ec2_west = east, west
+        script.CLIENTS.update({east_region: east, west_region: west})
+        script.SSM_CLIENTS.update({region: FakeSSM(region) for region in (east_region, west_region)})
+        accepted = []
+        original = script.TgwPeering._transition
+
+        def transition(peering, state):
+            if state == 'accepted':
+                accepted.append(time.time())
+            original(peering, state)
+        script.TgwPeering._transition = transition
+        try:
+            run = run_steps(script.build_steps(), None)
+        finally:
+            script.TgwPeering._transition = original
+        if run['failed']:
+            raise RuntimeError(run['failed'])
+        return accepted[0]
+
+    rows = []
+    for mode, flow in (('secuencial', sequential), ('regiones a la vez', graph)):
+        fakes = linked_regions(east_region, west_region)
+        stats = ApiStats()
+        for fake in fakes.values():
+            stats.attach(fake)
+        start = time.time()
+        accepted = flow(fakes[east_region], fakes[west_region])
+        rows.append((mode, (time.time() - start) / SCALE, (accepted - start) / SCALE, stats.total()[0]))
+    return rows
+
+TIER = 20
+
+def bench_fleet(count=TIER):
+    """Capa de 'count' instancias iguales: run_instances + waiter de boto3 una a una
+    (como launch_instance/create_ec2) frente a un run_instances con MaxCount y una
+    única espera por lotes; y la misma capa como Instance(count=...) de una topología"""
+    def one_by_one(ec2, spec):
+        ids = []
+        for _ in range(count):
+            ids.append(ec2.run_instances(MinCount=1, MaxCount=1, **spec)['Instances'][0]['InstanceId'])
+            ec2.get_waiter('instance_running').wait(InstanceIds=ids[-1:])
+        return ids
+
+    def batched(ec2, spec):
+        [ids] = fleet.launch(ec2, [(spec, count)])
+        fleet.RunningWaiter(ec2).wait_running(ids)
+        return ids
+
+    rows = []
+    for mode, run in (('1 a 1 + waiter', one_by_one), ('flota', batched)):
+        ec2 = FakeProvisionEC2()
+        vpc_id = ec2.create_vpc(CidrBlock='10.30.0.0/16')['Vpc']['VpcId']
+        subnet_id = ec2.create_subnet(VpcId=vpc_id, CidrBlock='10.30.0.0/24')['Subnet']['SubnetId']
+        stats = ApiStats()
+        stats.attach(ec2)
+        start = time.time()
+        ids = run(ec2, dict(ImageId='ami-0bench', InstanceType='t3.micro', SubnetId=subnet_id))
+        rows.append((mode, (time.time() - start) / SCALE, stats.calls['ec2:RunInstances'], stats.total()[0],
+                     sum(ec2._state(i) == 'running' for i in ids)))
+
+    topology = Topology('vpc-tier-mck21', '10.30.0.0/16',
+                        subnets=[Subnet('subnet-tier-mck21', '10.30.0.0/24', 'us-east-1a')],
+                        security_groups=[SecurityGroup('gs-tier-mck21', 'tier', [])],
+                        instances=[Instance('web-mck21', 'subnet-tier-mck21', ['gs-tier-mck21'], 'ami-0bench',
+                                            count=count)])
+    ec2 = FakeProvisionEC2()
+    stats = ApiStats()
+    stats.attach(ec2)
+    _, run = converge(ec2, topology)
+    rows.append(('topología', run['elapsed'] / SCALE, stats.calls['ec2:RunInstances'], stats.total()[0],
+                 len(run['results'].get('instance:web-mck21', []))))
+    return rows
+
+RDS_FLEET = 30
+
+def bench_rds(count=RDS_FLEET):
+    """Flota RDS: un waiter db_instance_available por instancia (en hilos, para
+    tener cada endpoint en cuanto está) frente a RdsFleet (un describe filtrado
+    por consulta para todas). Retraso: desde que la instancia está disponible
+    hasta que el script se entera"""
+    specs = [dict(DBInstanceIdentifier=f'mck21-rds-{i + 1}', DBInstanceClass='db.t3.micro', Engine='mysql')
+             for i in range(count)]
+
+    def waiters(rds):
+        def wait(spec):
+            rds.get_waiter('db_instance_available').wait(DBInstanceIdentifier=spec['DBInstanceIdentifier'],
+                                                         WaiterConfig={'Delay': RDS_WAITER_DELAY})
+            return spec['DBInstanceIdentifier'], time.time()
+        with ThreadPoolExecutor(max_workers=len(specs)) as pool:
+            for spec in specs:
+                rds.create_db_instance(**spec)
+            return dict(pool.map(wait, specs))
+
+    def fleet(rds):
+        fleet = RdsFleet(rds, specs)
+        fleet.create()
+        return {event.instance: event.time for event in fleet.track() if event.endpoint}
+
+    rows = []
+    for mode, run in (('waiter x inst.', waiters), ('flota', fleet)):
+        rds = FakeRDS()
+        stats = ApiStats()
+        stats.attach(rds)
+        start = time.time()
+        detected = run(rds)
+        elapsed = time.time() - start
+        lag = statistics.mean(detected[db_id] - rds.dbs[db_id][2] for db_id in detected)
+        rows.append((mode, elapsed / SCALE, lag / SCALE, stats.total()[0] - count, len(detected)))
+    return rows
+
+def quiet(bench, *args):
+    """Ejecuta un escenario sin los mensajes del script"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        return bench(*args)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark del aprovisionamiento con EC2 simulado')
+    parser.add_argument('--runs', type=int, default=3, help='Repeticiones (se muestra la mediana)')
+    args = parser.parse_args()
+
+    # Consultas de disponibilidad (readiness) a la misma escala que las latencias
+    common.READY_POLL_INTERVAL = common.READY_POLL_INTERVAL * SCALE
+    common.READY_MAX_POLL_INTERVAL = common.READY_MAX_POLL_INTERVAL * SCALE
+    common.READY_TIMEOUT = common.READY_TIMEOUT * SCALE
+    common.POLL_INTERVAL = common.POLL_INTERVAL * SCALE         # backoff de los reintentos por throttling
+    common.MAX_POLL_INTERVAL = common.MAX_POLL_INTERVAL * SCALE
+    # AMIs de la topología: SSM simulado y caché temporal (no la del usuario)
+    ami.ssm_client = FakeSSM
+    ami.AMI_CACHE_PATH = os.path.join(tempfile.mkdtemp(prefix='mck21-bench-'), 'amis.json')
+    script = load_script(LAUNCH_INFRA)
+    runs = [quiet(bench_launch_infra, script) for _ in range(args.runs)]
+
+    print(f"LAUNCH_INFRA (tiempos equivalentes en AWS, mediana de {args.runs})")
+    print(f"{'modo':<12}{'total(s)':>10}{'NAT listo(s)':>14}{'llamadas':>10}{'errores':>9}")
+    for i, (mode, *_) in enumerate(runs[0]):
+        elapsed = statistics.median(run[i][1] for run in runs)
+        nat = statistics.median(run[i][2] for run in runs)
+        _, _, _, calls, failed = runs[0][i]
+        print(f"{mode:<12}{elapsed:>10.1f}{nat:>14.1f}{calls:>10}{failed:>9}")
+
+    nacls = [quiet(bench_nacl) for _ in range(args.runs)]
+    print(f"\nNACL con {NACL_RULES} reglas y 4 subredes (mediana de {args.runs})")
+    print(f"{'modo':<14}{'total(s)':>10}{'llamadas':>10}{'describes':>11}{'errores':>9}")
+    for i, (mode, _, calls, describes, failed) in enumerate(nacls[0]):
+        elapsed = statistics.median(run[i][1] for run in nacls)
+        print(f"{mode:<14}{elapsed:>10.1f}{calls:>10}{describes:>11}{failed:>9}")
+
+    reruns = [quiet(bench_rerun, script) for _ in range(args.runs)]
+    print(f"\nCONVERGENCIA sobre lo ya creado (mediana de {args.runs})")
+    print(f"{'cambio':<12}{'total(s)':>10}{'acciones':>10}{'llamadas':>10}{'errores':>9}")
+    for i, (mode, _, actions, calls, failed) in enumerate(reruns[0]):
+        elapsed = statistics.median(run[i][1] for run in reruns)
+        print(f"{mode:<12}{elapsed:>10.1f}{actions:>10}{calls:>10}{failed:>9}")
+
+    groups = [quiet(bench_sg) for _ in range(args.runs)]
+    print(f"\nSG con {SG_RULES} reglas (mediana de {args.runs})")
+    print(f"{'modo':<22}{'total(s)':>10}{'llamadas':>10}{'correcto':>10}")
+    for i, (mode, _, calls, ok) in enumerate(groups[0]):
+        elapsed = statistics.median(run[i][1] for run in groups)
+        print(f"{mode:<22}{elapsed:>10.1f}{calls:>10}{'sí' if ok else 'no':>10}")
+
+    fleets = [quiet(bench_rds) for _ in range(args.runs)]
+    print(f"\nRDS: flota de {RDS_FLEET} instancias (mediana de {args.runs})")
+    print(f"{'modo':<16}{'total(s)':>10}{'retraso(s)':>12}{'describes':>11}{'listas':>8}")
+    for i, (mode, *_) in enumerate(fleets[0]):
+        elapsed = statistics.median(run[i][1] for run in fleets)
+        lag = statistics.median(run[i][2] for run in fleets)
+        _, _, _, describes, ready = fleets[0][i]
+        print(f"{mode:<16}{elapsed:>10.1f}{lag:>12.1f}{describes:>11}{ready:>8}")
+
+    tiers = [quiet(bench_fleet) for _ in range(args.runs)]
+    print(f"\nCAPA de {TIER} instancias iguales (mediana de {args.runs})")
+    print(f"{'modo':<16}{'total(s)':>10}{'run_instances':>15}{'llamadas':>10}{'running':>9}")
+    for i, (mode, *_) in enumerate(tiers[0]):
+        elapsed = statistics.median(run[i][1] for run in tiers)
+        _, _, launches, calls, ready = tiers[0][i]
+        print(f"{mode:<16}{elapsed:>10.1f}{launches:>15}{calls:>10}{ready:>9}")
+
+    amis = [quiet(bench_ami) for _ in range(args.runs)]
+    print(f"\nAMI de Amazon Linux 2 con {IMAGES} imágenes publicadas (mediana de {args.runs})")
+    print(f"{'modo':<18}{'total(s)':>10}{'llamadas':>10}{'imágenes':>10}")
+    for i, (mode, _, calls, images) in enumerate(amis[0]):
+        elapsed = statistics.median(run[i][1] for run in amis)
+        print(f"{mode:<18}{elapsed:>10.2f}{calls:>10}{images:>10}")
+
+    script_ej3 = load_script(EJ3)
+    peerings = [quiet(bench_ej3, script_ej3) for _ in range(args.runs)]
+    print(f"\nEJ3: TGW en dos regiones y peering (mediana de {args.runs}; el secuencial acaba al aceptar)")
+    print(f"{'modo':<20}{'total(s)':>10}{'aceptado(s)':>13}{'llamadas':>10}")
+    for i, (mode, *_) in enumerate(peerings[0]):
+        elapsed = statistics.median(run[i][1] for run in peerings)
+        accepted = statistics.median(run[i][2] for run in peerings)
+        print(f"{mode:<20}{elapsed:>10.1f}{accepted:>13.1f}{peerings[0][i][3]:>10}")
+
+if __name__ == '__main__':
+    main()
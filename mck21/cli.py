@@ -0,0 +1,87 @@
+"""
+Script: Borrar todos los recursos con tag mck21
+    python -m mck21 [--regions us-east-1,us-west-2 | all-enabled] [--inventory tagging|describe]
+    python -m mck21 --plan [--plan-output plan.json]
+Inventario por Tagging API, borrado en paralelo siguiendo el grafo de
+dependencias y diario para reanudar si se interrumpe. Con --plan no se borra
+nada: se emite en JSON el DAG, el camino crítico, la duración estimada y las
+llamadas API previstas.
+"""
+
+import argparse
+import time
+
+from . import common
+from .common import Colors, MAX_WORKERS, print_color
+from .journal import JOURNAL_PATH, Journal
+from .plan import HISTORY_PATH, History, build_plan, dump
+from .regions import clean_regions, make_clients, plan_regions, resolve_regions
+
+def print_summary(rows, elapsed):
+    """Tabla final con los tiempos de cada región"""
+    print_color(Colors.GREEN, "\n=== Resumen por región ===")
+    header = (f"{'Región':<16}{'Recursos':>10}{'Borrados':>10}{'Omitidos':>10}{'Errores':>9}"
+              f"{'Reintentos':>12}{'Inventario':>12}{'Borrado':>10}{'Llamadas':>10}")
+    print(header)
+    print('-' * len(header))
+    for row in rows:
+        color = Colors.RED if row['failed'] else Colors.GREEN
+        print_color(color, f"{row['region']:<16}{row['resources']:>10}{row['deleted']:>10}{row['skipped']:>10}"
+                           f"{row['failed']:>9}{row['retries']:>12}{row['inventory']:>11.1f}s"
+                           f"{row['elapsed']:>9.1f}s{row['calls']:>10}")
+    print('-' * len(header))
+    total = lambda key: sum(r[key] for r in rows)
+    print(f"{'TOTAL':<16}{total('resources'):>10}{total('deleted'):>10}{total('skipped'):>10}"
+          f"{total('failed'):>9}{total('retries'):>12}{'':>12}{elapsed:>9.1f}s{total('calls'):>10}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='mck21', description='Borra todos los recursos con tag mck21')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS,
+                        help=f'Borrados simultáneos por región (default: {MAX_WORKERS})')
+    parser.add_argument('--inventory', choices=['tagging', 'describe'], default='tagging',
+                        help='Inventario vía Tagging API o un describe por tipo (default: tagging)')
+    parser.add_argument('--regions', nargs='+',
+                        help="Regiones a limpiar (us-east-1,us-west-2 ...); 'all-enabled' añade las "
+                             "habilitadas en la cuenta (default: la región configurada)")
+    parser.add_argument('--journal', default=JOURNAL_PATH,
+                        help=f'Diario para reanudar una limpieza interrumpida (default: {JOURNAL_PATH})')
+    parser.add_argument('--no-journal', action='store_true', help='No usar diario')
+    parser.add_argument('--fresh', action='store_true',
+                        help='Ignorar lo pendiente en el diario y empezar con un inventario nuevo')
+    parser.add_argument('--poll-interval', type=float, default=common.POLL_INTERVAL,
+                        help=f'Segundos mínimos entre consultas de estado de instancias, NAT... '
+                             f'(default: {common.POLL_INTERVAL}; el backoff llega hasta {common.MAX_POLL_INTERVAL})')
+    parser.add_argument('--plan', action='store_true',
+                        help='No borrar: emitir el plan (DAG, camino crítico, duración y llamadas) en JSON')
+    parser.add_argument('--plan-output', help='Fichero para el plan (default: salida estándar)')
+    parser.add_argument('--history', default=HISTORY_PATH,
+                        help=f'Duraciones medias por tipo para estimar el plan (default: {HISTORY_PATH})')
+    args = parser.parse_args(argv)
+    common.POLL_INTERVAL = args.poll_interval
+    common.MAX_POLL_INTERVAL = max(common.MAX_POLL_INTERVAL, args.poll_interval)
+
+    regions = resolve_regions(args.regions)
+    clients = make_clients(regions)
+    history = History(args.history)
+
+    if args.plan:
+        plan = build_plan(plan_regions(clients, args.inventory, history))
+        dump(plan, args.plan_output)
+        if args.plan_output:
+            print_color(Colors.GREEN, f"Plan: {plan['resources']} recursos, ~{plan['estimated_seconds']:.0f}s "
+                                      f"-> {args.plan_output}")
+        return
+
+    print_color(Colors.GREEN, f"=== Iniciando limpieza de recursos mck21 en {', '.join(regions)} ===")
+
+    journal = None
+    if not args.no_journal:
+        journal = Journal(args.journal)
+        journal.begin(regions, fresh=args.fresh)
+
+    start = time.time()
+    rows = clean_regions(clients, args.inventory, args.workers, journal, history)
+    if journal:
+        journal.close()
+    history.save()
+    print_summary(rows, time.time() - start)
@@ -0,0 +1,91 @@
+"""
+Utilidades compartidas: colores de terminal, tag de los recursos, parámetros de
+espera/reintento y contador de llamadas API.
+Los parámetros se leen en tiempo de ejecución (common.POLL_INTERVAL...), así que
+un script o el benchmark pueden ajustarlos antes de lanzar la limpieza.
+"""
+
+import random
+import threading
+import time
+from collections import defaultdict
+from botocore.exceptions import ClientError
+
+# Colores terminal
+class Colors:
+    GREEN = '\033[0;32m'
+    YELLOW = '\033[1;33m'
+    RED = '\033[0;31m'
+    NC = '\033[0m'
+
+TAG_KEY = "tag"
+TAG_VALUE = "mck21"
+POLL_INTERVAL = 5        # segundos mínimos entre consultas de estado (instancias, NAT, TGW attachments, peering)
+MAX_POLL_INTERVAL = 30   # tope del backoff cuando nada cambia
+WAIT_TIMEOUT = 1800      # plazo máximo de espera por recurso
+MAX_WORKERS = 32         # borrados simultáneos
+RETRY_TIMEOUT = 900      # plazo para reintentar un borrado bloqueado (ENI que se desasocia, throttling)
+ENI_DRAIN_TIMEOUT = 600  # espera máxima a que una subnet/SG se quede sin ENIs (0 = no esperar)
+ID_CHUNK = 200           # máximo de valores por filtro en un describe
+BATCH_CHUNK = 100        # IDs por llamada en los borrados por lotes (terminate_instances)
+READY_POLL_INTERVAL = 2  # primera consulta de disponibilidad en los scripts de creación (readiness)
+READY_MAX_POLL_INTERVAL = 10  # tope del backoff de esas consultas
+READY_TIMEOUT = 600      # plazo máximo hasta que una condición de disponibilidad se cumple
+NACL_WORKERS = 8         # entradas de NACL aplicadas a la vez (límite de llamadas de escritura de EC2)
+AMI_CACHE_TTL = 86400    # validez (s) de una AMI resuelta en la caché en disco (ami.py)
+
+THROTTLING_ERRORS = {'RequestLimitExceeded', 'Throttling', 'ThrottlingException',
+                     'TooManyRequestsException', 'RequestThrottled'}
+
+def print_color(color, msg):
+    print(f"{color}{msg}{Colors.NC}")
+
+def retry_delay(attempt):
+    """Backoff exponencial con jitter entre reintentos de un mismo recurso"""
+    delay = min(POLL_INTERVAL * 2 ** (attempt - 1), MAX_POLL_INTERVAL)
+    return delay / 2 + random.uniform(0, delay / 2)
+
+def call_with_retry(call, **kwargs):
+    """Una llamada suelta; ante throttling se reintenta con backoff hasta RETRY_TIMEOUT"""
+    deadline = time.time() + RETRY_TIMEOUT
+    attempt = 0
+    while True:
+        try:
+            return call(**kwargs)
+        except ClientError as e:
+            attempt += 1
+            if e.response.get('Error', {}).get('Code') not in THROTTLING_ERRORS or time.time() >= deadline:
+                raise
+            time.sleep(retry_delay(attempt))
+
+class ApiStats:
+    """Cuenta llamadas API y su latencia acumulada (incluye páginas y consultas de espera)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = defaultdict(int)
+        self.latency = defaultdict(float)
+
+    def attach(self, client):
+        client.meta.events.register('before-call', self._before)
+        client.meta.events.register('after-call', self._after)
+        return client
+
+    def _before(self, model, context, **kwargs):
+        context['mck21_start'] = time.perf_counter()
+
+    def _after(self, model, context, **kwargs):
+        key = f"{model.service_model.service_name}:{model.name}"
+        elapsed = time.perf_counter() - context.get('mck21_start', time.perf_counter())
+        with self.lock:
+            self.calls[key] += 1
+            self.latency[key] += elapsed
+
+    def total(self):
+        with self.lock:
+            return sum(self.calls.values()), sum(self.latency.values())
+
+    def reset(self):
+        with self.lock:
+            self.calls.clear()
+            self.latency.clear()
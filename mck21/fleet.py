@@ -0,0 +1,81 @@
+"""
+Lanzamiento de instancias en bloque para los scripts de creación: las
+especificaciones iguales van en un solo run_instances (MaxCount=N), las
+distintas se lanzan a la vez y todos los IDs se esperan con un único
+BatchWaiter (un describe_instances por consulta para todos los pendientes).
+
+    ids = launch(ec2, [(spec_web, 20), (spec_db, 2)])   # [[20 IDs], [2 IDs]]
+    RunningWaiter(ec2).wait_running([i for group in ids for i in group])
+"""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from . import common
+from .common import MAX_WORKERS
+from .readiness import ProbeFailed
+from .waiters import BatchWaiter
+
+def spec_key(spec):
+    """Clave de una especificación de run_instances (sin MinCount/MaxCount)"""
+    return json.dumps(spec, sort_keys=True, default=str)
+
+def launch(ec2, requests, max_workers=MAX_WORKERS):
+    """requests: [(argumentos de run_instances sin MinCount/MaxCount, número)].
+    Las peticiones con la misma especificación se suman en un solo run_instances
+    (todo o nada: MinCount=MaxCount) y las distintas van a la vez.
+    Devuelve los IDs de cada petición, en el mismo orden"""
+    groups = {}
+    for index, (spec, count) in enumerate(requests):
+        group = groups.setdefault(spec_key(spec), {'spec': spec, 'parts': []})
+        group['parts'].append((index, count))
+
+    def run(group):
+        total = sum(count for _, count in group['parts'])
+        response = ec2.run_instances(MinCount=total, MaxCount=total, **group['spec'])
+        return [i['InstanceId'] for i in response['Instances']]
+
+    results = [None] * len(requests)
+    if not groups:
+        return results
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as pool:
+        for group, ids in zip(groups.values(), pool.map(run, groups.values())):
+            # Se reparten los IDs del lote entre las peticiones que lo formaron
+            for index, count in group['parts']:
+                results[index], ids = ids[:count], ids[count:]
+    return results
+
+class RunningWaiter(BatchWaiter):
+    """Espera compartida a 'running' de todas las instancias que se lanzan: un hilo
+    consulta todos los IDs pendientes con un describe_instances por consulta,
+    con las pausas de readiness (READY_POLL_INTERVAL a READY_MAX_POLL_INTERVAL)"""
+
+    FAILED = {'shutting-down', 'terminated', 'stopping', 'stopped'}
+
+    def __init__(self, ec2, timeout=None):
+        self.ec2 = ec2
+        self.states = {}
+        super().__init__('instance-running', self._describe, {'running'} | self.FAILED,
+                         min_delay=common.READY_POLL_INTERVAL, max_delay=common.READY_MAX_POLL_INTERVAL,
+                         timeout=common.READY_TIMEOUT if timeout is None else timeout)
+
+    def _describe(self, ids):
+        # Filtro por ID en vez de InstanceIds: un ID aún no visible no hace fallar el lote
+        pages = self.ec2.get_paginator('describe_instances').paginate(
+            Filters=[{'Name': 'instance-id', 'Values': ids}])
+        found = {i['InstanceId']: i['State']['Name'] for page in pages
+                 for res in page['Reservations'] for i in res['Instances']}
+        # Una instancia recién lanzada puede no aparecer aún: sigue pendiente
+        states = {rid: found.get(rid, 'pending') for rid in ids}
+        self.states.update(states)
+        return states
+
+    def wait_running(self, ids, timeout=None):
+        """Bloquea hasta que todas están en 'running'. ProbeFailed si alguna se para o
+        termina; TimeoutError si no llega a tiempo"""
+        late = self.wait(ids, timeout)
+        failed = [f"{rid} ({self.states[rid]})" for rid in ids if self.states.get(rid) in self.FAILED]
+        if failed:
+            raise ProbeFailed(f"instancias que no arrancan: {', '.join(failed)}")
+        if late:
+            raise TimeoutError(f"Sin disponibilidad a tiempo: instancias {', '.join(late)}")
@@ -0,0 +1,106 @@
+"""
+Inventario de recursos con tag mck21: Tagging API + describe por lotes de IDs,
+o un describe paginado por tipo como alternativa.
+"""
+
+import boto3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+
+from . import common, registry
+from .common import Colors, TAG_KEY, TAG_VALUE, print_color
+
+def describe_all(ec2, rtype, filters):
+    """Describe paginado de un tipo, devuelve registros del inventario"""
+    rt = registry.get(rtype)
+    kwargs = {rt.filter_param: filters + rt.live_filter}
+    if ec2.can_paginate(rt.describe):
+        pages = ec2.get_paginator(rt.describe).paginate(**kwargs)
+    else:
+        pages = [getattr(ec2, rt.describe)(**kwargs)]
+    return [r for page in pages for r in rt.records(page)]
+
+def describe_by_ids(ec2, rtype, ids):
+    """Describe por lotes de IDs (filtro, no IdList: un ID ya borrado no invalida el lote)"""
+    id_filter = registry.get(rtype).id_filter
+    resources = []
+    for i in range(0, len(ids), common.ID_CHUNK):
+        resources.extend(describe_all(ec2, rtype, [{'Name': id_filter, 'Values': ids[i:i + common.ID_CHUNK]}]))
+    return resources
+
+def get_tgw_attachments(ec2, tgw_ids):
+    """Los attachments se buscan por TGW (no por tag): el lado aceptador de un peering no lleva tag"""
+    if not tgw_ids:
+        return []
+    resources = []
+    for i in range(0, len(tgw_ids), common.ID_CHUNK):
+        resources.extend(describe_all(ec2, 'transit-gateway-attachment',
+                                      [{'Name': 'transit-gateway-id', 'Values': tgw_ids[i:i + common.ID_CHUNK]}]))
+    return resources
+
+def _collect(jobs):
+    """Ejecuta [(rtype, fn)] en paralelo; un error en un tipo no detiene el resto"""
+    def run(job):
+        rtype, fn = job
+        try:
+            return fn()
+        except ClientError as e:
+            print_color(Colors.RED, f"Error obteniendo {rtype}: {e}")
+            return []
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=len(jobs)) as pool:
+        return [r for records in pool.map(run, jobs) for r in records]
+
+def _with_attachments(ec2, resources):
+    tgw_ids = [r['ResourceId'] for r in resources if r['ResourceType'] == 'transit-gateway']
+    return resources + _collect([('transit-gateway-attachment', lambda: get_tgw_attachments(ec2, tgw_ids))])
+
+def get_resources_describe(ec2):
+    """Inventario clásico: un describe paginado por tipo filtrando por tag"""
+    tags_filter = [{'Name': f'tag:{TAG_KEY}', 'Values': [TAG_VALUE]}]
+    resources = _collect([(rt.name, lambda rtype=rt.name: describe_all(ec2, rtype, tags_filter))
+                          for rt in registry.REGISTRY.values() if rt.arn_type])
+    return _with_attachments(ec2, resources)
+
+def get_resources_tagging(ec2, tagging):
+    """Inventario con la Resource Groups Tagging API: todos los ARN con tag mck21 en
+    llamadas paginadas y después un describe por lotes de IDs solo para los tipos
+    que necesitan más detalle (VPC, subnet, asociaciones, estado...)"""
+    arn_types = registry.arn_types()
+    ids = defaultdict(list)
+    pages = tagging.get_paginator('get_resources').paginate(
+        TagFilters=[{'Key': TAG_KEY, 'Values': [TAG_VALUE]}],
+        ResourceTypeFilters=[f'ec2:{arn_type}' for arn_type in arn_types],
+        PaginationConfig={'PageSize': 100},     # máximo de la API
+    )
+    for page in pages:
+        for item in page['ResourceTagMappingList']:
+            arn_type, _, rid = item['ResourceARN'].split(':', 5)[5].partition('/')
+            if arn_type in arn_types:
+                ids[arn_types[arn_type]].append(rid)
+
+    resources = []
+    jobs = []
+    for rtype, rids in ids.items():
+        if not registry.get(rtype).hydrate:
+            resources.extend({'ResourceId': rid, 'ResourceType': rtype} for rid in rids)
+        else:
+            jobs.append((rtype, lambda rtype=rtype, rids=rids: describe_by_ids(ec2, rtype, rids)))
+    resources.extend(_collect(jobs))
+    return _with_attachments(ec2, resources)
+
+def get_resources(ec2, mode='tagging', tagging=None):
+    """Recopila todos los tipos registrados con tag mck21 (EC2, subnets, NATs, EIPs, SG,
+    RTB, IGW, VPC, TGW, peering) y los TGW attachments de esos TGW.
+    mode='tagging' usa la Tagging API y recurre al describe por tipo si no está disponible"""
+    if mode == 'tagging':
+        try:
+            if tagging is None:
+                tagging = boto3.client('resourcegroupstaggingapi', region_name=ec2.meta.region_name)
+            return get_resources_tagging(ec2, tagging)
+        except ClientError as e:
+            print_color(Colors.YELLOW, f"Tagging API no disponible ({e.response['Error']['Code']}), "
+                                       f"usando describe por tipo")
+    return get_resources_describe(ec2)
@@ -0,0 +1,87 @@
+"""
+Diario append-only (JSONL) de la limpieza para reanudarla si se interrumpe.
+"""
+
+import json
+import os
+import threading
+import time
+
+JOURNAL_PATH = '.clean_mck21.jsonl'   # diario para reanudar una limpieza interrumpida
+
+class Journal:
+    """Diario append-only (JSONL) de la limpieza: planned -> issued -> confirmed por recurso.
+    Solo cuenta lo escrito desde el último evento 'run'. Una región sin 'complete'
+    se reanuda con su plan guardado: sin inventario, sin repetir llamadas ya
+    lanzadas y sin tocar lo ya confirmado."""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.regions = {}
+        torn = False
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    torn = not line.endswith('\n')
+                    try:
+                        self._apply(json.loads(line))
+                    except (ValueError, KeyError, TypeError):
+                        pass    # última línea a medias si el proceso murió escribiendo
+        self.file = open(path, 'a')
+        if torn:
+            # Se cierra la línea a medias para que el siguiente evento no se pegue a ella
+            self.file.write('\n')
+
+    def _apply(self, event):
+        kind = event['event']
+        if kind == 'run':
+            self.regions.clear()
+            return
+        state = self.regions.get(event['region'])
+        if state is None or (kind == 'planned' and state['complete']):
+            state = self.regions[event['region']] = {'plan': [], 'issued': set(), 'confirmed': set(),
+                                                     'complete': False}
+        if kind == 'planned':
+            state['plan'].append(event['resource'])
+        elif kind == 'issued':
+            state['issued'].add(event['id'])
+        elif kind == 'confirmed':
+            state['confirmed'].add(event['id'])
+        elif kind == 'complete':
+            state['complete'] = True
+
+    def _write(self, events):
+        with self.lock:
+            for event in events:
+                self._apply(event)
+                self.file.write(json.dumps(event) + '\n')
+            self.file.flush()
+
+    def record(self, kind, region, **fields):
+        self._write([dict(event=kind, region=region, ts=time.time(), **fields)])
+
+    def plan(self, region, resources):
+        self._write([dict(event='planned', region=region, resource=r) for r in resources])
+
+    def pending(self, region):
+        """Plan a medias de la región, o None si hay que hacer inventario"""
+        state = self.regions.get(region)
+        return state['plan'] if state and state['plan'] and not state['complete'] else None
+
+    def begin(self, regions, fresh=False):
+        """Abre una ejecución nueva salvo que alguna de las regiones tenga trabajo a medias"""
+        if fresh or not any(self.pending(region) for region in regions):
+            self._write([{'event': 'run', 'ts': time.time()}])
+
+    def issued(self, region):
+        return self.regions.get(region, {}).get('issued', set())
+
+    def confirmed(self, region):
+        return set(self.regions.get(region, {}).get('confirmed', ()))
+
+    def all_issued(self):
+        return {key for state in self.regions.values() for key in state['issued']}
+
+    def close(self):
+        self.file.close()
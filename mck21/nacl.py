@@ -0,0 +1,113 @@
+"""
+NACLs por diferencias: las entradas deseadas (ingress/egress) se comparan con las
+'Entries' de un único describe y solo se crean, reemplazan o borran las que
+cambian, a la vez pero con un máximo de llamadas simultáneas y reintentos ante
+throttling. Las asociaciones de las subredes se resuelven con un único describe
+de todas las NACLs de la VPC.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from . import common
+from .common import call_with_retry
+
+DEFAULT_RULE = 32767    # la regla * que pone AWS; no se toca
+# Nombre -> número de protocolo, que es lo que devuelve describe_network_acls
+PROTOCOL_NUMBERS = {'tcp': '6', 'udp': '17', 'icmp': '1', 'icmpv6': '58', 'all': '-1'}
+
+def entry_key(rule):
+    """Clave comparable de una entrada (declarada o de describe). Los puertos solo
+    cuentan en TCP y UDP: con otro protocolo AWS los ignora"""
+    protocol = str(rule['Protocol']).lower()
+    protocol = PROTOCOL_NUMBERS.get(protocol, protocol)
+    ports = rule.get('PortRange') if protocol in ('6', '17') else None
+    return (protocol, rule['RuleAction'], rule.get('CidrBlock') or rule.get('Ipv6CidrBlock'),
+            (ports['From'], ports['To']) if ports else None)
+
+def diff_entries(entries, ingress, egress):
+    """Entries actuales frente a las reglas deseadas -> [(op, egress, regla)] con
+    op 'create', 'replace' o 'delete' (para 'delete' basta RuleNumber)"""
+    current = {(e['Egress'], e['RuleNumber']): e for e in entries if e['RuleNumber'] < DEFAULT_RULE}
+    changes = []
+    for is_egress, rules in ((False, ingress), (True, egress)):
+        for rule in rules:
+            entry = current.pop((is_egress, rule['RuleNumber']), None)
+            if entry is None:
+                changes.append(('create', is_egress, rule))
+            elif entry_key(entry) != entry_key(rule):
+                changes.append(('replace', is_egress, rule))
+    changes.extend(('delete', is_egress, {'RuleNumber': number}) for is_egress, number in current)
+    return changes
+
+def describe_changes(changes):
+    """'+ entrada 100, 110 · ~ salida 100' para el plan"""
+    symbols = {'create': '+', 'replace': '~', 'delete': '-'}
+    groups = {}
+    for op, is_egress, rule in changes:
+        groups.setdefault((op, is_egress), []).append(str(rule['RuleNumber']))
+    return ' · '.join(f"{symbols[op]} {'salida' if is_egress else 'entrada'} {', '.join(numbers)}"
+                      for (op, is_egress), numbers in groups.items())
+
+def apply_entries(ec2, nacl_id, changes, max_workers=None):
+    """Aplica las diferencias de diff_entries a la vez (como mucho NACL_WORKERS llamadas)"""
+    def apply(change):
+        op, is_egress, rule = change
+        if op == 'delete':
+            return call_with_retry(ec2.delete_network_acl_entry, NetworkAclId=nacl_id, Egress=is_egress,
+                                   RuleNumber=rule['RuleNumber'])
+        entry = dict(NetworkAclId=nacl_id, Egress=is_egress, RuleNumber=rule['RuleNumber'],
+                     Protocol=rule['Protocol'], RuleAction=rule['RuleAction'], CidrBlock=rule['CidrBlock'])
+        if 'PortRange' in rule:
+            entry['PortRange'] = rule['PortRange']
+        call = ec2.create_network_acl_entry if op == 'create' else ec2.replace_network_acl_entry
+        return call_with_retry(call, **entry)
+
+    if not changes:
+        return
+    workers = min(max_workers or common.NACL_WORKERS, len(changes))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # list() para que el primer error se propague
+        list(pool.map(apply, changes))
+
+class AssociationIndex:
+    """Subred -> (NACL, ID de asociación) de toda una VPC. Se carga de la foto de la
+    VPC o, para subredes recién creadas, con un único describe compartido entre hilos"""
+
+    def __init__(self, acls=()):
+        self.lock = threading.Lock()
+        self.owner = {}
+        self.loaded = False
+        self.calls = 0
+        self._index(acls)
+
+    def _index(self, acls):
+        for acl in acls:
+            for assoc in acl.get('Associations', []):
+                self.owner[assoc['SubnetId']] = (acl['NetworkAclId'], assoc['NetworkAclAssociationId'])
+
+    def get(self, subnet_id):
+        return self.owner.get(subnet_id)
+
+    def lookup(self, ec2, vpc_id, subnet_id):
+        """Asociación de la subred; la primera subred desconocida relee toda la VPC
+        (una vez: las demás la encuentran ya cargada)"""
+        with self.lock:
+            if subnet_id not in self.owner and not self.loaded:
+                acls = []
+                for page in ec2.get_paginator('describe_network_acls').paginate(
+                        Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}]):
+                    self.calls += 1
+                    acls.extend(page['NetworkAcls'])
+                self._index(acls)
+                self.loaded = True
+            if subnet_id not in self.owner:
+                raise LookupError(f"La subred {subnet_id} no tiene asociación de NACL")
+            return self.owner[subnet_id]
+
+    def replace(self, ec2, vpc_id, subnet_id, nacl_id):
+        """Asocia la subred a la NACL reemplazando la asociación actual"""
+        _, assoc = self.lookup(ec2, vpc_id, subnet_id)
+        response = call_with_retry(ec2.replace_network_acl_association, AssociationId=assoc, NetworkAclId=nacl_id)
+        with self.lock:
+            self.owner[subnet_id] = (nacl_id, response['NewAssociationId'])
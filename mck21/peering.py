@@ -0,0 +1,94 @@
+"""
+Peering entre Transit Gateways de dos regiones como máquina de estados. El
+adjunto se pide desde una región y se acepta desde la otra en cuanto allí
+aparece en 'pendingAcceptance'. Las consultas usan un backoff corto que vuelve
+al mínimo en cada transición, y la máquina termina cuando el adjunto está en
+'available'.
+
+    peering = TgwPeering(ec2_east, ec2_west, tgw_east, tgw_west, account_id)
+    attachment_id = peering.run()
+"""
+
+import random
+import time
+
+from . import common
+from .common import Colors, print_color
+from .readiness import ProbeFailed
+
+FAILED_STATES = {'failed', 'failing', 'rejected', 'rejecting', 'deleted', 'deleting'}
+
+class TgwPeering:
+    """Estados (del lado que acepta): requested -> pendingAcceptance -> (accept)
+    -> pending -> available. history guarda (hora, estado) de cada transición"""
+
+    def __init__(self, requester, accepter, tgw_id, peer_tgw_id, peer_account_id, tags=None, timeout=None):
+        self.requester = requester
+        self.accepter = accepter
+        self.tgw_id = tgw_id
+        self.peer_tgw_id = peer_tgw_id
+        self.peer_account_id = peer_account_id
+        self.tags = tags or []
+        self.timeout = common.READY_TIMEOUT if timeout is None else timeout
+        self.attachment_id = None
+        self.state = None
+        self.accepted = False
+        self.history = []
+        self.polls = 0
+
+    def _transition(self, state):
+        self.state = state
+        self.history.append((time.time(), state))
+        print_color(Colors.GREEN if state == 'available' else Colors.YELLOW,
+                    f"  [{time.strftime('%H:%M:%S')}] peering {self.attachment_id}: {state}")
+
+    def _observe(self):
+        """Estado del adjunto visto desde la región que acepta (None si aún no aparece).
+        Filtro por ID en vez de TransitGatewayAttachmentIds: un ID que aún no se ha
+        propagado no es un error"""
+        self.polls += 1
+        attachments = self.accepter.describe_transit_gateway_peering_attachments(
+            Filters=[{'Name': 'transit-gateway-attachment-id', 'Values': [self.attachment_id]}]
+        )['TransitGatewayPeeringAttachments']
+        return attachments[0]['State'] if attachments else None
+
+    def request(self):
+        response = self.requester.create_transit_gateway_peering_attachment(
+            TransitGatewayId=self.tgw_id,
+            PeerTransitGatewayId=self.peer_tgw_id,
+            PeerAccountId=self.peer_account_id,
+            PeerRegion=self.accepter.meta.region_name,
+            TagSpecifications=[{'ResourceType': 'transit-gateway-attachment', 'Tags': self.tags}] if self.tags else []
+        )
+        self.attachment_id = response['TransitGatewayPeeringAttachment']['TransitGatewayAttachmentId']
+        self._transition('requested')
+
+    def run(self):
+        """Pide el peering (si no se ha pedido), lo acepta en cuanto se puede y espera a
+        'available'. Devuelve el ID del adjunto; ProbeFailed o TimeoutError si no llega"""
+        if self.attachment_id is None:
+            self.request()
+        deadline = time.time() + self.timeout
+        delay = common.READY_POLL_INTERVAL
+        while True:
+            state = self._observe()
+            # Justo tras aceptar puede seguir viéndose 'pendingAcceptance' un momento
+            if state == 'pendingAcceptance' and self.accepted:
+                state = None
+            if state and state != self.state:
+                self._transition(state)
+                delay = common.READY_POLL_INTERVAL
+                if state in FAILED_STATES:
+                    raise ProbeFailed(f"peering {self.attachment_id} en estado {state}")
+                if state == 'pendingAcceptance':
+                    # Se acepta sin esperar a la siguiente consulta
+                    self.accepter.accept_transit_gateway_peering_attachment(
+                        TransitGatewayAttachmentId=self.attachment_id)
+                    self.accepted = True
+                    self._transition('accepted')
+                elif state == 'available':
+                    return self.attachment_id
+            if time.time() >= deadline:
+                raise TimeoutError(f"Sin disponibilidad a tiempo: peering {self.attachment_id} ({self.state})")
+            time.sleep(min(delay * random.uniform(0.5, 1.0), max(deadline - time.time(), 0)))
+            delay = min(delay * 2, common.READY_MAX_POLL_INTERVAL)
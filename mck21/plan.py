@@ -0,0 +1,163 @@
+"""
+Plan de borrado sin borrar nada: DAG completo, camino crítico, duración estimada
+y llamadas API previstas por servicio, en JSON para compararlo entre ejecuciones.
+Las duraciones por tipo salen del historial local que actualiza cada limpieza real.
+"""
+
+import json
+import math
+import os
+import threading
+from collections import Counter, defaultdict
+
+from . import common, registry
+from .teardown import build_dependency_graph
+
+HISTORY_PATH = '.mck21_history.json'    # duración media del borrado por tipo
+HISTORY_WEIGHT = 0.3                    # peso de cada ejecución nueva en la media
+
+def _operation(name):
+    """describe_instances -> DescribeInstances"""
+    return ''.join(part.title() for part in name.split('_'))
+
+class History:
+    """Duración media (exponencial) del borrado de cada tipo, incluida su espera"""
+
+    def __init__(self, path=HISTORY_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.types = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.types = json.load(f)
+
+    def estimate(self, rtype):
+        """(segundos, origen): media del historial o estimación por defecto del tipo"""
+        entry = self.types.get(rtype)
+        if entry:
+            return entry['mean'], 'historial'
+        return registry.get(rtype).estimate, 'defecto'
+
+    def record(self, durations):
+        """durations: {tipo: [segundos]} de una limpieza real"""
+        with self.lock:
+            for rtype, samples in durations.items():
+                entry = self.types.setdefault(rtype, {'mean': samples[0], 'samples': 0})
+                for seconds in samples:
+                    entry['mean'] += HISTORY_WEIGHT * (seconds - entry['mean'])
+                entry['samples'] += len(samples)
+
+    def save(self):
+        if not self.path:
+            return
+        with self.lock:
+            with open(self.path, 'w') as f:
+                json.dump(self.types, f, indent=2, sort_keys=True)
+
+def schedule(resources, history):
+    """Inicio más temprano de cada recurso con workers ilimitados.
+    Devuelve ({id: (inicio, duración)}, camino crítico [ids])"""
+    nodes = {r['ResourceId']: r for r in resources}
+    blockers = build_dependency_graph(resources)
+    times = {}
+    via = {}
+
+    def visit(rid):
+        if rid in times:
+            return times[rid]
+        start = 0.0
+        for blocker in blockers[rid]:
+            begin, duration = visit(blocker)
+            if begin + duration > start:
+                start, via[rid] = begin + duration, blocker
+        times[rid] = (start, history.estimate(nodes[rid]['ResourceType'])[0])
+        return times[rid]
+
+    for rid in nodes:
+        visit(rid)
+    if not times:
+        return times, []
+    rid = max(times, key=lambda n: sum(times[n]))
+    path = [rid]
+    while rid in via:
+        rid = via[rid]
+        path.append(rid)
+    return times, path[::-1]
+
+def _polls(seconds):
+    """Consultas de un BatchWaiter en `seconds` sin cambios: backoff desde POLL_INTERVAL
+    hasta MAX_POLL_INTERVAL, con el jitter medio (3/4 del intervalo)"""
+    polls, elapsed, delay = 1, 0.0, common.POLL_INTERVAL
+    while elapsed < seconds:
+        elapsed += delay * 0.75
+        delay = min(delay * 2, common.MAX_POLL_INTERVAL)
+        polls += 1
+    return polls
+
+def estimate_calls(resources, times):
+    """Llamadas EC2 previstas: las de cada borrado (por lotes si el tipo lo admite y
+    no espera a nadie) más las consultas de espera (un BatchWaiter por tipo mientras
+    quede alguno pendiente)"""
+    calls = Counter()
+    batched = Counter()         # llamadas que van por lotes de BATCH_CHUNK
+    spans = defaultdict(lambda: [math.inf, 0.0])
+    for r in resources:
+        rt = registry.get(r['ResourceType'])
+        if rt.delete_batch and times[r['ResourceId']][0] == 0:
+            batched.update(rt.operations(r))
+        else:
+            calls.update(rt.operations(r))
+        if rt.wait:
+            start, duration = times[r['ResourceId']]
+            span = spans[rt.name]
+            span[0], span[1] = min(span[0], start), max(span[1], start + duration)
+    for operation, count in batched.items():
+        calls[operation] += math.ceil(count / common.BATCH_CHUNK)
+    for rtype, (first, last) in spans.items():
+        calls[_operation(registry.get(rtype).describe)] += _polls(last - first)
+    if any(r['ResourceType'] in ('subnet', 'security-group') for r in resources):
+        calls['DescribeNetworkInterfaces'] += 1
+    return dict(sorted(calls.items()))
+
+def region_plan(resources, history, inventory_calls=None):
+    """Plan de una región: recursos por tipo, DAG, camino crítico y llamadas"""
+    times, path = schedule(resources, history)
+    blockers = build_dependency_graph(resources)
+    nodes = {r['ResourceId']: r for r in resources}
+    return {
+        'resources': dict(sorted(Counter(r['ResourceType'] for r in resources).items())),
+        'estimated_seconds': round(max((sum(t) for t in times.values()), default=0.0), 1),
+        'critical_path': [{'id': rid, 'type': nodes[rid]['ResourceType'],
+                           'start': round(times[rid][0], 1), 'seconds': round(times[rid][1], 1)}
+                          for rid in path],
+        'estimates': {rtype: dict(zip(('seconds', 'source'), history.estimate(rtype)))
+                      for rtype in sorted({r['ResourceType'] for r in resources})},
+        'api_calls': {'ec2': estimate_calls(resources, times)},
+        'inventory_api_calls': dict(sorted((inventory_calls or {}).items())),
+        'nodes': [{'id': rid, 'type': nodes[rid]['ResourceType'], 'after': sorted(blockers[rid]),
+                   'start': round(times[rid][0], 1)}
+                  for rid in sorted(nodes)],
+    }
+
+def build_plan(regions):
+    """regions: {región: plan de región}. Totales: la duración es la de la región más
+    lenta (se limpian a la vez) y las llamadas se suman por servicio y operación"""
+    totals = defaultdict(Counter)
+    for plan in regions.values():
+        for service, calls in plan['api_calls'].items():
+            totals[service].update(calls)
+    return {
+        'estimated_seconds': max((p['estimated_seconds'] for p in regions.values()), default=0.0),
+        'resources': sum(sum(p['resources'].values()) for p in regions.values()),
+        'api_calls': {service: dict(sorted(calls.items())) for service, calls in sorted(totals.items())},
+        'regions': regions,
+    }
+
+def dump(plan, path=None):
+    """JSON estable (claves ordenadas) para poder hacer diff entre ejecuciones"""
+    text = json.dumps(plan, indent=2, sort_keys=True, ensure_ascii=False)
+    if path:
+        with open(path, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
@@ -0,0 +1,119 @@
+"""
+Motor de aprovisionamiento: cada paso de un script de creación es un nodo con
+aristas explícitas hacia los pasos que necesita, y los que no dependen entre sí
+se ejecutan a la vez (subnets, SG, NACLs e IGW en cuanto existe la VPC; el NAT
+espera a su EIP y a su subnet pública sin bloquear al resto). Un paso puede
+además esperar a condiciones de disponibilidad (readiness) antes de ejecutarse.
+"""
+
+import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import Colors, MAX_WORKERS, print_color
+from .readiness import require_ready
+
+class Step:
+    """Paso de aprovisionamiento.
+
+    name: clave del resultado (lo que devuelve fn) en el diccionario de resultados
+    fn: fn(ctx, results) -> valor; results tiene ya los valores de sus 'after'
+    after: pasos que tienen que haber terminado antes
+    ready: ready(ctx, results) -> condiciones de readiness.py que se esperan
+           (después de los 'after') antes de llamar a fn
+    """
+
+    def __init__(self, name, fn, after=(), ready=None):
+        self.name = name
+        self.fn = fn
+        self.after = list(after)
+        self.ready = ready
+
+    def __repr__(self):
+        return f"Step({self.name!r})"
+
+def _check(steps):
+    """Nombres únicos, dependencias conocidas y sin ciclos"""
+    names = {}
+    for step in steps:
+        if step.name in names:
+            raise ValueError(f"Paso repetido: {step.name}")
+        names[step.name] = step
+    for step in steps:
+        unknown = [dep for dep in step.after if dep not in names]
+        if unknown:
+            raise ValueError(f"{step.name} depende de pasos inexistentes: {', '.join(unknown)}")
+    state = {}
+
+    def visit(name, path):
+        if state.get(name) == 'done':
+            return
+        if state.get(name) == 'visiting':
+            raise ValueError(f"Dependencias circulares: {' -> '.join(path + [name])}")
+        state[name] = 'visiting'
+        for dep in names[name].after:
+            visit(dep, path + [name])
+        state[name] = 'done'
+
+    for step in steps:
+        visit(step.name, [])
+
+def run_steps(steps, ctx, max_workers=MAX_WORKERS, results=None):
+    """Ejecuta los pasos en paralelo siguiendo sus 'after'. Un paso que falla no
+    detiene a los independientes; sus dependientes (directos o no) se omiten.
+    Devuelve {'results', 'failed': {paso: error}, 'skipped', 'timings', 'elapsed'}
+    con timings {paso: (inicio, fin)} relativos al arranque"""
+    _check(steps)
+    by_name = {step.name: step for step in steps}
+    results = {} if results is None else results
+    pending = {step.name: len(step.after) for step in steps}
+    dependents = {step.name: [] for step in steps}
+    for step in steps:
+        for dep in step.after:
+            dependents[dep].append(step.name)
+    finished = queue.Queue()
+    failed, skipped, timings = {}, [], {}
+    start = time.time()
+
+    def worker(name):
+        began = time.time() - start
+        step = by_name[name]
+        try:
+            if step.ready:
+                require_ready(ctx, step.ready(ctx, results))
+            value = step.fn(ctx, results)
+            finished.put((name, value, None, began))
+        except Exception as e:
+            finished.put((name, None, e, began))
+
+    def skip(name):
+        for dep in dependents[name]:
+            if dep not in skipped:
+                skipped.append(dep)
+                print_color(Colors.YELLOW, f"  - {dep} omitido: depende de {name}")
+                skip(dep)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = 0
+        for name, count in pending.items():
+            if count == 0:
+                pool.submit(worker, name)
+                running += 1
+        while running:
+            name, value, error, began = finished.get()
+            running -= 1
+            timings[name] = (began, time.time() - start)
+            if error is not None:
+                failed[name] = error
+                print_color(Colors.RED, f"Error en {name}: {error}")
+                skip(name)
+                continue
+            results[name] = value
+            for dep in dependents[name]:
+                pending[dep] -= 1
+                if pending[dep] == 0 and dep not in skipped:
+                    pool.submit(worker, dep)
+                    running += 1
+
+    return {'results': results, 'failed': failed, 'skipped': skipped, 'timings': timings,
+            'elapsed': time.time() - start}
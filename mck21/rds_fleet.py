@@ -0,0 +1,120 @@
+"""
+Flotas de instancias RDS: las creaciones se lanzan a la vez y todas las
+instancias se siguen con un único describe_db_instances paginado por consulta
+(filtro db-instance-id: la API de RDS no filtra por tag). Cada cambio de estado
+se emite con su hora y los endpoints se devuelven según quedan disponibles.
+
+    fleet = RdsFleet(rds, [dict(DBInstanceIdentifier='mck21-rds-1', ...), ...])
+    fleet.create()
+    for event in fleet.track():     # Event(time, instance, old, new, endpoint)
+        ...
+"""
+
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError
+
+from . import common
+from .common import MAX_WORKERS, call_with_retry
+
+AVAILABLE = 'available'
+FILTER_CHUNK = 100      # valores como máximo en un filtro de describe_db_instances
+# Estados de los que la instancia no va a salir sola
+FAILED_STATES = {'failed', 'incompatible-network', 'incompatible-parameters', 'incompatible-restore',
+                 'inaccessible-encryption-credentials', 'restore-error', 'storage-full', 'deleting'}
+
+Event = namedtuple('Event', 'time instance old new endpoint')
+
+def endpoint(instance):
+    """'host:puerto' de una instancia de describe_db_instances (None si aún no tiene)"""
+    ep = instance.get('Endpoint')
+    return f"{ep['Address']}:{ep['Port']}" if ep and ep.get('Address') else None
+
+class RdsFleet:
+    """Instancias RDS creadas y seguidas en bloque. specs: argumentos de
+    create_db_instance de cada instancia"""
+
+    def __init__(self, rds, specs, max_workers=MAX_WORKERS):
+        self.rds = rds
+        self.specs = list(specs)
+        self.ids = [spec['DBInstanceIdentifier'] for spec in self.specs]
+        self.max_workers = max_workers
+        self.states = {}        # id -> último estado visto
+        self.endpoints = {}     # id -> 'host:puerto' de las disponibles
+        self.failed = {}        # id -> estado final de error o mensaje
+        self.polls = 0
+
+    def create(self):
+        """Lanza todas las creaciones a la vez. Una instancia que ya existe se sigue
+        igual (el script se puede repetir). Devuelve {id: error} de las que fallaron"""
+        def create(spec):
+            try:
+                call_with_retry(self.rds.create_db_instance, **spec)
+            except ClientError as e:
+                if e.response.get('Error', {}).get('Code') != 'DBInstanceAlreadyExists':
+                    return e
+            return None
+
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.specs)) or 1) as pool:
+            errors = dict(zip(self.ids, pool.map(create, self.specs)))
+        self.failed.update({rid: str(e) for rid, e in errors.items() if e is not None})
+        return {rid: e for rid, e in errors.items() if e is not None}
+
+    def describe(self, ids):
+        """{id: instancia} de los IDs pedidos: un describe paginado por cada
+        FILTER_CHUNK IDs"""
+        found = {}
+        for i in range(0, len(ids), FILTER_CHUNK):
+            pages = self.rds.get_paginator('describe_db_instances').paginate(
+                Filters=[{'Name': 'db-instance-id', 'Values': ids[i:i + FILTER_CHUNK]}])
+            for page in pages:
+                self.polls += 1
+                found.update((db['DBInstanceIdentifier'], db) for db in page['DBInstances'])
+        return found
+
+    def track(self, timeout=None):
+        """Generador de Event con cada cambio de estado hasta que todas las instancias
+        están disponibles, han fallado o vence el plazo (WAIT_TIMEOUT por defecto).
+        Backoff con jitter entre POLL_INTERVAL y MAX_POLL_INTERVAL, que vuelve al
+        mínimo cuando algo cambia"""
+        limit = common.WAIT_TIMEOUT if timeout is None else timeout
+        deadline = time.time() + limit
+        delay = common.POLL_INTERVAL
+        pending = [rid for rid in self.ids if rid not in self.failed and rid not in self.endpoints]
+        while pending:
+            found = self.describe(pending)
+            now = time.time()
+            changed = False
+            for rid in pending:
+                db = found.get(rid)
+                # Recién creada puede no aparecer aún: sigue pendiente
+                state = db['DBInstanceStatus'] if db else 'not-found'
+                ep = endpoint(db) if state == AVAILABLE else None
+                old = self.states.get(rid)
+                if state == old and not ep:
+                    continue
+                changed = True
+                self.states[rid] = state
+                if ep:
+                    self.endpoints[rid] = ep
+                elif state in FAILED_STATES:
+                    self.failed[rid] = state
+                yield Event(now, rid, old, state, ep)
+            pending = [rid for rid in pending if rid not in self.failed and rid not in self.endpoints]
+            if not pending:
+                return
+            if now >= deadline:
+                for rid in pending:
+                    self.failed[rid] = f"sin disponibilidad tras {limit}s"
+                return
+            delay = common.POLL_INTERVAL if changed else min(delay * 2, common.MAX_POLL_INTERVAL)
+            time.sleep(min(delay / 2 + random.uniform(0, delay / 2), max(deadline - time.time(), 0)))
+
+    def wait(self, timeout=None):
+        """track() sin eventos: {id: endpoint} de las disponibles"""
+        for _ in self.track(timeout):
+            pass
+        return dict(self.endpoints)
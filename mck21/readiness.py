@@ -0,0 +1,121 @@
+"""
+Comprobaciones de disponibilidad para los scripts de creación: en vez de pausas
+fijas se espera a condiciones reales (ruta 'active', NAT o TGW 'available', IGW
+adjuntado, instancia 'running' o con los status checks en 'ok') y se sigue en
+cuanto se cumplen, con un plazo máximo.
+"""
+
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+
+from . import common
+
+class ProbeFailed(Exception):
+    """El recurso llegó a un estado del que ya no va a salir (NAT 'failed', ruta 'blackhole')"""
+
+class Probe:
+    """Condición a esperar. check(ec2) -> True si ya se cumple; lanza ProbeFailed
+    si ya no se va a cumplir"""
+
+    def __init__(self, name, check):
+        self.name = name
+        self.check = check
+
+    def __repr__(self):
+        return f"Probe({self.name!r})"
+
+def route_active(route_table_id, destination='0.0.0.0/0'):
+    def check(ec2):
+        table = ec2.describe_route_tables(RouteTableIds=[route_table_id])['RouteTables'][0]
+        for route in table['Routes']:
+            if route.get('DestinationCidrBlock') == destination:
+                if route.get('State') == 'blackhole':
+                    raise ProbeFailed(f"ruta {destination} de {route_table_id} en blackhole")
+                return route.get('State') == 'active'
+        return False
+    return Probe(f"ruta {destination} de {route_table_id}", check)
+
+def nat_available(nat_id):
+    def check(ec2):
+        nat = ec2.describe_nat_gateways(NatGatewayIds=[nat_id])['NatGateways'][0]
+        if nat['State'] in ('failed', 'deleting', 'deleted'):
+            raise ProbeFailed(f"NAT {nat_id} en estado {nat['State']}: {nat.get('FailureMessage', '')}")
+        return nat['State'] == 'available'
+    return Probe(f"NAT {nat_id}", check)
+
+def igw_attached(igw_id, vpc_id):
+    def check(ec2):
+        igw = ec2.describe_internet_gateways(InternetGatewayIds=[igw_id])['InternetGateways'][0]
+        # Un IGW adjuntado a una VPC aparece como 'available'
+        return any(a['VpcId'] == vpc_id and a['State'] in ('available', 'attached')
+                   for a in igw.get('Attachments', []))
+    return Probe(f"IGW {igw_id}", check)
+
+def tgw_available(tgw_id):
+    def check(ec2):
+        tgw = ec2.describe_transit_gateways(TransitGatewayIds=[tgw_id])['TransitGateways'][0]
+        if tgw['State'] in ('deleting', 'deleted'):
+            raise ProbeFailed(f"TGW {tgw_id} en estado {tgw['State']}")
+        return tgw['State'] == 'available'
+    return Probe(f"TGW {tgw_id}", check)
+
+def instances_running(instance_ids, status_checks=False):
+    """Instancias en 'running'; con status_checks también con los checks de
+    sistema e instancia en 'ok' (unos minutos más)"""
+    ids = list(instance_ids)
+
+    def check(ec2):
+        statuses = ec2.describe_instance_status(InstanceIds=ids, IncludeAllInstances=True)['InstanceStatuses']
+        found = {s['InstanceId']: s for s in statuses}
+        for rid in ids:
+            status = found.get(rid)
+            if status is None:
+                return False
+            state = status['InstanceState']['Name']
+            if state in ('shutting-down', 'terminated', 'stopping', 'stopped'):
+                raise ProbeFailed(f"instancia {rid} en estado {state}")
+            if state != 'running':
+                return False
+            if status_checks and (status['InstanceStatus']['Status'] != 'ok'
+                                  or status['SystemStatus']['Status'] != 'ok'):
+                return False
+        return True
+    return Probe(f"instancias {', '.join(ids)}", check)
+
+def _ready(ec2, probe):
+    """probe.check con la consistencia eventual de EC2: un ID recién creado puede
+    dar *.NotFound unos segundos (como en los waiters de boto3, es 'aún no')"""
+    try:
+        return probe.check(ec2)
+    except ClientError as e:
+        if e.response.get('Error', {}).get('Code', '').endswith('NotFound'):
+            return False
+        raise
+
+def wait_ready(ec2, probes, timeout=None, delay=None):
+    """Consulta las condiciones pendientes (todas a la vez) hasta que se cumplen o
+    vence el plazo. Sin espera si ya se cumplen; si no, backoff desde delay
+    (READY_POLL_INTERVAL por defecto; algo que tarda minutos, como un TGW, puede
+    empezar en READY_MAX_POLL_INTERVAL) hasta READY_MAX_POLL_INTERVAL con jitter.
+    Devuelve los nombres de las que no se cumplieron a tiempo"""
+    pending = list(probes)
+    deadline = time.time() + (common.READY_TIMEOUT if timeout is None else timeout)
+    delay = common.READY_POLL_INTERVAL if delay is None else delay
+    if not pending:
+        return []
+    with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+        while True:
+            results = list(pool.map(lambda probe: _ready(ec2, probe), pending))
+            pending = [probe for probe, ok in zip(pending, results) if not ok]
+            if not pending or time.time() >= deadline:
+                return [probe.name for probe in pending]
+            time.sleep(min(delay * random.uniform(0.5, 1.0), max(deadline - time.time(), 0)))
+            delay = min(delay * 2, common.READY_MAX_POLL_INTERVAL)
+
+def require_ready(ec2, probes, timeout=None, delay=None):
+    """Como wait_ready, pero lanza TimeoutError si algo no llega a tiempo"""
+    missing = wait_ready(ec2, probes, timeout, delay)
+    if missing:
+        raise TimeoutError(f"Sin disponibilidad a tiempo: {', '.join(missing)}")
@@ -0,0 +1,121 @@
+"""
+Limpieza multi-región: una tubería inventario + borrado por región, todas a la vez.
+"""
+
+import boto3
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
+
+from .common import ApiStats, Colors, print_color
+from .inventory import get_resources
+from .plan import region_plan
+from .teardown import SharedClaims, run_teardown
+
+def resolve_regions(values):
+    """Lista de regiones a limpiar: separadas por comas/espacios; 'all-enabled' se
+    sustituye por las regiones habilitadas en la cuenta (junto a las que se nombren)"""
+    default = boto3.session.Session().region_name
+    if not values:
+        return [default or 'us-east-1']
+    regions = [name for value in values for name in value.split(',') if name]
+    if 'all-enabled' in regions:
+        # Sin región configurada boto3.client('ec2') lanza NoRegionError
+        ec2 = boto3.client('ec2', region_name=default or 'us-east-1')
+        response = ec2.describe_regions(Filters=[
+            {'Name': 'opt-in-status', 'Values': ['opt-in-not-required', 'opted-in']}
+        ])
+        enabled = sorted(region['RegionName'] for region in response['Regions'])
+        regions = enabled + [name for name in regions if name != 'all-enabled']
+    return list(dict.fromkeys(regions))
+
+def make_clients(regions):
+    """{región: (ec2, tagging, ApiStats)}. Se crean en el hilo principal: la sesión por
+    defecto de boto3 no es thread-safe. El modo adaptativo de botocore ya frena el
+    ritmo de llamadas ante throttling"""
+    config = Config(retries={'mode': 'adaptive', 'max_attempts': 10})
+    clients = {}
+    for region in regions:
+        stats = ApiStats()
+        clients[region] = (stats.attach(boto3.client('ec2', region_name=region, config=config)),
+                           stats.attach(boto3.client('resourcegroupstaggingapi', region_name=region,
+                                                     config=config)),
+                           stats)
+    return clients
+
+def _row(region):
+    return {'region': region, 'resources': 0, 'deleted': 0, 'skipped': 0, 'failed': 0, 'retries': 0,
+            'inventory': 0.0, 'elapsed': 0.0, 'calls': 0}
+
+def clean_region(region, clients, inventory_mode, workers, claims, journal=None, history=None):
+    """Inventario (o plan del diario si quedó a medias) + borrado de una región.
+    Devuelve su fila del resumen"""
+    ec2, tagging, stats = clients
+    label = f"[{region}] "
+    row = _row(region)
+
+    resources = journal.pending(region) if journal else None
+    if resources is not None:
+        print_color(Colors.YELLOW, f"{label}Reanudando: {len(resources)} recursos en el diario, "
+                                   f"{len(journal.confirmed(region))} ya confirmados")
+    else:
+        start = time.time()
+        resources = get_resources(ec2, mode=inventory_mode, tagging=tagging)
+        row['inventory'] = time.time() - start
+        print_color(Colors.GREEN, f"{label}{len(resources)} recursos ({inventory_mode}, {row['inventory']:.1f}s)")
+        if journal:
+            journal.plan(region, resources)
+    row['resources'] = len(resources)
+
+    if resources:
+        summary = run_teardown(ec2, resources, max_workers=workers, claims=claims, label=label,
+                               journal=journal, region=region)
+        row.update(deleted=summary['deleted'], skipped=summary['skipped'], failed=summary['failed'],
+                   retries=summary['retries'], elapsed=summary['elapsed'])
+        if history:
+            history.record(summary['durations'])
+    # Con errores la región queda abierta: la siguiente ejecución la reanuda
+    if journal and not row['failed']:
+        journal.record('complete', region)
+    row['calls'] = stats.total()[0]
+    return row
+
+def clean_regions(clients, inventory_mode, workers, journal=None, history=None):
+    """Limpia todas las regiones de `clients` en paralelo. Devuelve una fila por región"""
+    # Los peerings entre regiones se ven desde ambos lados: el primero que llega los borra.
+    # Lo que el diario ya lanzó desde cualquier región cuenta como reclamado
+    claims = SharedClaims()
+    if journal:
+        claims.ids.update(journal.all_issued())
+    with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+        futures = {region: pool.submit(clean_region, region, region_clients, inventory_mode,
+                                       workers, claims, journal, history)
+                   for region, region_clients in clients.items()}
+    rows = []
+    for region, future in futures.items():
+        try:
+            rows.append(future.result())
+        except Exception as e:
+            print_color(Colors.RED, f"[{region}] Error en la limpieza: {e}")
+            row = _row(region)
+            row.update(failed=1, calls=clients[region][2].total()[0])
+            rows.append(row)
+    return rows
+
+def plan_region(region, clients, inventory_mode, history):
+    """Inventario de una región y su plan de borrado (sin borrar nada)"""
+    ec2, tagging, stats = clients
+    resources = get_resources(ec2, mode=inventory_mode, tagging=tagging)
+    inventory_calls = defaultdict(dict)
+    for key, count in stats.calls.items():
+        service, operation = key.split(':', 1)
+        inventory_calls[service][operation] = count
+    return region_plan(resources, history, inventory_calls)
+
+def plan_regions(clients, inventory_mode, history):
+    """{región: plan} con el inventario de todas las regiones a la vez"""
+    with ThreadPoolExecutor(max_workers=len(clients)) as pool:
+        futures = {region: pool.submit(plan_region, region, region_clients, inventory_mode, history)
+                   for region, region_clients in clients.items()}
+    return {region: future.result() for region, future in futures.items()}
@@ -0,0 +1,63 @@
+"""
+Registro de tipos de recurso. Cada tipo declara en un solo sitio todo lo que
+necesitan el inventario, el grafo de dependencias, las esperas y el borrado;
+añadir un tipo nuevo es registrar un ResourceType en resources.py.
+"""
+
+class ResourceType:
+    """Definición de un tipo de recurso del inventario.
+
+    describe: operación describe_* de EC2 (paginada por filtros)
+    filter_param: nombre del parámetro de filtros ('Filters', o 'Filter' en NAT)
+    id_filter: filtro por ID para los describe por lotes
+    records: página del describe -> registros {'ResourceId', 'ResourceType', ...}
+    live_filter: filtros de estado que todavía hay que borrar
+    arn_type: tipo en el ARN de la Tagging API (None si no se busca por tag)
+    hydrate: False si el ARN ya basta para borrarlo (sin describe)
+    delete: handler(ctx, registro)
+    delete_batch: handler(ctx, registros) que lanza de una vez el borrado de todos
+                  los que no esperan a nadie; su delete ya solo espera
+    wait: (elementos de una página, elemento -> (id, estado), estados finales)
+          si el borrado es asíncrono y los dependientes deben esperar
+    blocks: (registro, índice por VPC) -> IDs que solo se pueden borrar después
+    operations: registro -> operaciones API que lanza su borrado (para el plan)
+    estimate: segundos que tarda el borrado (incluida la espera) si no hay historial
+    """
+
+    def __init__(self, name, describe, id_filter, records, delete, filter_param='Filters',
+                 live_filter=None, arn_type=None, hydrate=True, wait=None, blocks=None,
+                 operations=None, estimate=1.0, delete_batch=None):
+        self.name = name
+        self.describe = describe
+        self.id_filter = id_filter
+        self.records = records
+        self.delete = delete
+        self.filter_param = filter_param
+        self.live_filter = live_filter or []
+        self.arn_type = arn_type
+        self.hydrate = hydrate
+        self.wait = wait
+        self.blocks = blocks or (lambda r, by_vpc: [])
+        self.operations = operations or (lambda r: [])
+        self.estimate = estimate
+        self.delete_batch = delete_batch
+
+    def __repr__(self):
+        return f"ResourceType({self.name!r})"
+
+# Nombre del tipo -> ResourceType, en el orden de registro
+REGISTRY = {}
+
+def register(rtype):
+    REGISTRY[rtype.name] = rtype
+    return rtype
+
+def get(name):
+    return REGISTRY[name]
+
+def arn_types():
+    """Tipo del ARN (arn:aws:ec2:región:cuenta:<tipo>/<id>) -> nombre del tipo"""
+    return {rt.arn_type: rt.name for rt in REGISTRY.values() if rt.arn_type}
+
+def waitable():
+    return [rt.name for rt in REGISTRY.values() if rt.wait]
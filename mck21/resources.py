@@ -0,0 +1,244 @@
+"""
+Tipos de recurso con tag mck21: registros del inventario, borrado, espera y
+dependencias de cada uno. El orden de borrado sale de 'blocks':
+    EC2 → Subnet / Security Group / IGW
+    NAT Gateway → EIP / Subnet / IGW
+    TGW Attachment → Transit Gateway / Subnet / VPC
+    Peering → VPC
+    Subnet / Route Table / Security Group / IGW → VPC
+"""
+
+from .registry import ResourceType, register
+
+# ==============================================================================
+# EC2
+# ==============================================================================
+
+def _instance_records(page):
+    return [{'ResourceId': inst['InstanceId'], 'ResourceType': 'instance',
+             'VpcId': inst.get('VpcId'), 'SubnetId': inst.get('SubnetId'),
+             'SecurityGroupIds': [g['GroupId'] for g in inst.get('SecurityGroups', [])]}
+            for res in page['Reservations'] for inst in res['Instances']]
+
+def delete_instance(ctx, r):
+    ctx.issue(r['ResourceId'], lambda: ctx.ec2.terminate_instances(InstanceIds=[r['ResourceId']]))
+    ctx.wait_deleted('instance', [r['ResourceId']])
+
+def terminate_instances(ctx, records):
+    ctx.issue_batch([r['ResourceId'] for r in records],
+                    lambda ids: ctx.ec2.terminate_instances(InstanceIds=ids))
+
+def _instance_blocks(r, by_vpc):
+    # La IP pública mapeada impide desasociar el IGW
+    return ([r.get('SubnetId')] + r.get('SecurityGroupIds', [])
+            + by_vpc[r.get('VpcId')]['internet-gateway'] + [r.get('VpcId')])
+
+register(ResourceType(
+    'instance', 'describe_instances', 'instance-id', _instance_records, delete_instance,
+    live_filter=[{'Name': 'instance-state-name',
+                  'Values': ['pending', 'running', 'shutting-down', 'stopping', 'stopped']}],
+    arn_type='instance',
+    operations=lambda r: ['TerminateInstances'], estimate=60, delete_batch=terminate_instances,
+    wait=(lambda page: [i for res in page['Reservations'] for i in res['Instances']],
+          lambda i: (i['InstanceId'], i['State']['Name']), ('terminated',)),
+    blocks=_instance_blocks,
+))
+
+# ==============================================================================
+# NAT GATEWAY / EIP
+# ==============================================================================
+
+def _nat_records(page):
+    return [{'ResourceId': n['NatGatewayId'], 'ResourceType': 'natgateway',
+             'VpcId': n.get('VpcId'), 'SubnetId': n.get('SubnetId'),
+             'AllocationIds': [a['AllocationId'] for a in n.get('NatGatewayAddresses', []) if a.get('AllocationId')]}
+            for n in page['NatGateways']]
+
+def delete_nat_gateway(ctx, r):
+    ctx.issue(r['ResourceId'], lambda: ctx.ec2.delete_nat_gateway(NatGatewayId=r['ResourceId']))
+    ctx.wait_deleted('natgateway', [r['ResourceId']])
+
+def _nat_blocks(r, by_vpc):
+    return ([r.get('SubnetId')] + r.get('AllocationIds', [])
+            + by_vpc[r.get('VpcId')]['internet-gateway'] + [r.get('VpcId')])
+
+register(ResourceType(
+    'natgateway', 'describe_nat_gateways', 'nat-gateway-id', _nat_records, delete_nat_gateway,
+    filter_param='Filter',
+    live_filter=[{'Name': 'state', 'Values': ['pending', 'available', 'deleting', 'failed']}],
+    arn_type='natgateway',
+    operations=lambda r: ['DeleteNatGateway'], estimate=60,
+    wait=(lambda page: page['NatGateways'], lambda n: (n['NatGatewayId'], n['State']), ('deleted',)),
+    blocks=_nat_blocks,
+))
+
+def _address_records(page):
+    return [{'ResourceId': a['AllocationId'], 'ResourceType': 'address'} for a in page['Addresses']]
+
+def release_eip(ctx, r):
+    ctx.issue(r['ResourceId'], lambda: ctx.ec2.release_address(AllocationId=r['ResourceId']))
+
+register(ResourceType(
+    'address', 'describe_addresses', 'allocation-id', _address_records, release_eip,
+    arn_type='elastic-ip', hydrate=False,
+    operations=lambda r: ['ReleaseAddress'],
+))
+
+# ==============================================================================
+# TRANSIT GATEWAY / PEERING
+# ==============================================================================
+
+def _tgw_records(page):
+    return [{'ResourceId': tgw['TransitGatewayId'], 'ResourceType': 'transit-gateway'}
+            for tgw in page['TransitGateways']]
+
+def delete_transit_gateway(ctx, r):
+    ctx.issue(r['ResourceId'], lambda: ctx.ec2.delete_transit_gateway(TransitGatewayId=r['ResourceId']))
+
+register(ResourceType(
+    'transit-gateway', 'describe_transit_gateways', 'transit-gateway-id', _tgw_records, delete_transit_gateway,
+    live_filter=[{'Name': 'state', 'Values': ['pending', 'available', 'modifying']}],
+    arn_type='transit-gateway',
+    operations=lambda r: ['DeleteTransitGateway'], estimate=5,
+))
+
+def _tgw_attachment_records(page):
+    return [{'ResourceId': att['TransitGatewayAttachmentId'], 'ResourceType': 'transit-gateway-attachment',
+             'TransitGatewayId': att['TransitGatewayId'], 'AttachmentType': att['ResourceType'],
+             'VpcId': att['ResourceId'] if att['ResourceType'] == 'vpc' else None}
+            for att in page['TransitGatewayAttachments']]
+
+def delete_transit_gateway_attachment(ctx, r):
+    att_id = r['ResourceId']
+    if r['AttachmentType'] == 'peering':
+        # Un peering entre regiones aparece en los dos TGW: se borra una vez y
+        # cada región espera a verlo 'deleted' antes de borrar su propio TGW
+        if ctx.claims.claim(att_id):
+            ctx.issue(att_id, lambda: ctx.ec2.delete_transit_gateway_peering_attachment(
+                TransitGatewayAttachmentId=att_id))
+    else:
+        ctx.issue(att_id, lambda: ctx.ec2.delete_transit_gateway_vpc_attachment(
+            TransitGatewayAttachmentId=att_id))
+    # El TGW no se puede borrar mientras tenga attachments vivos
+    ctx.wait_deleted('transit-gateway-attachment', [att_id])
+
+def _tgw_attachment_blocks(r, by_vpc):
+    return [r['TransitGatewayId']] + by_vpc[r.get('VpcId')]['subnet'] + [r.get('VpcId')]
+
+# Sin arn_type: se buscan por TGW, el lado aceptador de un peering no lleva tag
+register(ResourceType(
+    'transit-gateway-attachment', 'describe_transit_gateway_attachments', 'transit-gateway-attachment-id',
+    _tgw_attachment_records, delete_transit_gateway_attachment,
+    live_filter=[{'Name': 'state', 'Values': ['pendingAcceptance', 'pending', 'available',
+                                              'modifying', 'rejected', 'failed']}],
+    operations=lambda r: ['DeleteTransitGatewayPeeringAttachment' if r['AttachmentType'] == 'peering'
+                          else 'DeleteTransitGatewayVpcAttachment'],
+    estimate=90,
+    wait=(lambda page: page['TransitGatewayAttachments'],
+          lambda a: (a['TransitGatewayAttachmentId'], a['State']), ('deleted',)),
+    blocks=_tgw_attachment_blocks,
+))
+
+def _peering_records(page):
+    return [{'ResourceId': pcx['VpcPeeringConnectionId'], 'ResourceType': 'vpc-peering-connection',
+             'VpcIds': [pcx['RequesterVpcInfo'].get('VpcId'), pcx['AccepterVpcInfo'].get('VpcId')]}
+            for pcx in page['VpcPeeringConnections'] if pcx['Status']['Code'] not in ('deleted', 'deleting')]
+
+def delete_peering_connection(ctx, r):
+    if ctx.claims.claim(r['ResourceId']):
+        ctx.issue(r['ResourceId'], lambda: ctx.ec2.delete_vpc_peering_connection(
+            VpcPeeringConnectionId=r['ResourceId']))
+    ctx.wait_deleted('vpc-peering-connection', [r['ResourceId']])
+
+register(ResourceType(
+    'vpc-peering-connection', 'describe_vpc_peering_connections', 'vpc-peering-connection-id',
+    _peering_records, delete_peering_connection,
+    arn_type='vpc-peering-connection',
+    operations=lambda r: ['DeleteVpcPeeringConnection'], estimate=10,
+    wait=(lambda page: page['VpcPeeringConnections'],
+          lambda p: (p['VpcPeeringConnectionId'], p['Status']['Code']), ('deleted',)),
+    blocks=lambda r, by_vpc: r.get('VpcIds', []),
+))
+
+# ==============================================================================
+# RED DE LA VPC
+# ==============================================================================
+
+def _in_vpc(r, by_vpc):
+    return [r.get('VpcId')]
+
+def _subnet_records(page):
+    return [{'ResourceId': s['SubnetId'], 'ResourceType': 'subnet', 'VpcId': s['VpcId']}
+            for s in page['Subnets']]
+
+def delete_subnet(ctx, r):
+    # Lambda, ELB o la ENI de una instancia recién terminada aún pueden ocuparla
+    ctx.wait_drained(r['ResourceId'])
+    ctx.issue(r['ResourceId'], lambda: ctx.ec2.delete_subnet(SubnetId=r['ResourceId']))
+
+register(ResourceType(
+    'subnet', 'describe_subnets', 'subnet-id', _subnet_records, delete_subnet,
+    arn_type='subnet', blocks=_in_vpc,
+    operations=lambda r: ['DeleteSubnet'],
+))
+
+def _route_table_records(page):
+    return [{'ResourceId': rtb['RouteTableId'], 'ResourceType': 'route-table', 'VpcId': rtb['VpcId'],
+             'AssociationIds': [a['RouteTableAssociationId'] for a in rtb.get('Associations', [])
+                                if not a.get('Main', False)]}
+            for rtb in page['RouteTables']]
+
+def delete_route_table(ctx, r):
+    # Las asociaciones vienen del inventario, sin describe adicional
+    for assoc_id in r.get('AssociationIds', []):
+        ctx.issue(assoc_id, lambda: ctx.ec2.disassociate_route_table(AssociationId=assoc_id))
+    ctx.issue(r['ResourceId'], lambda: ctx.ec2.delete_route_table(RouteTableId=r['ResourceId']))
+
+register(ResourceType(
+    'route-table', 'describe_route_tables', 'route-table-id', _route_table_records, delete_route_table,
+    arn_type='route-table', blocks=_in_vpc,
+    operations=lambda r: ['DisassociateRouteTable'] * len(r.get('AssociationIds', [])) + ['DeleteRouteTable'],
+))
+
+def _security_group_records(page):
+    return [{'ResourceId': sg['GroupId'], 'ResourceType': 'security-group', 'VpcId': sg.get('VpcId')}
+            for sg in page['SecurityGroups'] if sg['GroupName'] != 'default']
+
+def delete_security_group(ctx, r):
+    ctx.wait_drained(r['ResourceId'])
+    ctx.issue(r['ResourceId'], lambda: ctx.ec2.delete_security_group(GroupId=r['ResourceId']))
+
+register(ResourceType(
+    'security-group', 'describe_security_groups', 'group-id', _security_group_records, delete_security_group,
+    arn_type='security-group', blocks=_in_vpc,
+    operations=lambda r: ['DeleteSecurityGroup'],
+))
+
+def _igw_records(page):
+    return [{'ResourceId': igw['InternetGatewayId'], 'ResourceType': 'internet-gateway',
+             'VpcIds': [att['VpcId'] for att in igw.get('Attachments', [])]}
+            for igw in page['InternetGateways']]
+
+def delete_igw(ctx, r):
+    for vpc_id in r.get('VpcIds', []):
+        ctx.issue(f"{r['ResourceId']}/{vpc_id}", lambda: ctx.ec2.detach_internet_gateway(
+            InternetGatewayId=r['ResourceId'], VpcId=vpc_id))
+    ctx.issue(r['ResourceId'], lambda: ctx.ec2.delete_internet_gateway(InternetGatewayId=r['ResourceId']))
+
+register(ResourceType(
+    'internet-gateway', 'describe_internet_gateways', 'internet-gateway-id', _igw_records, delete_igw,
+    arn_type='internet-gateway', blocks=lambda r, by_vpc: r.get('VpcIds', []),
+    operations=lambda r: ['DetachInternetGateway'] * len(r.get('VpcIds', [])) + ['DeleteInternetGateway'],
+))
+
+def _vpc_records(page):
+    return [{'ResourceId': vpc['VpcId'], 'ResourceType': 'vpc'} for vpc in page['Vpcs']]
+
+def delete_vpc(ctx, r):
+    ctx.issue(r['ResourceId'], lambda: ctx.ec2.delete_vpc(VpcId=r['ResourceId']))
+
+register(ResourceType(
+    'vpc', 'describe_vpcs', 'vpc-id', _vpc_records, delete_vpc,
+    arn_type='vpc', hydrate=False,
+    operations=lambda r: ['DeleteVpc'],
+))
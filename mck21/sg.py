@@ -0,0 +1,93 @@
+"""
+Reglas de entrada de Security Groups como conjuntos: cada IpPermissions se
+descompone en reglas canónicas (protocolo, puertos, tipo de origen, origen) y la
+diferencia con las reglas vivas se aplica con un authorize y un revoke por grupo,
+tenga el grupo 3 reglas o 300.
+"""
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import MAX_WORKERS
+
+Rule = namedtuple('Rule', 'protocol from_port to_port kind source')
+
+PROTOCOLS = {'6': 'tcp', '17': 'udp', '1': 'icmp', '58': 'icmpv6', 'all': '-1'}
+
+# Tipo de origen -> (clave de la lista en IpPermissions, clave del valor)
+SOURCES = {
+    'cidr': ('IpRanges', 'CidrIp'),
+    'cidr6': ('Ipv6Ranges', 'CidrIpv6'),
+    'group': ('UserIdGroupPairs', 'GroupId'),
+    'prefix': ('PrefixListIds', 'PrefixListId'),
+}
+
+def protocol(value):
+    value = str(value).lower()
+    return PROTOCOLS.get(value, value)
+
+def rule_set(permissions):
+    """IpPermissions (de describe o declaradas) -> {Rule: descripción}"""
+    rules = {}
+    for perm in permissions:
+        proto = protocol(perm['IpProtocol'])
+        # Con todos los protocolos los puertos no cuentan
+        ports = (None, None) if proto == '-1' else (perm.get('FromPort'), perm.get('ToPort'))
+        for kind, (list_key, value_key) in SOURCES.items():
+            for source in perm.get(list_key, []):
+                rules[Rule(proto, *ports, kind, source[value_key])] = source.get('Description')
+    return rules
+
+def permissions(rules):
+    """{Rule: descripción} (o un conjunto de Rule) -> IpPermissions, una por
+    protocolo y rango de puertos con todos sus orígenes"""
+    descriptions = rules if isinstance(rules, dict) else dict.fromkeys(rules)
+    grouped = {}
+    for rule in sorted(descriptions, key=lambda r: tuple(str(v) for v in r)):
+        perm = grouped.get((rule.protocol, rule.from_port, rule.to_port))
+        if perm is None:
+            perm = {'IpProtocol': rule.protocol}
+            if rule.protocol != '-1':
+                perm.update(FromPort=rule.from_port, ToPort=rule.to_port)
+            grouped[(rule.protocol, rule.from_port, rule.to_port)] = perm
+        list_key, value_key = SOURCES[rule.kind]
+        source = {value_key: rule.source}
+        if descriptions[rule]:
+            source['Description'] = descriptions[rule]
+        perm.setdefault(list_key, []).append(source)
+    return list(grouped.values())
+
+def diff(current, desired):
+    """(reglas que faltan, reglas que sobran) entre dos listas de IpPermissions.
+    La descripción no forma parte de la regla (AWS tampoco la usa para compararlas)"""
+    current, desired = rule_set(current), rule_set(desired)
+    missing = {rule: desc for rule, desc in desired.items() if rule not in current}
+    extra = {rule: desc for rule, desc in current.items() if rule not in desired}
+    return missing, extra
+
+def reconcile(ec2, group_id, desired, current=None):
+    """Deja las reglas de entrada del grupo en 'desired' (IpPermissions): a lo sumo
+    un describe (si no se pasa current), un authorize y un revoke.
+    Devuelve (añadidas, quitadas) como {Rule: descripción}"""
+    if current is None:
+        current = ec2.describe_security_groups(GroupIds=[group_id])['SecurityGroups'][0]['IpPermissions']
+    missing, extra = diff(current, desired)
+    if missing:
+        ec2.authorize_security_group_ingress(GroupId=group_id, IpPermissions=permissions(missing))
+    if extra:
+        ec2.revoke_security_group_ingress(GroupId=group_id, IpPermissions=permissions(extra))
+    return missing, extra
+
+def reconcile_all(ec2, groups, current=None, max_workers=MAX_WORKERS):
+    """reconcile() de varios grupos a la vez. groups: {group_id: IpPermissions deseadas};
+    current: {group_id: IpPermissions vivas} (los que falten se leen en un único describe)"""
+    current = dict(current or {})
+    unknown = [gid for gid in groups if gid not in current]
+    if unknown:
+        for group in ec2.describe_security_groups(GroupIds=unknown)['SecurityGroups']:
+            current[group['GroupId']] = group['IpPermissions']
+    if not groups:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(groups))) as pool:
+        futures = {gid: pool.submit(reconcile, ec2, gid, desired, current[gid]) for gid, desired in groups.items()}
+    return {gid: future.result() for gid, future in futures.items()}
@@ -0,0 +1,108 @@
+"""
+Foto de una VPC para las comprobaciones de existencia de los scripts de creación:
+subnets, tablas de ruteo, NACLs, SG, IGW, NAT, instancias y EIPs se leen una sola
+vez (un describe paginado por tipo, todos a la vez) y se indexan por el tag Name.
+Una VPC que aún no existe no cuesta más que el describe de la propia VPC.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+from .common import TAG_KEY, TAG_VALUE
+
+# Tipo -> (describe, clave de la lista, clave del ID, parámetro de filtros,
+#          filtro de la VPC, filtros de estado)
+KINDS = {
+    'subnet': ('describe_subnets', 'Subnets', 'SubnetId', 'Filters', 'vpc-id', []),
+    'route-table': ('describe_route_tables', 'RouteTables', 'RouteTableId', 'Filters', 'vpc-id', []),
+    'network-acl': ('describe_network_acls', 'NetworkAcls', 'NetworkAclId', 'Filters', 'vpc-id', []),
+    'security-group': ('describe_security_groups', 'SecurityGroups', 'GroupId', 'Filters', 'vpc-id', []),
+    'internet-gateway': ('describe_internet_gateways', 'InternetGateways', 'InternetGatewayId', 'Filters',
+                         'attachment.vpc-id', []),
+    'natgateway': ('describe_nat_gateways', 'NatGateways', 'NatGatewayId', 'Filter', 'vpc-id',
+                   [{'Name': 'state', 'Values': ['pending', 'available']}]),
+    'instance': ('describe_instances', 'Reservations', 'InstanceId', 'Filters', 'vpc-id',
+                 [{'Name': 'instance-state-name', 'Values': ['pending', 'running', 'stopping', 'stopped']}]),
+}
+
+def name_of(item):
+    tags = {t['Key']: t['Value'] for t in item.get('Tags', [])}
+    return tags.get('Name')
+
+class VpcSnapshot:
+    """Recursos de una VPC por tipo y Name. find() no llama a AWS"""
+
+    def __init__(self, vpc=None):
+        self.vpc = vpc                  # elemento de describe_vpcs (None si no existe)
+        self.items = {kind: {} for kind in list(KINDS) + ['address']}     # tipo -> {Name: elemento}
+        self.lists = {kind: [] for kind in self.items}                  # tipo -> todos, con o sin Name
+        self.calls = 0                  # describes usados para cargarla
+
+    @property
+    def vpc_id(self):
+        return self.vpc['VpcId'] if self.vpc else None
+
+    @classmethod
+    def load(cls, ec2, vpc_name):
+        """Busca la VPC por Name (y el tag mck21) y, si existe, carga todos sus recursos"""
+        response = ec2.describe_vpcs(Filters=[{'Name': 'tag:Name', 'Values': [vpc_name]},
+                                              {'Name': f'tag:{TAG_KEY}', 'Values': [TAG_VALUE]}])
+        snapshot = cls(response['Vpcs'][0] if response['Vpcs'] else None)
+        snapshot.calls = 1
+        if snapshot.vpc:
+            snapshot.refresh(ec2)
+        return snapshot
+
+    def refresh(self, ec2):
+        """Vuelve a leer todos los tipos a la vez (la VPC ya tiene que existir)"""
+        kinds = list(KINDS) + ['address']
+        with ThreadPoolExecutor(max_workers=len(kinds)) as pool:
+            loaded = dict(zip(kinds, pool.map(lambda kind: self._describe(ec2, kind), kinds)))
+        for kind, (items, calls) in loaded.items():
+            self.calls += calls
+            self.items[kind], self.lists[kind] = {}, []
+            for item in items:
+                self.add(kind, item)
+
+    def _describe(self, ec2, kind):
+        """(elementos, llamadas) de un tipo"""
+        if kind == 'address':
+            # Las EIPs no son de ninguna VPC: solo las del tag, y describe_addresses no pagina
+            response = ec2.describe_addresses(Filters=[{'Name': f'tag:{TAG_KEY}', 'Values': [TAG_VALUE]}])
+            return response['Addresses'], 1
+        describe, key, _, filter_param, vpc_filter, states = KINDS[kind]
+        filters = [{'Name': vpc_filter, 'Values': [self.vpc_id]}] + states
+        items, calls = [], 0
+        for page in ec2.get_paginator(describe).paginate(**{filter_param: filters}):
+            calls += 1
+            if kind == 'instance':
+                items.extend(i for res in page[key] for i in res['Instances'])
+            else:
+                items.extend(page[key])
+        return items, calls
+
+    def add(self, kind, item):
+        """Indexa un elemento (también los recién creados) por su Name; los SG
+        sin tag Name por su GroupName. El SG 'default' no cuenta"""
+        if kind == 'security-group':
+            if item.get('GroupName') == 'default':
+                return
+            name = name_of(item) or item.get('GroupName')
+        else:
+            name = name_of(item)
+        self.lists[kind].append(item)
+        if name:
+            self.items[kind].setdefault(name, item)
+
+    def get(self, kind, name):
+        """Elemento del describe con ese Name, o None"""
+        return self.items[kind].get(name)
+
+    def find(self, kind, name):
+        """ID del recurso con ese Name, o None"""
+        item = self.get(kind, name)
+        if item is None:
+            return None
+        return item['AllocationId'] if kind == 'address' else item[KINDS[kind][2]]
+
+    def all(self, kind):
+        return list(self.lists[kind])
@@ -0,0 +1,297 @@
+"""
+Motor de borrado: grafo de dependencias a partir del inventario y recorrido en
+paralelo del DAG, con reintentos para los borrados bloqueados.
+"""
+
+import heapq
+import queue
+import re
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from botocore.exceptions import ClientError
+
+from . import common, registry
+from .common import Colors, MAX_WORKERS, THROTTLING_ERRORS, print_color, retry_delay
+from .waiters import EniTracker, make_waiter
+
+# ==============================================================================
+# GRAFO DE DEPENDENCIAS
+# ==============================================================================
+
+def build_dependency_graph(resources):
+    """Devuelve {ResourceId: set(ResourceIds que deben borrarse antes)} a partir de
+    los 'blocks' de cada tipo registrado"""
+    blockers = {r['ResourceId']: set() for r in resources}
+    by_vpc = defaultdict(lambda: defaultdict(list))
+    for r in resources:
+        for vpc_id in ([r.get('VpcId')] + r.get('VpcIds', [])):
+            if vpc_id:
+                by_vpc[vpc_id][r['ResourceType']].append(r['ResourceId'])
+
+    for r in resources:
+        rid = r['ResourceId']
+        for after in registry.get(r['ResourceType']).blocks(r, by_vpc):
+            # Solo se enlazan recursos que están en el inventario
+            if after in blockers and after != rid:
+                blockers[after].add(rid)
+    return blockers
+
+# ==============================================================================
+# CONTEXTO DE BORRADO
+# ==============================================================================
+
+# Clasificación de errores de borrado
+DEPENDENCY = 'dependency'       # algo sigue usando el recurso: se reintenta tras sus bloqueantes
+THROTTLING = 'throttling'       # demasiadas llamadas: se reintenta con backoff
+NOT_FOUND = 'not-found'         # ya no existe: el borrado se da por hecho
+
+DEPENDENCY_ERRORS = {'DependencyViolation', 'IncorrectState', 'IncorrectInstanceState',
+                     'InvalidNetworkInterface.InUse', 'ResourceInUse'}
+NOT_FOUND_ERRORS = {'Gateway.NotAttached'}
+
+# IDs que AWS nombra en los mensajes ("resource sg-... has a dependent object")
+RESOURCE_ID = re.compile(r"\b(?:i|eni|nat|sg|subnet|vpc|igw|rtb|eipalloc|tgw-attach|tgw|pcx)-[0-9a-f]{8,17}\b")
+
+def classify_error(error):
+    """DEPENDENCY, THROTTLING, NOT_FOUND o None (error definitivo)"""
+    if not isinstance(error, ClientError):
+        return None
+    code = error.response.get('Error', {}).get('Code', '')
+    if code in THROTTLING_ERRORS:
+        return THROTTLING
+    if code in DEPENDENCY_ERRORS:
+        return DEPENDENCY
+    if code.endswith('NotFound') or code in NOT_FOUND_ERRORS:
+        return NOT_FOUND
+    return None
+
+def named_resources(error):
+    """IDs de recursos citados en el mensaje de error"""
+    return set(RESOURCE_ID.findall(error.response.get('Error', {}).get('Message', '')))
+
+class SharedClaims:
+    """Recursos visibles desde varias regiones (TGW peering attachments, VPC peering):
+    solo la primera región que los reclama lanza el borrado, las demás solo esperan"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.ids = set()
+
+    def claim(self, rid):
+        with self.lock:
+            if rid in self.ids:
+                return False
+            self.ids.add(rid)
+            return True
+
+class TeardownContext:
+    """Estado compartido por los borrados de una región: cliente, esperas por tipo y diario"""
+
+    def __init__(self, ec2, claims=None, journal=None, region=None, vpc_ids=(), instance_ids=(), owner_ids=()):
+        self.ec2 = ec2
+        self.claims = claims or SharedClaims()
+        self.journal = journal
+        self.region = region or ec2.meta.region_name
+        self.waiters = {rtype: make_waiter(ec2, rtype) for rtype in registry.waitable()}
+        self.enis = EniTracker(ec2, vpc_ids, instance_ids, owner_ids)
+        self.issued = set()     # lanzados en esta ejecución (p.ej. por lotes)
+
+    def _issued(self, key):
+        return key in self.issued or (self.journal and key in self.journal.issued(self.region))
+
+    def _mark(self, key):
+        self.issued.add(key)
+        if self.journal:
+            self.journal.record('issued', self.region, id=key)
+
+    def issue(self, key, call):
+        """Lanza una llamada de borrado una sola vez: si ya se lanzó (por lotes o en una
+        ejecución anterior interrumpida) no se repite y solo queda esperar"""
+        if self._issued(key):
+            return
+        try:
+            call()
+        except ClientError as e:
+            # Ya borrado/desasociado (otra ejecución, otra región o la consola)
+            if classify_error(e) != NOT_FOUND:
+                raise
+        self._mark(key)
+
+    def issue_batch(self, keys, call):
+        """call(ids) para lotes de BATCH_CHUNK IDs, todos a la vez. Si un lote falla
+        (un ID que ya no existe invalida la llamada entera, throttling...) sus IDs
+        quedan sin lanzar y cada worker los lanza por separado con sus reintentos"""
+        keys = [key for key in keys if not self._issued(key)]
+        chunks = [keys[i:i + common.BATCH_CHUNK] for i in range(0, len(keys), common.BATCH_CHUNK)]
+
+        def launch(chunk):
+            try:
+                call(chunk)
+            except ClientError as e:
+                print_color(Colors.YELLOW, f"  Lote de {len(chunk)} sin lanzar ({classify_error(e) or e}): "
+                                           f"se lanzan uno a uno")
+                return
+            for key in chunk:
+                self._mark(key)
+
+        if chunks:
+            with ThreadPoolExecutor(max_workers=min(len(chunks), common.MAX_WORKERS)) as pool:
+                list(pool.map(launch, chunks))
+
+    def wait_drained(self, rid):
+        late = self.enis.wait_drained(rid)
+        if late:
+            print_color(Colors.YELLOW, f"  {rid} sigue con ENIs tras {self.enis.timeout}s: {', '.join(late)}")
+
+    def wait_deleted(self, rtype, ids):
+        late = self.waiters[rtype].wait(ids)
+        if late:
+            raise TimeoutError(f"{rtype} sin borrar tras {self.waiters[rtype].timeout}s: {', '.join(late)}")
+
+# ==============================================================================
+# MOTOR DE BORRADO EN PARALELO
+# ==============================================================================
+
+SKIPPED = object()      # marca de recurso confirmado en una ejecución anterior
+
+def run_teardown(ec2, resources, max_workers=MAX_WORKERS, claims=None, label='', journal=None, region=None):
+    """Recorre el DAG: lanza cada recurso en cuanto sus bloqueantes han terminado.
+    Un borrado bloqueado (dependencia o throttling) se reintenta durante RETRY_TIMEOUT:
+    detrás de los recursos del inventario que cite el error o, si no cita ninguno
+    (p.ej. una ENI que aún se desasocia), con backoff. Con diario, lo ya confirmado
+    en una ejecución anterior se da por hecho.
+    Devuelve un resumen {'deleted', 'skipped', 'failed', 'retries', 'elapsed', 'durations'}"""
+    nodes = {r['ResourceId']: r for r in resources}
+    blockers = build_dependency_graph(resources)
+    dependents = defaultdict(set)
+    for rid, deps in blockers.items():
+        for dep in deps:
+            dependents[dep].add(rid)
+    pending = {rid: len(deps) for rid, deps in blockers.items()}
+
+    # Las ENIs solo importan si hay subnets o SG que borrar
+    vpc_ids = {r['VpcId'] for r in resources
+               if r['ResourceType'] in ('subnet', 'security-group') and r.get('VpcId')}
+    instance_ids = [r['ResourceId'] for r in resources if r['ResourceType'] == 'instance']
+    owner_ids = [r['ResourceId'] for r in resources]
+    ctx = TeardownContext(ec2, claims, journal, region, vpc_ids, instance_ids, owner_ids)
+    done = journal.confirmed(ctx.region) & set(nodes) if journal else set()
+    finished = queue.Queue()
+    retries = []                # heap (instante, id) de reintentos con backoff
+    attempts = defaultdict(int)
+    first_error = {}
+    resolved = set()
+    durations = {}              # id -> segundos de su borrado (incluida la espera), para el historial
+    summary = {'deleted': 0, 'skipped': 0, 'failed': 0, 'retries': 0, 'elapsed': 0.0}
+    start = time.time()
+
+    def worker(rid):
+        r = nodes[rid]
+        started = time.time()
+        try:
+            registry.get(r['ResourceType']).delete(ctx, r)
+            durations[rid] = time.time() - started
+            if journal:
+                journal.record('confirmed', ctx.region, id=rid)
+            finished.put((rid, None))
+        except Exception as e:
+            finished.put((rid, e))
+
+    def downstream(rid):
+        """Recursos que esperan (directa o indirectamente) a rid"""
+        seen, stack = set(), [rid]
+        while stack:
+            for dep in dependents[stack.pop()]:
+                if dep not in seen:
+                    seen.add(dep)
+                    stack.append(dep)
+        return seen
+
+    def retry(rid, error):
+        """Reprograma un borrado bloqueado; False si ya no merece la pena"""
+        kind = classify_error(error)
+        now = time.time()
+        first_error.setdefault(rid, now)
+        if kind not in (DEPENDENCY, THROTTLING) or now - first_error[rid] >= common.RETRY_TIMEOUT:
+            return False
+        attempts[rid] += 1
+        summary['retries'] += 1
+        rtype = nodes[rid]['ResourceType']
+        if kind == DEPENDENCY:
+            # Detrás de lo que cite el error, si está en el inventario y no es un dependiente
+            named = (named_resources(error) & set(nodes)) - resolved - downstream(rid) - {rid}
+            if named:
+                pending[rid] = len(named)
+                for blocker in named:
+                    dependents[blocker].add(rid)
+                print_color(Colors.YELLOW, f"  {label}↻ {rtype} {rid} espera a {', '.join(sorted(named))}")
+                return True
+        delay = retry_delay(attempts[rid])
+        heapq.heappush(retries, (now + delay, rid))
+        print_color(Colors.YELLOW, f"  {label}↻ {rtype} {rid} ({kind}) reintento en {delay:.1f}s")
+        return True
+
+    # Los tipos con borrado por lotes lanzan de una vez todo lo que no espera a nadie;
+    # después cada worker solo espera a su recurso y lo suelta en cuanto termina
+    ready = defaultdict(list)
+    for rid, count in pending.items():
+        if count == 0 and rid not in done:
+            ready[nodes[rid]['ResourceType']].append(nodes[rid])
+    for rtype, records in ready.items():
+        if registry.get(rtype).delete_batch:
+            registry.get(rtype).delete_batch(ctx, records)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        running = 0
+        for rid, count in pending.items():
+            if rid in done:
+                finished.put((rid, SKIPPED))
+                running += 1
+            elif count == 0:
+                pool.submit(worker, rid)
+                running += 1
+
+        remaining = len(nodes)
+        while remaining:
+            while retries and retries[0][0] <= time.time():
+                pool.submit(worker, heapq.heappop(retries)[1])
+                running += 1
+            if not running and not retries:
+                # Solo con ciclos: el grafo se construye por capas y los reintentos no crean ciclos
+                print_color(Colors.RED, f"{label}Dependencias circulares: {remaining} recursos sin procesar")
+                summary['failed'] += remaining
+                break
+
+            try:
+                rid, error = finished.get(timeout=max(retries[0][0] - time.time(), 0) if retries else None)
+            except queue.Empty:
+                continue
+            running -= 1
+            rtype = nodes[rid]['ResourceType']
+            if error is SKIPPED:
+                summary['skipped'] += 1
+            elif error is None:
+                summary['deleted'] += 1
+                print_color(Colors.GREEN, f"  {label}✓ {rtype} {rid}")
+            elif retry(rid, error):
+                continue
+            else:
+                # Un fallo definitivo no bloquea a sus dependientes: se intentan igualmente
+                summary['failed'] += 1
+                print_color(Colors.RED, f"  {label}✗ {rtype} {rid}: {error}")
+
+            remaining -= 1
+            resolved.add(rid)
+            for dep in dependents[rid]:
+                pending[dep] -= 1
+                if pending[dep] == 0 and dep not in done:
+                    pool.submit(worker, dep)
+                    running += 1
+
+    summary['elapsed'] = time.time() - start
+    summary['durations'] = defaultdict(list)
+    for rid, seconds in durations.items():
+        summary['durations'][nodes[rid]['ResourceType']].append(seconds)
+    return summary
@@ -0,0 +1,444 @@
+"""
+Topología declarativa para los scripts de creación: la VPC, sus subredes, IGW,
+NAT, tablas de ruteo, NACLs, Security Groups e instancias se describen con
+dataclasses y Plan las compara con la foto de la VPC (snapshot.py).
+
+    plan = Plan(TOPOLOGY, VpcSnapshot.load(ec2, TOPOLOGY.vpc))
+    plan.show()                 # + crear, ~ modificar, - borrar
+    run = plan.apply(ec2)       # solo esas llamadas, en paralelo (provision.py)
+
+Las reglas usan el formato de los scripts:
+    NACL: {'RuleNumber', 'Protocol', 'RuleAction', 'CidrBlock', 'PortRange'?}
+    SG:   {'Protocol', 'FromPort', 'ToPort', 'CidrBlock' | 'SourceGroup': nombre, 'Description'?}
+Instance.ami es un ID ('ami-...') o un patrón de ami.py (AMAZON_LINUX_2...),
+que se resuelve al lanzar la instancia. Con Instance.count > 1 todas llevan el
+mismo Name, se lanzan las que falten en un run_instances y su resultado es la
+lista de IDs.
+Las claves de los resultados son '<tipo>:<Name>' ('vpc', 'igw' sin nombre).
+Los recursos que sobran en la VPC no se borran (eso es cosa de python -m mck21);
+sí las rutas, entradas de NACL, reglas de SG y asociaciones que sobran.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from .common import Colors, MAX_WORKERS, TAG_KEY, TAG_VALUE, print_color
+from . import ami, fleet, sg
+from .nacl import AssociationIndex, apply_entries, describe_changes, diff_entries
+from .provision import Step, run_steps
+from .readiness import igw_attached, nat_available, require_ready, route_active
+from .snapshot import name_of
+
+@dataclass
+class Subnet:
+    name: str
+    cidr: str
+    az: str
+    public: bool = False        # auto-asigna IP pública
+
+@dataclass
+class NatGateway:
+    name: str
+    subnet: str                 # Name de la subred pública
+    eip: str                    # Name de la Elastic IP
+
+@dataclass
+class RouteTable:
+    name: str
+    subnets: List[str]
+    routes: Dict[str, str] = field(default_factory=dict)   # destino -> 'igw' o Name del NAT
+
+@dataclass
+class NetworkAcl:
+    name: str
+    subnets: List[str]
+    ingress: List[dict] = field(default_factory=list)
+    egress: List[dict] = field(default_factory=list)
+
+@dataclass
+class SecurityGroup:
+    name: str
+    description: str
+    ingress: List[dict] = field(default_factory=list)
+
+@dataclass
+class Instance:
+    name: str
+    subnet: str
+    security_groups: List[str]
+    ami: str
+    public: bool = False
+    instance_type: str = 't2.micro'
+    key_name: str = 'vockey'
+    count: int = 1
+
+@dataclass
+class Topology:
+    vpc: str                    # Name de la VPC
+    cidr: str
+    subnets: List[Subnet] = field(default_factory=list)
+    igw: Optional[str] = None   # Name del IGW (None = sin IGW)
+    nats: List[NatGateway] = field(default_factory=list)
+    route_tables: List[RouteTable] = field(default_factory=list)
+    network_acls: List[NetworkAcl] = field(default_factory=list)
+    security_groups: List[SecurityGroup] = field(default_factory=list)
+    instances: List[Instance] = field(default_factory=list)
+
+def tag_spec(resource_type, name):
+    return [{'ResourceType': resource_type, 'Tags': [{'Key': TAG_KEY, 'Value': TAG_VALUE},
+                                                      {'Key': 'Name', 'Value': name}]}]
+
+# ==============================================================================
+# Reglas declaradas -> IpPermissions
+# ==============================================================================
+
+def sg_permission(rule, group_id):
+    """Regla de SG de la topología -> IpPermissions; group_id(nombre) resuelve SourceGroup"""
+    perm = {'IpProtocol': rule['Protocol'], 'FromPort': rule.get('FromPort'), 'ToPort': rule.get('ToPort')}
+    source = {'CidrIp': rule['CidrBlock']} if 'CidrBlock' in rule else {'GroupId': group_id(rule['SourceGroup'])}
+    if rule.get('Description'):
+        source['Description'] = rule['Description']
+    perm['IpRanges' if 'CidrBlock' in rule else 'UserIdGroupPairs'] = [source]
+    return perm
+
+def route_target(route):
+    return route.get('GatewayId') or route.get('NatGatewayId')
+
+# ==============================================================================
+# Plan
+# ==============================================================================
+
+class Action(Step):
+    """Paso del plan: op es 'create', 'modify' o 'delete'; calls las llamadas de
+    cambio que hará (sin contar las consultas de espera)"""
+
+    SYMBOLS = {'create': '+', 'modify': '~', 'delete': '-'}
+
+    def __init__(self, name, fn, after=(), ready=None, op='create', summary='', calls=1):
+        super().__init__(name, fn, after, ready)
+        self.op = op
+        self.summary = summary
+        self.calls = calls
+
+class Plan:
+    """Diferencias entre una Topology y la foto de su VPC, como pasos con dependencias"""
+
+    def __init__(self, topology, snapshot):
+        self.topology = topology
+        self.snapshot = snapshot
+        self.known = {}         # clave -> ID de lo que ya existe
+        self.actions = []
+        self.warnings = []
+        self.nacl_index = AssociationIndex(snapshot.all('network-acl'))
+        self.waiter = None      # espera compartida de las instancias (al aplicar)
+        self.ssm = None         # cliente SSM de resolve_ami, creado en el hilo principal (al aplicar)
+        self._build()
+
+    # --- construcción ---
+    def _add(self, name, op, summary, fn, after=(), ready=None, calls=1):
+        deps = [key for key in after if key not in self.known]
+        self.actions.append(Action(name, fn, deps, ready, op, summary, calls))
+
+    def _id(self, kind, name):
+        """Registra el ID existente de un recurso y devuelve su clave"""
+        key = f'{kind}:{name}'
+        rid = self.snapshot.find(kind, name)
+        if rid:
+            self.known[key] = rid
+        return key
+
+    def _build(self):
+        topo = self.topology
+        if self.snapshot.vpc:
+            self.known['vpc'] = self.snapshot.vpc_id
+        else:
+            self._add('vpc', 'create', f"VPC {topo.vpc} ({topo.cidr})", self._create_vpc, calls=3)
+        for subnet in topo.subnets:
+            self._plan_subnet(subnet)
+        if topo.igw:
+            self._plan_igw()
+        for nat in topo.nats:
+            self._plan_nat(nat)
+        for table in topo.route_tables:
+            self._plan_route_table(table)
+        for acl in topo.network_acls:
+            self._plan_network_acl(acl)
+        for group in topo.security_groups:
+            self._id('security-group', group.name)
+        for group in topo.security_groups:
+            self._plan_security_group(group)
+        for instance in topo.instances:
+            self._plan_instance(instance)
+        # Las dependencias son acciones del plan; las claves de recursos que ni
+        # existen ni se crean son errores de la topología
+        names = {action.name for action in self.actions}
+        for action in self.actions:
+            unknown = [dep for dep in action.after if '/' not in dep and dep not in names]
+            if unknown:
+                raise ValueError(f"{action.name} usa recursos que no están en la topología: {', '.join(unknown)}")
+            action.after = [dep for dep in action.after if dep in names]
+
+    def _create_vpc(self, ec2, r):
+        vpc = ec2.create_vpc(CidrBlock=self.topology.cidr, TagSpecifications=tag_spec('vpc', self.topology.vpc))
+        vpc_id = vpc['Vpc']['VpcId']
+        ec2.modify_vpc_attribute(VpcId=vpc_id, EnableDnsHostnames={'Value': True})
+        ec2.modify_vpc_attribute(VpcId=vpc_id, EnableDnsSupport={'Value': True})
+        return vpc_id
+
+    def _plan_subnet(self, subnet):
+        key = self._id('subnet', subnet.name)
+        item = self.snapshot.get('subnet', subnet.name)
+        if item is None:
+            def create(ec2, r):
+                response = ec2.create_subnet(VpcId=r['vpc'], CidrBlock=subnet.cidr, AvailabilityZone=subnet.az,
+                                             TagSpecifications=tag_spec('subnet', subnet.name))
+                subnet_id = response['Subnet']['SubnetId']
+                if subnet.public:
+                    ec2.modify_subnet_attribute(SubnetId=subnet_id, MapPublicIpOnLaunch={'Value': True})
+                return subnet_id
+            self._add(key, 'create', f"subred {subnet.name} ({subnet.cidr} - {subnet.az})", create, ['vpc'],
+                      calls=2 if subnet.public else 1)
+            return
+        if item['CidrBlock'] != subnet.cidr or item.get('AvailabilityZone', subnet.az) != subnet.az:
+            self.warnings.append(f"{subnet.name}: el CIDR/AZ de una subred no se puede cambiar "
+                                 f"({item['CidrBlock']} existente)")
+        if item.get('MapPublicIpOnLaunch', False) != subnet.public:
+            def modify(ec2, r):
+                ec2.modify_subnet_attribute(SubnetId=r[key], MapPublicIpOnLaunch={'Value': subnet.public})
+            self._add(f'{key}/public-ip', 'modify', f"subred {subnet.name}: IP pública automática "
+                      f"{'sí' if subnet.public else 'no'}", modify)
+
+    def _plan_igw(self):
+        attached = self.snapshot.all('internet-gateway')
+        if attached:
+            self.known['igw'] = attached[0]['InternetGatewayId']
+            return
+        name = self.topology.igw
+
+        def create(ec2, r):
+            igw = ec2.create_internet_gateway(TagSpecifications=tag_spec('internet-gateway', name))
+            igw_id = igw['InternetGateway']['InternetGatewayId']
+            ec2.attach_internet_gateway(VpcId=r['vpc'], InternetGatewayId=igw_id)
+            return igw_id
+        self._add('igw', 'create', f"Internet Gateway {name}", create, ['vpc'], calls=2)
+
+    def _plan_nat(self, nat):
+        key, eip_key = f'natgateway:{nat.name}', f'address:{nat.eip}'
+        item = self.snapshot.get('natgateway', nat.name)
+        if item:
+            self.known[key] = item['NatGatewayId']
+            self.known[eip_key] = item['NatGatewayAddresses'][0]['AllocationId']
+            return
+        eip = self.snapshot.get('address', nat.eip)
+        if eip and not eip.get('AssociationId'):
+            self.known[eip_key] = eip['AllocationId']
+        else:
+            def allocate(ec2, r):
+                return ec2.allocate_address(Domain='vpc', TagSpecifications=tag_spec('elastic-ip', nat.eip))['AllocationId']
+            self._add(eip_key, 'create', f"Elastic IP {nat.eip}", allocate)
+        subnet_key = f'subnet:{nat.subnet}'
+
+        def create(ec2, r):
+            response = ec2.create_nat_gateway(SubnetId=r[subnet_key], AllocationId=r[eip_key],
+                                              TagSpecifications=tag_spec('natgateway', nat.name))
+            nat_id = response['NatGateway']['NatGatewayId']
+            # Solo esperan al NAT las rutas que lo usan
+            require_ready(ec2, [nat_available(nat_id)])
+            return nat_id
+        self._add(key, 'create', f"NAT Gateway {nat.name} en {nat.subnet}", create, [subnet_key, eip_key])
+
+    def _target_key(self, target):
+        return 'igw' if target == 'igw' else f'natgateway:{target}'
+
+    def _plan_route_table(self, table):
+        key = self._id('route-table', table.name)
+        item = self.snapshot.get('route-table', table.name)
+        if item is None:
+            def create(ec2, r):
+                response = ec2.create_route_table(VpcId=r['vpc'], TagSpecifications=tag_spec('route-table', table.name))
+                return response['RouteTable']['RouteTableId']
+            self._add(key, 'create', f"tabla de ruteo {table.name}", create, ['vpc'])
+        current = {route['DestinationCidrBlock']: route for route in (item or {}).get('Routes', [])
+                   if route.get('GatewayId') != 'local' and 'DestinationCidrBlock' in route
+                   and route.get('Origin') != 'EnableVgwRoutePropagation'}
+        for dest, target in table.routes.items():
+            target_key = self._target_key(target)
+            route = current.pop(dest, None)
+            if route and target_key in self.known and route_target(route) == self.known[target_key]:
+                continue
+            self._plan_route(key, table.name, dest, target, 'modify' if route else 'create')
+        for dest, route in current.items():
+            def delete(ec2, r, dest=dest):
+                ec2.delete_route(RouteTableId=r[key], DestinationCidrBlock=dest)
+            self._add(f'{key}/route:{dest}', 'delete', f"{table.name}: ruta {dest} -> {route_target(route)}",
+                      delete)
+        self._plan_associations(key, table, item)
+
+    def _plan_route(self, key, name, dest, target, op):
+        target_key = self._target_key(target)
+
+        def apply(ec2, r):
+            target = r[target_key]
+            param = 'GatewayId' if target.startswith('igw-') else 'NatGatewayId'
+            call = ec2.create_route if op == 'create' else ec2.replace_route
+            call(RouteTableId=r[key], DestinationCidrBlock=dest, **{param: target})
+        self._add(f'{key}/route:{dest}', op, f"{name}: ruta {dest} -> {target}", apply, [key, target_key])
+
+    def _plan_associations(self, key, table, item):
+        # Asociación actual de cada subred en cualquier tabla de la VPC
+        owner = {}
+        for other in self.snapshot.all('route-table'):
+            for assoc in other.get('Associations', []):
+                if assoc.get('SubnetId'):
+                    owner[assoc['SubnetId']] = (other['RouteTableId'], assoc['RouteTableAssociationId'])
+        wanted = set()
+        for subnet in table.subnets:
+            subnet_key = f'subnet:{subnet}'
+            subnet_id = self.known.get(subnet_key)
+            wanted.add(subnet_id)
+            current = owner.get(subnet_id)
+            if current and current[0] == self.known.get(key):
+                continue
+            if current:
+                def replace(ec2, r, assoc=current[1]):
+                    ec2.replace_route_table_association(AssociationId=assoc, RouteTableId=r[key])
+                self._add(f'{key}/assoc:{subnet}', 'modify', f"{table.name}: asociar {subnet} (reemplaza)",
+                          replace, [key])
+            else:
+                def associate(ec2, r, subnet_key=subnet_key):
+                    ec2.associate_route_table(SubnetId=r[subnet_key], RouteTableId=r[key])
+                self._add(f'{key}/assoc:{subnet}', 'create', f"{table.name}: asociar {subnet}", associate,
+                          [key, subnet_key])
+        for assoc in (item or {}).get('Associations', []):
+            if assoc.get('SubnetId') and assoc['SubnetId'] not in wanted:
+                def disassociate(ec2, r, assoc=assoc['RouteTableAssociationId']):
+                    ec2.disassociate_route_table(AssociationId=assoc)
+                self._add(f"{key}/assoc:{assoc['SubnetId']}", 'delete',
+                          f"{table.name}: desasociar {assoc['SubnetId']}", disassociate)
+
+    def _plan_network_acl(self, acl):
+        key = self._id('network-acl', acl.name)
+        item = self.snapshot.get('network-acl', acl.name)
+        if item is None:
+            def create(ec2, r):
+                response = ec2.create_network_acl(VpcId=r['vpc'], TagSpecifications=tag_spec('network-acl', acl.name))
+                return response['NetworkAcl']['NetworkAclId']
+            self._add(key, 'create', f"NACL {acl.name}", create, ['vpc'])
+        # Solo las entradas que cambian, todas en una acción (a la vez, con límite)
+        changes = diff_entries((item or {}).get('Entries', []), acl.ingress, acl.egress)
+        if changes:
+            ops = {op for op, _, _ in changes}
+            self._add(f'{key}/entries', 'create' if ops == {'create'} else 'delete' if ops == {'delete'} else 'modify',
+                      f"{acl.name}: reglas {describe_changes(changes)}",
+                      lambda ec2, r: apply_entries(ec2, r[key], changes), [key], calls=len(changes))
+        self._plan_nacl_associations(key, acl)
+
+    def _plan_nacl_associations(self, key, acl):
+        # Toda subred tiene una asociación de NACL (la de la NACL por defecto al crearla).
+        # Las de subredes nuevas se leen con un único describe de la VPC, así que esas
+        # acciones esperan a todas las subredes nuevas con NACL
+        new_subnets = [f'subnet:{s}' for a in self.topology.network_acls for s in a.subnets
+                       if f'subnet:{s}' not in self.known]
+        for subnet in acl.subnets:
+            subnet_key = f'subnet:{subnet}'
+            current = self.nacl_index.get(self.known.get(subnet_key))
+            if current and current[0] == self.known.get(key):
+                continue
+
+            def replace(ec2, r, subnet_key=subnet_key):
+                self.nacl_index.replace(ec2, r['vpc'], r[subnet_key], r[key])
+            self._add(f'{key}/assoc:{subnet}', 'modify', f"{acl.name}: asociar {subnet}", replace,
+                      [key, subnet_key] + (new_subnets if not current else []))
+
+    def _plan_security_group(self, group):
+        key = f'security-group:{group.name}'
+        item = self.snapshot.get('security-group', group.name)
+        sources = [f'security-group:{rule["SourceGroup"]}' for rule in group.ingress if 'SourceGroup' in rule]
+        if item is None:
+            def create(ec2, r):
+                response = ec2.create_security_group(GroupName=group.name, Description=group.description,
+                                                     VpcId=r['vpc'],
+                                                     TagSpecifications=tag_spec('security-group', group.name))
+                return response['GroupId']
+            self._add(key, 'create', f"Security Group {group.name}", create, ['vpc'])
+        # Los SG aún por crear quedan como su clave y se resuelven al aplicar
+        desired = [sg_permission(rule, lambda name: self.known.get(f'security-group:{name}',
+                                                                   f'security-group:{name}'))
+                   for rule in group.ingress]
+        missing, extra = sg.diff((item or {}).get('IpPermissions', []), desired)
+        if missing:
+            def authorize(ec2, r):
+                rules = {rule._replace(source=r[rule.source]) if rule.source.startswith('security-group:') else rule:
+                         desc for rule, desc in missing.items()}
+                ec2.authorize_security_group_ingress(GroupId=r[key], IpPermissions=sg.permissions(rules))
+            self._add(f'{key}/authorize', 'create' if item is None else 'modify',
+                      f"{group.name}: autorizar {len(missing)} reglas", authorize, [key] + sources)
+        if extra:
+            def revoke(ec2, r):
+                ec2.revoke_security_group_ingress(GroupId=r[key], IpPermissions=sg.permissions(extra))
+            self._add(f'{key}/revoke', 'delete', f"{group.name}: revocar {len(extra)} reglas", revoke, [key])
+
+    def _plan_instance(self, instance):
+        key = f'instance:{instance.name}'
+        # La foto solo trae instancias no terminadas: una parada no se duplica
+        existing = [item['InstanceId'] for item in self.snapshot.all('instance') if name_of(item) == instance.name]
+        missing = instance.count - len(existing)
+        if missing <= 0:
+            self.known[key] = existing[0] if instance.count == 1 else existing
+            return
+        subnet_key = f'subnet:{instance.subnet}'
+        groups = [f'security-group:{name}' for name in instance.security_groups]
+        # Una instancia pública espera a la ruta al IGW de su subred; las privadas no necesitan nada para lanzarse
+        tables = [table for table in self.topology.route_tables
+                  if instance.subnet in table.subnets and 'igw' in table.routes.values()] if instance.public else []
+        after = [subnet_key] + groups + [f'route-table:{t.name}/route:{dest}' for t in tables
+                                         for dest, target in t.routes.items() if target == 'igw']
+
+        def ready(ec2, r):
+            probes = [route_active(r[f'route-table:{t.name}'], dest) for t in tables
+                      for dest, target in t.routes.items() if target == 'igw']
+            return probes + ([igw_attached(r['igw'], r['vpc'])] if tables else [])
+
+        def launch(ec2, r):
+            image = instance.ami if instance.ami.startswith('ami-') else ami.resolve_ami(ec2, instance.ami, ssm=self.ssm)
+            spec = dict(
+                ImageId=image, InstanceType=instance.instance_type, KeyName=instance.key_name,
+                NetworkInterfaces=[{'DeviceIndex': 0, 'SubnetId': r[subnet_key], 'Groups': [r[g] for g in groups],
+                                    'AssociatePublicIpAddress': instance.public}],
+                TagSpecifications=tag_spec('instance', instance.name))
+            # Las N instancias en un run_instances; todas las del plan, en la misma espera
+            ids = fleet.launch(ec2, [(spec, missing)])[0]
+            self.waiter.wait_running(ids)
+            return ids[0] if instance.count == 1 else existing + ids
+        summary = (f"instancia {instance.name} en {instance.subnet}" if instance.count == 1 else
+                   f"{missing} instancias {instance.name} en {instance.subnet} ({len(existing)} ya existen)")
+        self._add(key, 'create', summary, launch, after, ready=ready)
+
+    # --- uso ---
+    @property
+    def calls(self):
+        return sum(action.calls for action in self.actions)
+
+    def counts(self):
+        return {op: sum(1 for a in self.actions if a.op == op) for op in Action.SYMBOLS}
+
+    def show(self):
+        for warning in self.warnings:
+            print_color(Colors.YELLOW, f"! {warning}")
+        if not self.actions:
+            print_color(Colors.GREEN, f"Sin cambios: {self.topology.vpc} ya coincide con la topología")
+            return
+        colors = {'create': Colors.GREEN, 'modify': Colors.YELLOW, 'delete': Colors.RED}
+        for action in self.actions:
+            print_color(colors[action.op], f"  {Action.SYMBOLS[action.op]} {action.summary}")
+        counts = self.counts()
+        print(f"Plan: {counts['create']} a crear, {counts['modify']} a modificar, {counts['delete']} a borrar "
+              f"({self.calls} llamadas de cambio)")
+
+    def apply(self, ec2, max_workers=MAX_WORKERS):
+        """Ejecuta las acciones en paralelo; los resultados incluyen los IDs existentes"""
+        self.waiter = fleet.RunningWaiter(ec2)
+        # boto3.client no es thread-safe: el de SSM no se puede crear dentro de launch
+        if any(not instance.ami.startswith('ami-') for instance in self.topology.instances):
+            self.ssm = ami.ssm_client(ec2.meta.region_name)
+        return run_steps(self.actions, ec2, max_workers=max_workers, results=dict(self.known))
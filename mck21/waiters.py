@@ -0,0 +1,166 @@
+"""
+Esperas por lotes: un único hilo por tipo consulta todos los recursos pendientes
+en vez de un waiter de boto3 por recurso.
+"""
+
+import random
+import sys
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from . import common, registry
+from .common import Colors, print_color
+
+class BatchWaiter:
+    """Espera compartida para muchos recursos del mismo tipo. Un único hilo consulta
+    todos los IDs pendientes con un describe por lotes en cada tick, retira cada ID
+    en cuanto llega a un estado final y aplica backoff adaptativo con jitter: vuelve
+    al mínimo cuando algo termina y se duplica (hasta max_delay) cuando nada cambia."""
+
+    def __init__(self, name, describe, done_states, min_delay=None, max_delay=None, timeout=None,
+                 chunk=None):
+        self.name = name
+        self.describe = describe            # describe(ids) -> {id: estado}; un ID ausente ya no existe
+        self.done_states = set(done_states)
+        self.min_delay = common.POLL_INTERVAL if min_delay is None else min_delay
+        self.max_delay = common.MAX_POLL_INTERVAL if max_delay is None else max_delay
+        self.timeout = common.WAIT_TIMEOUT if timeout is None else timeout
+        self.chunk = common.ID_CHUNK if chunk is None else chunk   # IDs por describe
+        self.lock = threading.Lock()
+        self.pending = {}                   # id -> {'event', 'deadline', 'done'}
+        self.poller = None
+        self.delay = self.min_delay
+        self.polls = 0
+
+    def wait(self, ids, timeout=None):
+        """Bloquea hasta que todos los IDs llegan a un estado final o vence su plazo.
+        Devuelve los IDs que no terminaron a tiempo"""
+        deadline = time.time() + (self.timeout if timeout is None else timeout)
+        entries = []
+        with self.lock:
+            for rid in ids:
+                entry = self.pending.setdefault(rid, {'event': threading.Event(), 'deadline': deadline, 'done': False})
+                entries.append((rid, entry))
+            self.delay = self.min_delay
+            if self.poller is None:
+                self.poller = threading.Thread(target=self._poll, name=f"waiter-{self.name}", daemon=True)
+                self.poller.start()
+        for _, entry in entries:
+            entry['event'].wait()
+        return [rid for rid, entry in entries if not entry['done']]
+
+    def _poll(self):
+        while True:
+            with self.lock:
+                ids = list(self.pending)
+                if not ids:
+                    self.poller = None
+                    return
+            retired = self._tick(ids)
+            with self.lock:
+                self.delay = self.min_delay if retired else min(self.delay * 2, self.max_delay)
+                delay = self.delay
+            time.sleep(delay / 2 + random.uniform(0, delay / 2))
+
+    def _tick(self, ids):
+        # Un describe por lote, todos a la vez: el tick dura lo que el más lento
+        chunks = [ids[i:i + self.chunk] for i in range(0, len(ids), self.chunk)]
+        self.polls += len(chunks)
+        states = {}
+        try:
+            if len(chunks) == 1:
+                states.update(self.describe(chunks[0]))
+            else:
+                with ThreadPoolExecutor(max_workers=min(len(chunks), common.MAX_WORKERS)) as pool:
+                    for found in pool.map(self.describe, chunks):
+                        states.update(found)
+        except Exception as e:
+            # Sin información este tick (p.ej. throttling): solo pueden vencer plazos
+            print_color(Colors.YELLOW, f"  Error consultando {self.name}: {e}")
+            states = None
+        now = time.time()
+        retired = 0
+        with self.lock:
+            for rid in ids:
+                entry = self.pending[rid]
+                if states is not None and states.get(rid, 'gone') in self.done_states | {'gone'}:
+                    entry['done'] = True
+                elif now < entry['deadline']:
+                    continue
+                del self.pending[rid]
+                entry['event'].set()
+                retired += 1
+        return retired
+
+def make_waiter(ec2, rtype, **kwargs):
+    """BatchWaiter de borrado para un tipo registrado con 'wait'. Se filtra por ID en vez
+    de pasar la lista de IDs: un ID que ya no existe no hace fallar la consulta del lote"""
+    rt = registry.get(rtype)
+    items, state, done_states = rt.wait
+
+    def describe(ids):
+        pages = ec2.get_paginator(rt.describe).paginate(**{rt.filter_param: [{'Name': rt.id_filter, 'Values': ids}]})
+        return dict(state(item) for page in pages for item in items(page))
+
+    return BatchWaiter(rtype, describe, done_states, **kwargs)
+
+class EniTracker:
+    """ENIs de las VPC del inventario, incluidas las que no llevan tag (Lambda, ELB,
+    NAT, instancias recién terminadas que aún liberan su interfaz). Un único
+    describe_network_interfaces por VPC sirve a todas las subnets y SG a la vez:
+    cada una se suelta en cuanto desaparece su última ENI, sin barrera global.
+    Solo cuentan las ENIs que se van a ir durante la limpieza: no las sueltas
+    ('available'), ni las de instancias que no se borran, ni las gestionadas por
+    AWS (endpoints, ELB, Lambda...) cuyo dueño no está en el inventario."""
+
+    def __init__(self, ec2, vpc_ids, instance_ids=(), owner_ids=(), timeout=None):
+        self.ec2 = ec2
+        self.vpc_ids = sorted(vpc_ids)
+        self.instance_ids = set(instance_ids)
+        self.owner_ids = set(owner_ids)     # recursos del inventario (NAT, TGW attachments...)
+        self.timeout = common.ENI_DRAIN_TIMEOUT if timeout is None else timeout
+        self.users = self.scan() if self.vpc_ids and self.timeout else {}
+        # Cada consulta ya recorre todas las VPC: un solo lote por tick sea cual sea el número de IDs
+        self.waiter = BatchWaiter('network-interface', self._describe, (), chunk=sys.maxsize)
+
+    def scan(self):
+        """{subnet o SG: {ENIs que lo usan}} con un describe paginado por lotes de VPC"""
+        users = defaultdict(set)
+        paginator = self.ec2.get_paginator('describe_network_interfaces')
+        for i in range(0, len(self.vpc_ids), common.ID_CHUNK):
+            pages = paginator.paginate(Filters=[{'Name': 'vpc-id', 'Values': self.vpc_ids[i:i + common.ID_CHUNK]}])
+            for page in pages:
+                for eni in page['NetworkInterfaces']:
+                    if not self._leaving(eni):
+                        continue
+                    users[eni['SubnetId']].add(eni['NetworkInterfaceId'])
+                    for group in eni.get('Groups', []):
+                        users[group['GroupId']].add(eni['NetworkInterfaceId'])
+        return users
+
+    def _leaving(self, eni):
+        """Si la ENI va a desaparecer al borrar el inventario (si no, esperarla es inútil)"""
+        if eni.get('Status') == 'available':
+            return False
+        instance_id = eni.get('Attachment', {}).get('InstanceId')
+        if instance_id:
+            return instance_id in self.instance_ids
+        if eni.get('RequesterManaged'):
+            # La descripción nombra al dueño: "Interface for NAT Gateway nat-..."
+            return any(word in self.owner_ids for word in eni.get('Description', '').split())
+        return True
+
+    def _describe(self, ids):
+        self.users = self.scan()
+        return {rid: 'in-use' for rid in ids if self.users.get(rid)}
+
+    def wait_drained(self, rid):
+        """Bloquea hasta que ninguna ENI usa la subnet/SG. Devuelve las ENIs que
+        seguían ahí si vence el plazo (el borrado se intenta igualmente)"""
+        if not self.users.get(rid):
+            return []
+        if self.waiter.wait([rid], timeout=self.timeout):
+            return sorted(self.users.get(rid, ()))
+        return []
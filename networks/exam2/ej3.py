@@ -1,6 +1,15 @@
 import boto3
-import time
-from botocore.exceptions import ClientError
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from mck21 import common
+from mck21.ami import resolve_ami
+from mck21.fleet import RunningWaiter, launch
+from mck21.peering import TgwPeering
+from mck21.provision import Step, run_steps
+from mck21.readiness import require_ready, tgw_available
 
 # =====================
 # CONFIG
@@ -10,12 +19,20 @@ REGION_WEST = "us-west-2"
 ACCOUNT_ID = "799197207122" 
 KEY_NAME_EAST = "vockey"
 KEY_NAME_WEST = "oregon-key"
-AMI_ID_EAST = "ami-07ff62358b87c7116"  # Amazon Linux 2 x86_64 us-east-1
-AMI_ID_WEST = "ami-00a8151272c45cd8e"  # Amazon Linux 2 x86_64 us-west-2
 TAG_SPEC = [{"Key": "tag", "Value": "mck21"}]
 
+# Región -> (clave SSH, [(nombre, CIDR VPC, CIDR subnet, AZ, SG)])
+STACKS = {
+    REGION_EAST: (KEY_NAME_EAST, [("e1", "10.0.0.0/16", "10.0.1.0/24", "us-east-1a", "gs-icmp-e1"),
+                                  ("e2", "10.1.0.0/16", "10.1.1.0/24", "us-east-1a", "gs-icmp-e2")]),
+    REGION_WEST: (KEY_NAME_WEST, [("w", "10.2.0.0/16", "10.2.1.0/24", "us-west-2a", "gs-icmp-w")]),
+}
+
 ec2_east = boto3.client("ec2", region_name=REGION_EAST)
 ec2_west = boto3.client("ec2", region_name=REGION_WEST)
+CLIENTS = {REGION_EAST: ec2_east, REGION_WEST: ec2_west}
+# Para resolve_ami: los clientes se crean aquí y no en los hilos de los pasos
+SSM_CLIENTS = {region: boto3.client("ssm", region_name=region) for region in CLIENTS}
 
 # =====================
 # HELPERS
@@ -23,34 +40,6 @@ ec2_west = boto3.client("ec2", region_name=REGION_WEST)
 def tag(resource_id, client):
     client.create_tags(Resources=[resource_id], Tags=TAG_SPEC)
 
-def wait_for_tgw_available(client, tgw_id):
-    print(f"Esperando TGW {tgw_id}...")
-    while True:
-        state = client.describe_transit_gateways(TransitGatewayIds=[tgw_id])["TransitGateways"][0]["State"]
-        if state == "available":
-            print(f"TGW {tgw_id} disponible")
-            return
-        time.sleep(10)
-
-def wait_for_peering_pending_acceptance(client, tgw_id):
-    print("Esperando peering en estado pendingAcceptance...")
-    while True:
-        try:
-            resp = client.describe_transit_gateway_peering_attachments(
-                Filters=[
-                    {"Name": "transit-gateway-id", "Values": [tgw_id]},
-                    {"Name": "state", "Values": ["pendingAcceptance"]}
-                ]
-            )
-            attachments = resp.get("TransitGatewayPeeringAttachments", [])
-            if attachments:
-                att_id = attachments[0]["TransitGatewayAttachmentId"]
-                print(f"Peering visible: {att_id}")
-                return att_id
-        except ClientError:
-            pass
-        time.sleep(10)
-
 def create_vpc(client, cidr):
     vpc = client.create_vpc(CidrBlock=cidr)["Vpc"]
     vpc_id = vpc["VpcId"]
@@ -115,107 +104,93 @@ def create_security_group(client, vpc_id, name, description):
     )
     return sg['GroupId']
 
-def create_ec2(client, subnet_id, sg_id, ami_id, key_name):
-    instance = client.run_instances(
+def ec2_spec(subnet_id, sg_id, ami_id, key_name):
+    return dict(
         ImageId=ami_id,
         InstanceType='t2.micro',
         KeyName=key_name,
-        MaxCount=1,
-        MinCount=1,
         SubnetId=subnet_id,
         SecurityGroupIds=[sg_id],
         TagSpecifications=[{"ResourceType":"instance","Tags":TAG_SPEC}]
-    )['Instances'][0]
-    
-    instance_id = instance['InstanceId']
-    private_ip = instance['PrivateIpAddress']
-    public_ip = instance.get('PublicIpAddress')  # Ya existirá gracias al MapPublicIpOnLaunch
-    return instance_id, private_ip, public_ip
-
-# =====================
-# CREAR VPCS Y SUBNETS
-# =====================
-vpc_e1 = create_vpc(ec2_east, "10.0.0.0/16")
-vpc_e2 = create_vpc(ec2_east, "10.1.0.0/16")
-vpc_w  = create_vpc(ec2_west, "10.2.0.0/16")
-
-sub_e1 = create_subnet(ec2_east, vpc_e1, "10.0.1.0/24", "us-east-1a")
-sub_e2 = create_subnet(ec2_east, vpc_e2, "10.1.1.0/24", "us-east-1a")
-sub_w  = create_subnet(ec2_west, vpc_w,  "10.2.1.0/24", "us-west-2a")
-
-# =====================
-# SECURITY GROUPS PARA PING
-# =====================
-sg_e1 = create_security_group(ec2_east, vpc_e1, "gs-icmp-e1", "Allow ICMP for testing")
-sg_e2 = create_security_group(ec2_east, vpc_e2, "gs-icmp-e2", "Allow ICMP for testing")
-sg_w  = create_security_group(ec2_west, vpc_w,  "gs-icmp-w",  "Allow ICMP for testing")
-
-# =====================
-# CREAR EC2 EN CADA VPC
-# =====================
-inst_e1_id, inst_e1_priv, inst_e1_pub = create_ec2(ec2_east, sub_e1, sg_e1, AMI_ID_EAST, KEY_NAME_EAST)
-inst_e2_id, inst_e2_priv, inst_e2_pub = create_ec2(ec2_east, sub_e2, sg_e2, AMI_ID_EAST, KEY_NAME_EAST)
-inst_w_id, inst_w_priv, inst_w_pub   = create_ec2(ec2_west, sub_w, sg_w, AMI_ID_WEST, KEY_NAME_WEST)
-
-print(f"EC2 e1: {inst_e1_id} - Private IP: {inst_e1_priv} - Public IP: {inst_e1_pub}")
-print(f"EC2 e2: {inst_e2_id} - Private IP: {inst_e2_priv} - Public IP: {inst_e2_pub}")
-print(f"EC2 w:  {inst_w_id} - Private IP: {inst_w_priv} - Public IP: {inst_w_pub}")
-
-# =====================
-# CREAR TRANSIT GATEWAYS
-# =====================
-tgw_east = ec2_east.create_transit_gateway(
-    TagSpecifications=[{"ResourceType": "transit-gateway", "Tags": TAG_SPEC}]
-)["TransitGateway"]["TransitGatewayId"]
-
-tgw_west = ec2_west.create_transit_gateway(
-    TagSpecifications=[{"ResourceType": "transit-gateway", "Tags": TAG_SPEC}]
-)["TransitGateway"]["TransitGatewayId"]
-
-wait_for_tgw_available(ec2_east, tgw_east)
-wait_for_tgw_available(ec2_west, tgw_west)
-
-# =====================
-# VPC ATTACHMENTS
-# =====================
-ec2_east.create_transit_gateway_vpc_attachment(
-    TransitGatewayId=tgw_east,
-    VpcId=vpc_e1,
-    SubnetIds=[sub_e1],
-    TagSpecifications=[{"ResourceType": "transit-gateway-attachment","Tags": TAG_SPEC}]
-)
-
-ec2_east.create_transit_gateway_vpc_attachment(
-    TransitGatewayId=tgw_east,
-    VpcId=vpc_e2,
-    SubnetIds=[sub_e2],
-    TagSpecifications=[{"ResourceType": "transit-gateway-attachment","Tags": TAG_SPEC}]
-)
-
-ec2_west.create_transit_gateway_vpc_attachment(
-    TransitGatewayId=tgw_west,
-    VpcId=vpc_w,
-    SubnetIds=[sub_w],
-    TagSpecifications=[{"ResourceType": "transit-gateway-attachment","Tags": TAG_SPEC}]
-)
-
-# =====================
-# TGW PEERING
-# =====================
-ec2_east.create_transit_gateway_peering_attachment(
-    TransitGatewayId=tgw_east,
-    PeerTransitGatewayId=tgw_west,
-    PeerAccountId=ACCOUNT_ID,
-    PeerRegion=REGION_WEST,
-    TagSpecifications=[{"ResourceType": "transit-gateway-attachment","Tags": TAG_SPEC}]
-)
-
-# =====================
-# ACCEPT PEERING
-# =====================
-peering_id = wait_for_peering_pending_acceptance(ec2_west, tgw_west)
-ec2_west.accept_transit_gateway_peering_attachment(
-    TransitGatewayAttachmentId=peering_id
-)
+    )
 
-print("Transit Gateway Peering aceptado correctamente")
\ No newline at end of file
+def create_ec2(client, specs):
+    """Lanza las instancias de una región (las especificaciones iguales en un solo
+    run_instances, las distintas a la vez), espera a todas con una única espera por
+    lotes y lee sus IPs en un describe. Devuelve [(id, IP privada, IP pública)]"""
+    ids = [group[0] for group in launch(client, [(spec, 1) for spec in specs])]
+    RunningWaiter(client).wait_running(ids)
+    found = {i['InstanceId']: i for r in client.describe_instances(InstanceIds=ids)['Reservations']
+             for i in r['Instances']}
+    # La IP pública ya existe gracias al MapPublicIpOnLaunch
+    return [(rid, found[rid]['PrivateIpAddress'], found[rid].get('PublicIpAddress')) for rid in ids]
+
+def create_tgw(client):
+    return client.create_transit_gateway(
+        TagSpecifications=[{"ResourceType": "transit-gateway", "Tags": TAG_SPEC}]
+    )["TransitGateway"]["TransitGatewayId"]
+
+def wait_tgw(client, tgw_id):
+    # Una sola espera por TGW (la comparten sus adjuntos y el peering); tarda minutos,
+    # así que se consulta desde el intervalo máximo
+    require_ready(client, [tgw_available(tgw_id)], delay=common.READY_MAX_POLL_INTERVAL)
+    return tgw_id
+
+def attach_vpc(client, tgw_id, vpc_id, subnet_id):
+    return client.create_transit_gateway_vpc_attachment(
+        TransitGatewayId=tgw_id,
+        VpcId=vpc_id,
+        SubnetIds=[subnet_id],
+        TagSpecifications=[{"ResourceType": "transit-gateway-attachment","Tags": TAG_SPEC}]
+    )["TransitGatewayVpcAttachment"]["TransitGatewayAttachmentId"]
+
+def peer_tgws(r):
+    return TgwPeering(ec2_east, ec2_west, r[f"tgw:{REGION_EAST}"], r[f"tgw:{REGION_WEST}"], ACCOUNT_ID,
+                      tags=TAG_SPEC).run()
+
+def build_steps():
+    """Las dos regiones a la vez: cada TGW se crea nada más empezar y su espera se
+    solapa con la del otro TGW y con las VPC, subnets, SG e instancias de su región;
+    los adjuntos y el peering arrancan en cuanto sus TGW están disponibles"""
+    steps = []
+    for region, (key_name, vpcs) in STACKS.items():
+        client = CLIENTS[region]
+        steps.append(Step(f"tgw:{region}", lambda ctx, r, c=client: create_tgw(c)))
+        steps.append(Step(f"tgw-ready:{region}", lambda ctx, r, c=client, reg=region: wait_tgw(c, r[f"tgw:{reg}"]),
+                          after=[f"tgw:{region}"]))
+        # Última Amazon Linux 2 x86_64 de la región (SSM + caché en disco, mck21/ami.py)
+        steps.append(Step(f"ami:{region}", lambda ctx, r, c=client, ssm=SSM_CLIENTS[region]: resolve_ami(c, ssm=ssm)))
+        for name, vpc_cidr, subnet_cidr, az, sg_name in vpcs:
+            steps += [
+                Step(f"vpc:{name}", lambda ctx, r, c=client, cidr=vpc_cidr: create_vpc(c, cidr)),
+                Step(f"subnet:{name}", lambda ctx, r, c=client, n=name, cidr=subnet_cidr, az=az:
+                     create_subnet(c, r[f"vpc:{n}"], cidr, az), after=[f"vpc:{name}"]),
+                Step(f"sg:{name}", lambda ctx, r, c=client, n=name, sg=sg_name:
+                     create_security_group(c, r[f"vpc:{n}"], sg, "Allow ICMP for testing"), after=[f"vpc:{name}"]),
+                Step(f"attach:{name}", lambda ctx, r, c=client, n=name, reg=region:
+                     attach_vpc(c, r[f"tgw:{reg}"], r[f"vpc:{n}"], r[f"subnet:{n}"]),
+                     after=[f"tgw-ready:{region}", f"subnet:{name}"]),
+            ]
+        steps.append(Step(f"ec2:{region}", lambda ctx, r, c=client, reg=region, k=key_name, v=vpcs:
+                          create_ec2(c, [ec2_spec(r[f"subnet:{n}"], r[f"sg:{n}"], r[f"ami:{reg}"], k)
+                                         for n, *_ in v]),
+                          after=[f"ami:{region}"] + [f"{kind}:{n}" for n, *_ in vpcs for kind in ("subnet", "sg")]))
+    steps.append(Step("peering", lambda ctx, r: peer_tgws(r), after=[f"tgw-ready:{region}" for region in STACKS]))
+    return steps
+
+def main():
+    print("Creando las dos regiones a la vez...")
+    run = run_steps(build_steps(), None)
+    if run["failed"] or run["skipped"]:
+        print(f"Error creando la infraestructura: {', '.join(sorted(run['failed']))}")
+        sys.exit(1)
+    r = run["results"]
+
+    for region, (_, vpcs) in STACKS.items():
+        for (name, *_), (inst_id, inst_priv, inst_pub) in zip(vpcs, r[f"ec2:{region}"]):
+            print(f"EC2 {name}: {inst_id} - Private IP: {inst_priv} - Public IP: {inst_pub}")
+    print(f"TGW east: {r[f'tgw:{REGION_EAST}']} - TGW west: {r[f'tgw:{REGION_WEST}']}")
+    print(f"Transit Gateway Peering aceptado correctamente: {r['peering']} ({run['elapsed']:.0f}s)")
+
+if __name__ == "__main__":
+    main()
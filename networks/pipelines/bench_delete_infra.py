@@ -0,0 +1,427 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark de delete_infra.py contra S3 y Glue simulados en memoria (no llama a AWS)
+  - S3: vaciado del bucket, delete_object por clave vs delete_objects por lotes
+    con un hilo vs el pipeline por prefijos (también con SlowDown); y en un bucket
+    versionado, claves y después versiones frente a una sola pasada por
+    list_object_versions; y borrado frente a lifecycle elegido por el número
+    estimado de objetos
+  - Glue: tablas de una base de datos de crawler, get_tables completo y un
+    delete_table por tabla vs solo nombres y batch_delete_table (también con
+    throttling)
+Los clientes simulados y el contador de llamadas son los del benchmark de mck21.
+
+Uso:
+    python networks/pipelines/bench_delete_infra.py
+"""
+
+import copy
+import itertools
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from mck21.bench import POLL_INTERVAL, THROTTLE_RATE, FakeClient, _error, api, quiet
+from mck21.common import ApiStats
+
+import delete_infra
+
+S3_LATENCY = 0.005          # llamada a S3
+S3_KEY_LATENCY = 0.00005    # coste por clave dentro de un delete_objects
+S3_PAGE = 1000              # claves por página en los listados de S3
+S3_OBJECTS = 20000          # objetos del bucket en el escenario S3
+S3_PARTITIONS = 40          # carpetas de partición (data/part=NNNN/) en las que se reparten
+# Regla del usuario que ya tenía el bucket y que debe seguir ahí después del lifecycle
+USER_RULES = [{'ID': 'logs-a-glacier', 'Status': 'Enabled', 'Filter': {'Prefix': 'logs/'},
+               'Transitions': [{'Days': 30, 'StorageClass': 'GLACIER'}]}]
+GLUE_TABLES = 3000          # tablas de la base de datos en el escenario Glue
+GLUE_PAGE = 100             # tablas por página de get_tables
+GLUE_TABLE_LATENCY = 0.0002 # coste por tabla en get_tables con sus columnas y particiones
+GLUE_NAME_LATENCY = 0.00001 # coste por tabla en get_tables pidiendo solo el nombre
+
+class FakeS3(FakeClient):
+    """Un bucket S3 en memoria: {clave: [(versión, es delete marker)]}, la más
+    reciente al final. Sin versionado cada clave tiene una sola versión 'null'.
+    slowdown: fracción de claves de cada delete_objects que fallan con SlowDown.
+    prefixes=0: bucket plano, claves sin '/'"""
+
+    service = 's3'
+
+    def __init__(self, objects=0, versioned=False, slowdown=0.0, prefixes=1, region='us-east-1'):
+        super().__init__(region)
+        self.latency = S3_LATENCY
+        self.versioned = versioned
+        self.slowdown = slowdown
+        self.keys_sent = 0      # claves pedidas en delete_objects (incluidas las repetidas)
+        self.lifecycle = None
+        self.serial = itertools.count(1)
+        self.store = {}
+        for i in range(objects):
+            self._put(f"data/part={i % prefixes:04d}/{i:08d}.parquet" if prefixes else f"{i:08d}.parquet")
+
+    def _put(self, key, marker=False):
+        version = f"{next(self.serial):012d}" if self.versioned else 'null'
+        versions = self.store.setdefault(key, [])
+        if not self.versioned:
+            versions.clear()
+        versions.append((version, marker))
+
+    def _remove(self, key, version=None):
+        """Borrado de S3: sin VersionId en un bucket versionado deja un delete marker"""
+        with self.lock:
+            if version is None and self.versioned:
+                if key in self.store:
+                    self._put(key, marker=True)
+                return
+            versions = self.store.get(key, [])
+            versions[:] = [v for v in versions if version not in (None, v[0])]
+            if not versions:
+                self.store.pop(key, None)
+
+    def leftovers(self):
+        return sum(len(versions) for versions in self.store.values())
+
+    def run_lifecycle(self):
+        """Pasan los días: una regla que hace caducar todo deja el bucket vacío"""
+        if self.lifecycle and any(rule['Status'] == 'Enabled' and rule.get('Expiration', {}).get('Days')
+                                  for rule in self.lifecycle['Rules']):
+            with self.lock:
+                self.store.clear()
+
+    def get_paginator(self, operation):
+        return FakeTokenPaginator(self, operation)
+
+    @api
+    def head_bucket(self, Bucket):
+        return {}
+
+    @api
+    def get_bucket_versioning(self, Bucket):
+        # Un bucket en el que nunca se activó el versionado no devuelve Status
+        return {'Status': 'Enabled'} if self.versioned else {}
+
+    def _list(self, entries, Prefix, Delimiter, MaxKeys):
+        """Una página de un listado: entries son (clave, versión, es marker) ordenados.
+        Con Delimiter las claves con más niveles se agrupan en CommonPrefixes.
+        Devuelve (entradas, prefijos, marca para la página siguiente o None)"""
+        items, prefixes, last = [], [], None
+        for entry in entries:
+            key = entry[0]
+            if Delimiter and Delimiter in key[len(Prefix):]:
+                prefix = key[:key.index(Delimiter, len(Prefix)) + 1]
+                if prefixes and prefixes[-1] == prefix:
+                    continue
+                if len(items) + len(prefixes) == MaxKeys:
+                    return items, prefixes, last
+                prefixes.append(prefix)
+                last = (prefix + '\uffff', '')
+                continue
+            if len(items) + len(prefixes) == MaxKeys:
+                return items, prefixes, last
+            items.append(entry)
+            last = entry[:2]
+        # Respuesta proporcional al número de claves
+        time.sleep(S3_KEY_LATENCY * len(items))
+        return items, prefixes, None
+
+    @api
+    def list_objects_v2(self, Bucket, Prefix='', Delimiter=None, ContinuationToken=None, MaxKeys=S3_PAGE):
+        with self.lock:
+            entries = sorted((k, '', False) for k, v in self.store.items()
+                             if k.startswith(Prefix) and not v[-1][1] and k > (ContinuationToken or ''))
+        items, prefixes, last = self._list(entries, Prefix, Delimiter, MaxKeys)
+        page = {'Contents': [{'Key': k} for k, _, _ in items], 'CommonPrefixes': [{'Prefix': p} for p in prefixes],
+                'IsTruncated': last is not None}
+        if last:
+            page['NextContinuationToken'] = last[0]
+        return page
+
+    @api
+    def list_object_versions(self, Bucket, Prefix='', Delimiter=None, KeyMarker='', VersionIdMarker='',
+                             MaxKeys=S3_PAGE):
+        with self.lock:
+            entries = sorted((k, version, marker) for k, versions in self.store.items() if k.startswith(Prefix)
+                             for version, marker in versions if (k, version) > (KeyMarker, VersionIdMarker))
+        items, prefixes, last = self._list(entries, Prefix, Delimiter, MaxKeys)
+        page = {'Versions': [{'Key': k, 'VersionId': v} for k, v, marker in items if not marker],
+                'DeleteMarkers': [{'Key': k, 'VersionId': v} for k, v, marker in items if marker],
+                'CommonPrefixes': [{'Prefix': p} for p in prefixes], 'IsTruncated': last is not None}
+        if last:
+            page['NextKeyMarker'], page['NextVersionIdMarker'] = last
+        return page
+
+    @api
+    def delete_object(self, Bucket, Key, VersionId=None):
+        self._remove(Key, VersionId)
+        return {}
+
+    @api
+    def delete_objects(self, Bucket, Delete):
+        objects = Delete['Objects']
+        if len(objects) > 1000:
+            raise _error('MalformedXML', 'The XML you provided was not well-formed')
+        time.sleep(S3_KEY_LATENCY * len(objects))
+        with self.lock:
+            self.keys_sent += len(objects)
+        errors = []
+        for obj in objects:
+            if self.slowdown and random.random() < self.slowdown:
+                errors.append(dict(obj, Code='SlowDown', Message='Please reduce your request rate.'))
+                continue
+            self._remove(obj['Key'], obj.get('VersionId'))
+        return {'Errors': errors} if errors else {}
+
+    @api
+    def get_bucket_lifecycle_configuration(self, Bucket):
+        if self.lifecycle is None:
+            raise _error('NoSuchLifecycleConfiguration', 'The lifecycle configuration does not exist')
+        return {'Rules': self.lifecycle['Rules']}
+
+    @api
+    def put_bucket_lifecycle_configuration(self, Bucket, LifecycleConfiguration):
+        self.lifecycle = LifecycleConfiguration
+        return {}
+
+    @api
+    def delete_bucket_lifecycle(self, Bucket):
+        self.lifecycle = None
+        return {}
+
+    @api
+    def delete_bucket(self, Bucket):
+        if self.store:
+            raise _error('BucketNotEmpty', 'The bucket you tried to delete is not empty')
+        return {}
+
+class FakeGlue(FakeClient):
+    """Catálogo de Glue en memoria: una base de datos con tablas de crawler.
+    get_tables tarda según lo que devuelve (columnas y particiones de cada tabla
+    salvo con AttributesToGet=['NAME']). throttle: fracción de tablas de cada
+    batch_delete_table que fallan con ThrottlingException"""
+
+    service = 'glue'
+
+    def __init__(self, tables=0, throttle=0.0, region='us-east-1'):
+        super().__init__(region)
+        self.latency = S3_LATENCY
+        self.throttle_tables = throttle
+        self.tables = {f"part_{i:06d}" for i in range(tables)}
+
+    def leftovers(self):
+        return len(self.tables)
+
+    def get_paginator(self, operation):
+        return FakeTokenPaginator(self, operation)
+
+    @api
+    def get_tables(self, DatabaseName, NextToken='', MaxResults=GLUE_PAGE, AttributesToGet=None):
+        with self.lock:
+            names = sorted(name for name in self.tables if name > NextToken)
+        page = names[:MaxResults]
+        time.sleep((GLUE_NAME_LATENCY if AttributesToGet == ['NAME'] else GLUE_TABLE_LATENCY) * len(page))
+        response = {'TableList': [{'Name': name} if AttributesToGet == ['NAME'] else
+                                  {'Name': name, 'DatabaseName': DatabaseName,
+                                   'StorageDescriptor': {'Columns': [], 'Location': f"s3://bench/{name}/"},
+                                   'PartitionKeys': []} for name in page]}
+        if len(names) > MaxResults:
+            response['NextToken'] = page[-1]
+        return response
+
+    @api
+    def delete_table(self, DatabaseName, Name):
+        with self.lock:
+            if Name not in self.tables:
+                raise _error('EntityNotFoundException', f"Table {Name} not found.")
+            self.tables.discard(Name)
+        return {}
+
+    @api
+    def batch_delete_table(self, DatabaseName, TablesToDelete):
+        if len(TablesToDelete) > 100:
+            raise _error('ValidationException', 'Member must have length less than or equal to 100')
+        time.sleep(S3_KEY_LATENCY * len(TablesToDelete))
+        errors = []
+        for name in TablesToDelete:
+            with self.lock:
+                if name not in self.tables:
+                    errors.append({'TableName': name, 'ErrorDetail': {'ErrorCode': 'EntityNotFoundException'}})
+                elif self.throttle_tables and random.random() < self.throttle_tables:
+                    errors.append({'TableName': name, 'ErrorDetail': {'ErrorCode': 'ThrottlingException',
+                                                                      'ErrorMessage': 'Rate exceeded'}})
+                else:
+                    self.tables.discard(name)
+        return {'Errors': errors}
+
+class FakeTokenPaginator:
+    """Paginación por token (S3 y Glue): cada página es una llamada"""
+
+    TOKENS = {'list_objects_v2': {'NextContinuationToken': 'ContinuationToken'},
+              'list_object_versions': {'NextKeyMarker': 'KeyMarker', 'NextVersionIdMarker': 'VersionIdMarker'},
+              'get_tables': {'NextToken': 'NextToken'}}
+
+    def __init__(self, client, operation):
+        self.client, self.operation = client, operation
+
+    def paginate(self, PaginationConfig=None, **kwargs):
+        if PaginationConfig and PaginationConfig.get('PageSize'):
+            kwargs['MaxKeys'] = PaginationConfig['PageSize']
+        while True:
+            page = getattr(self.client, self.operation)(**kwargs)
+            yield page
+            if not page.get('IsTruncated', 'NextToken' in page):
+                return
+            kwargs.update({arg: page[out] for out, arg in self.TOKENS[self.operation].items()})
+
+def legacy_empty_bucket(s3, bucket):
+    """Reproduce el vaciado original: un delete_object por clave, versión y delete marker"""
+    for page in s3.get_paginator('list_objects_v2').paginate(Bucket=bucket):
+        for obj in page.get('Contents', []):
+            s3.delete_object(Bucket=bucket, Key=obj['Key'])
+    for page in s3.get_paginator('list_object_versions').paginate(Bucket=bucket):
+        for version in page.get('Versions', []) + page.get('DeleteMarkers', []):
+            s3.delete_object(Bucket=bucket, Key=version['Key'], VersionId=version['VersionId'])
+
+def bench_s3(objects, partitions=S3_PARTITIONS):
+    """Vaciado de un bucket con 'objects' objetos en 'partitions' carpetas:
+    delete_object por clave (sobre una décima parte, el original tardaría demasiado)
+    frente a AWSCleaner con un hilo y con el pipeline por prefijos, también con
+    claves que fallan con SlowDown"""
+    delete_infra.RETRY_DELAY = POLL_INTERVAL
+    rows = []
+    for mode, workers, slowdown in (('1 a 1', 1, 0.0), ('lotes 1 hilo', 1, 0.0),
+                                    ('pipeline', delete_infra.S3_WORKERS, 0.0),
+                                    ('pipeline+SlowDown', delete_infra.S3_WORKERS, THROTTLE_RATE)):
+        count = objects // 10 if mode == '1 a 1' else objects
+        s3 = FakeS3(count, slowdown=slowdown, prefixes=partitions)
+        stats = ApiStats()
+        stats.attach(s3)
+        start = time.time()
+        if mode == '1 a 1':
+            legacy_empty_bucket(s3, 'bench')
+            deleted = count - s3.leftovers()
+        else:
+            cleaner = delete_infra.AWSCleaner(workers=workers, expire_threshold=0)
+            cleaner.s3 = s3
+            cleaner.delete_s3_bucket_contents('bench')
+            deleted = cleaner.deleted_count['s3_objects']
+        elapsed = time.time() - start
+        rows.append((mode, count, elapsed, deleted / elapsed, stats.total()[0], deleted, s3.leftovers()))
+    return rows
+
+def bench_s3_versions(objects, partitions=S3_PARTITIONS):
+    """Bucket versionado con 'objects' objetos (dos versiones cada uno): las dos
+    pasadas anteriores (claves, que solo dejan delete markers, y después versiones)
+    frente a una sola pasada por list_object_versions"""
+    rows = []
+    for mode in ('2 pasadas', '1 pasada'):
+        s3 = FakeS3(objects, versioned=True, prefixes=partitions)
+        for key in list(s3.store):
+            s3._put(key)
+        versions = s3.leftovers()
+        cleaner = delete_infra.AWSCleaner(expire_threshold=0)
+        cleaner.s3 = s3
+        stats = ApiStats()
+        stats.attach(s3)
+        start = time.time()
+        if mode == '2 pasadas':
+            cleaner.purge_s3_listing('bench', 'list_objects_v2')
+            cleaner.purge_s3_listing('bench', 'list_object_versions')
+        else:
+            cleaner.delete_s3_bucket_contents('bench')
+        lists = stats.calls['s3:ListObjectsV2'] + stats.calls['s3:ListObjectVersions']
+        rows.append((mode, versions, time.time() - start, lists, stats.calls['s3:DeleteObjects'], s3.keys_sent,
+                     s3.leftovers()))
+    return rows
+
+def bench_s3_expire(objects, partitions=S3_PARTITIONS):
+    """Bucket grande: borrado por lotes frente a lifecycle elegido automáticamente por
+    la estimación (umbral en la mitad de los objetos), con particiones y plano. Con
+    lifecycle se cuentan las llamadas de la primera ejecución y las de la siguiente,
+    que lo comprueba vacío, repone las reglas que tenía (USER_RULES) y elimina el
+    bucket"""
+    delete_infra.S3_EXPIRE_STATE = os.path.join(tempfile.mkdtemp(prefix='mck21-bench-'), 's3_expiring.json')
+    rows = []
+    for mode, threshold, prefixes in (('borrado', 0, partitions), ('lifecycle', objects // 2, partitions),
+                                      ('plano', objects // 2, 0)):
+        s3 = FakeS3(objects, prefixes=prefixes)
+        s3.lifecycle = {'Rules': copy.deepcopy(USER_RULES)}
+        stats = ApiStats()
+        stats.attach(s3)
+        estimates = []
+        cleaner = delete_infra.AWSCleaner(expire_threshold=threshold)
+        cleaner.s3 = s3
+        estimate = cleaner.estimate_s3_objects
+        cleaner.estimate_s3_objects = lambda *args: estimates.append(estimate(*args)) or estimates[-1]
+        start = time.time()
+        runs = []
+        while True:
+            emptied = cleaner.delete_s3_bucket_contents('bench')
+            if emptied:
+                cleaner.delete_s3_bucket('bench')
+            runs.append(stats.total()[0] - sum(runs))
+            if emptied:
+                break
+            s3.run_lifecycle()
+        rows.append((mode, objects, estimates[0] if estimates else '-', time.time() - start, runs[0],
+                     runs[1] if len(runs) > 1 else '-', cleaner.deleted_count['s3_buckets'],
+                     'sí' if s3.lifecycle == {'Rules': USER_RULES} else 'no', s3.leftovers()))
+    return rows
+
+def legacy_delete_glue_tables(glue, database):
+    """Reproduce el borrado original: get_tables completo y un delete_table por tabla"""
+    for page in glue.get_paginator('get_tables').paginate(DatabaseName=database):
+        for table in page['TableList']:
+            glue.delete_table(DatabaseName=database, Name=table['Name'])
+
+def bench_glue(tables):
+    """Base de datos con 'tables' tablas: delete_table una a una frente a
+    batch_delete_table con el listado solo de nombres, también con throttling"""
+    delete_infra.RETRY_DELAY = POLL_INTERVAL
+    rows = []
+    for mode, throttle in (('1 a 1', 0.0), ('lotes', 0.0), ('lotes+throttling', THROTTLE_RATE)):
+        glue = FakeGlue(tables, throttle=throttle)
+        stats = ApiStats()
+        stats.attach(glue)
+        start = time.time()
+        if mode == '1 a 1':
+            legacy_delete_glue_tables(glue, 'bench')
+            deleted = tables - glue.leftovers()
+        else:
+            cleaner = delete_infra.AWSCleaner()
+            cleaner.glue = glue
+            cleaner.delete_glue_tables('bench')
+            deleted = cleaner.deleted_count['glue_tables']
+        elapsed = time.time() - start
+        rows.append((mode, tables, elapsed, deleted / elapsed, stats.total()[0], deleted, glue.leftovers()))
+    return rows
+
+def main():
+    print(f"S3 (bucket en {S3_PARTITIONS} particiones, lotes de hasta 1000 claves)")
+    print(f"{'modo':<19}{'objetos':>9}{'tiempo(s)':>12}{'objetos/s':>11}{'llamadas':>10}{'contados':>10}{'restos':>8}")
+    for mode, n, elapsed, rate, calls, deleted, left in quiet(bench_s3, S3_OBJECTS):
+        print(f"{mode:<19}{n:>9}{elapsed:>12.2f}{rate:>11.0f}{calls:>10}{deleted:>10}{left:>8}")
+
+    print(f"\nS3 VERSIONADO ({S3_OBJECTS // 2} objetos con 2 versiones)")
+    print(f"{'modo':<12}{'versiones':>11}{'tiempo(s)':>12}{'listados':>10}{'deletes':>9}{'claves':>8}{'restos':>8}")
+    for mode, n, elapsed, lists, deletes, keys, left in quiet(bench_s3_versions, S3_OBJECTS // 2):
+        print(f"{mode:<12}{n:>11}{elapsed:>12.2f}{lists:>10}{deletes:>9}{keys:>8}{left:>8}")
+
+    print(f"\nS3 LIFECYCLE ({S3_OBJECTS} objetos, umbral en {S3_OBJECTS // 2} estimados)")
+    print(f"{'modo':<11}{'objetos':>9}{'estimados':>11}{'tiempo(s)':>12}{'llam. 1ª':>10}{'llam. 2ª':>10}"
+          f"{'buckets':>9}{'reglas':>8}{'restos':>8}")
+    for mode, n, estimate, elapsed, first, second, buckets, rules, left in quiet(bench_s3_expire, S3_OBJECTS):
+        print(f"{mode:<11}{n:>9}{estimate:>11}{elapsed:>12.2f}{first:>10}{second:>10}{buckets:>9}{rules:>8}"
+              f"{left:>8}")
+
+    print(f"\nGLUE ({GLUE_TABLES} tablas, lotes de hasta 100)")
+    print(f"{'modo':<18}{'tablas':>8}{'tiempo(s)':>12}{'tablas/s':>10}{'llamadas':>10}{'contadas':>10}{'restos':>8}")
+    for mode, n, elapsed, rate, calls, deleted, left in quiet(bench_glue, GLUE_TABLES):
+        print(f"{mode:<18}{n:>8}{elapsed:>12.2f}{rate:>10.0f}{calls:>10}{deleted:>10}{left:>8}")
+
+if __name__ == '__main__':
+    main()
@@ -10,18 +10,111 @@ Flags opcionales:
     --dry-run : Muestra qué se eliminaría sin eliminarlo realmente
     --keep-bucket : Mantiene el bucket S3 (solo vacía su contenido)
     --region : Especifica la región (default: us-east-1)
+    --workers : Hilos para listar y para borrar en S3 (default: 16)
+    --async-expire : Vacía el bucket con una regla de lifecycle en vez de borrar
+                     objeto a objeto; una ejecución posterior elimina el bucket
+    --expire-threshold : Objetos estimados a partir de los que se usa lifecycle
+                         automáticamente (default: 1000000, 0 = nunca)
 """
 
 import boto3
 import argparse
+import itertools
+import json
+import os
+import queue
+import random
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from botocore.config import Config
 from botocore.exceptions import ClientError
 
+RETRIES = 5             # reintentos de lo que falla con un error transitorio (S3 y Glue)
+RETRY_DELAY = 1         # segundos antes del primer reintento (se dobla en cada uno)
+MAX_RETRY_DELAY = 20
+S3_BATCH = 1000         # máximo de claves por delete_objects
+S3_RETRY_ERRORS = {'SlowDown', 'InternalError', 'ServiceUnavailable', 'RequestTimeout'}
+S3_WORKERS = 16         # hilos que listan prefijos y hilos que borran lotes
+S3_QUEUE = 4            # lotes en cola por hilo de borrado (si se llena, el listado espera)
+S3_SHARD_DEPTH = 3      # niveles de 'directorios' que se abren para repartir el listado
+S3_PROGRESS = 10        # segundos entre mensajes de progreso
+S3_EXPIRE_THRESHOLD = 1000000   # objetos estimados a partir de los que se vacía con lifecycle
+S3_SAMPLE = 8           # prefijos por nivel que se listan para estimar el número de objetos
+S3_ESTIMATE_PAGES = 5   # páginas como máximo por prefijo de la muestra en cada nivel
+GLUE_BATCH = 100        # máximo de tablas por batch_delete_table
+GLUE_RETRY_ERRORS = {'ThrottlingException', 'InternalServiceException', 'OperationTimeoutException',
+                     'ConcurrentModificationException'}
+S3_EXPIRE_STATE = os.path.join(os.path.expanduser('~'), '.cache', 'mck21', 's3_expiring.json')
+
+# Lifecycle que vacía el bucket entero: las versiones actuales caducan (con
+# versionado pasan a anteriores), las anteriores se eliminan, los delete markers
+# que se quedan solos también y las subidas multiparte a medias se abortan.
+# ExpiredObjectDeleteMarker no se puede combinar con Days en la misma regla
+EXPIRE_RULES = [
+    {
+        'ID': 'delete-infra-expire-all',
+        'Filter': {'Prefix': ''},
+        'Status': 'Enabled',
+        'Expiration': {'Days': 1},
+        'NoncurrentVersionExpiration': {'NoncurrentDays': 1},
+        'AbortIncompleteMultipartUpload': {'DaysAfterInitiation': 1}
+    },
+    {
+        'ID': 'delete-infra-expire-markers',
+        'Filter': {'Prefix': ''},
+        'Status': 'Enabled',
+        'Expiration': {'ExpiredObjectDeleteMarker': True}
+    }
+]
+
+def batches(items, size=S3_BATCH):
+    """Agrupa un iterable en listas de hasta size elementos sin cargarlo entero"""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+class PipelineStopped(Exception):
+    """Un hilo de borrado ha fallado: el listado deja de producir lotes"""
+
+def backoff(attempt):
+    """Pausa (con jitter) antes del reintento número attempt + 1"""
+    time.sleep(min(RETRY_DELAY * 2 ** attempt, MAX_RETRY_DELAY) * random.uniform(0.5, 1.0))
+
+def load_expiring(path=None):
+    """{bucket: datos} de los buckets que se están vaciando con lifecycle"""
+    try:
+        with open(path or S3_EXPIRE_STATE) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def save_expiring(state, path=None):
+    path = path or S3_EXPIRE_STATE
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w') as f:
+        # Las fechas de las reglas guardadas (Expiration.Date...) van como texto ISO
+        json.dump(state, f, indent=1, default=str)
+    os.replace(tmp, path)
+
 class AWSCleaner:
-    def __init__(self, region='us-east-1', dry_run=False):
+    def __init__(self, region='us-east-1', dry_run=False, workers=S3_WORKERS, async_expire=False,
+                 expire_threshold=S3_EXPIRE_THRESHOLD):
         self.region = region
         self.dry_run = dry_run
-        self.s3 = boto3.client('s3', region_name=region)
+        self.workers = workers
+        self.async_expire = async_expire
+        self.expire_threshold = expire_threshold
+        # Una conexión por hilo (listado + borrado); por defecto boto3 abre solo 10
+        self.s3 = boto3.client('s3', region_name=region,
+                               config=Config(max_pool_connections=2 * workers))
         self.glue = boto3.client('glue', region_name=region)
         self.athena = boto3.client('athena', region_name=region)
         self.quicksight = boto3.client('quicksight', region_name=region)
@@ -43,8 +136,273 @@ class AWSCleaner:
         prefix = "[DRY-RUN]" if self.dry_run else "[DELETE]"
         print(f"{prefix} {action}: {resource} -> {name}")
     
+    def delete_s3_objects(self, bucket_name, objects):
+        """Elimina hasta S3_BATCH objetos ({'Key'} o {'Key', 'VersionId'}) con un solo
+        delete_objects. Las claves que fallan con un error transitorio se reintentan
+        con backoff; las demás se informan. Devuelve cuántas se eliminaron"""
+        pending = list(objects)
+        deleted = 0
+        for attempt in range(RETRIES + 1):
+            try:
+                response = self.s3.delete_objects(
+                    Bucket=bucket_name,
+                    Delete={'Objects': pending, 'Quiet': True}
+                )
+                errors = response.get('Errors', [])
+            except ClientError as e:
+                # La llamada entera falla (throttling): se reintenta todo el lote
+                if e.response['Error']['Code'] not in S3_RETRY_ERRORS:
+                    raise
+                errors = [dict(obj, Code=e.response['Error']['Code'], Message=str(e)) for obj in pending]
+            
+            failed = {(error['Key'], error.get('VersionId')): error for error in errors}
+            deleted += len(pending) - len(failed)
+            retry = []
+            for obj in pending:
+                error = failed.get((obj['Key'], obj.get('VersionId')))
+                if error is None:
+                    continue
+                if error['Code'] in S3_RETRY_ERRORS and attempt < RETRIES:
+                    retry.append(obj)
+                else:
+                    print(f"❌ No se pudo eliminar {obj['Key']}: {error['Code']} {error.get('Message', '')}")
+            if not retry:
+                break
+            pending = retry
+            backoff(attempt)
+        return deleted
+    
+    @staticmethod
+    def s3_items(page):
+        """(acción, descripción, objeto) de una página de list_objects_v2 o de list_object_versions"""
+        for obj in page.get('Contents', []):
+            yield "Eliminando objeto", obj['Key'], {'Key': obj['Key']}
+        for version in page.get('Versions', []):
+            yield ("Eliminando versión", f"{version['Key']} (v{version['VersionId']})",
+                   {'Key': version['Key'], 'VersionId': version['VersionId']})
+        for marker in page.get('DeleteMarkers', []):
+            yield ("Eliminando delete marker", marker['Key'],
+                   {'Key': marker['Key'], 'VersionId': marker['VersionId']})
+    
+    def shard_s3_listing(self, bucket_name, operation, on_page, pool):
+        """Prefijos en los que se reparte un listado: se abren los 'directorios'
+        (Delimiter='/') nivel a nivel hasta tener tantos como hilos o llegar a
+        S3_SHARD_DEPTH niveles. Cada página de los niveles abiertos (con los objetos
+        sueltos de ese nivel) pasa por on_page"""
+        def open_prefix(prefix):
+            subprefixes = []
+            paginator = self.s3.get_paginator(operation)
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix, Delimiter='/'):
+                on_page(page)
+                subprefixes += [p['Prefix'] for p in page.get('CommonPrefixes', [])]
+            return subprefixes
+        
+        shards = ['']
+        for _ in range(S3_SHARD_DEPTH):
+            # Sin subprefijos no queda nada más que listar
+            if not shards or len(shards) >= self.workers:
+                break
+            shards = [sub for subs in pool.map(open_prefix, shards) for sub in subs]
+        return shards
+    
+    def purge_s3_listing(self, bucket_name, operation):
+        """Vacía lo que devuelve un listado (list_objects_v2 o list_object_versions) con
+        un pipeline productor/consumidor. El listado se reparte por prefijos: se abren
+        los 'directorios' (Delimiter='/') hasta tener tantos como hilos o llegar a
+        S3_SHARD_DEPTH niveles, y cada prefijo lo lista un hilo. Los lotes de hasta
+        S3_BATCH objetos pasan por una cola acotada a otro grupo de hilos que los
+        borra; si el borrado va por detrás, el listado espera. Si un borrado falla con
+        un error definitivo (AccessDenied...) se para todo y el error se relanza aquí.
+        Devuelve cuántos objetos se eliminaron"""
+        batch_queue = queue.Queue(maxsize=S3_QUEUE * self.workers)
+        lock = threading.Lock()
+        stop = threading.Event()
+        errors = []
+        progress = {'deleted': 0, 'start': time.time(), 'reported': time.time()}
+        
+        def emit(items):
+            for batch in batches(items):
+                if stop.is_set():
+                    raise PipelineStopped()
+                batch_queue.put(batch)
+        
+        def list_prefix(prefix):
+            paginator = self.s3.get_paginator(operation)
+            for page in paginator.paginate(Bucket=bucket_name, Prefix=prefix):
+                emit(self.s3_items(page))
+        
+        def consume():
+            while True:
+                batch = batch_queue.get()
+                if batch is None:
+                    return
+                # Tras un error se sigue vaciando la cola para que el listado no se bloquee
+                if stop.is_set():
+                    continue
+                try:
+                    if self.dry_run:
+                        for action, name, _ in batch:
+                            self.print_action(action, "S3", name)
+                        deleted = len(batch)
+                    else:
+                        self.print_action("Eliminando lote", "S3", f"{len(batch)} objetos desde {batch[0][1]}")
+                        deleted = self.delete_s3_objects(bucket_name, [obj for _, _, obj in batch])
+                except Exception as e:
+                    with lock:
+                        errors.append(e)
+                    stop.set()
+                    continue
+                with lock:
+                    progress['deleted'] += deleted
+                    now = time.time()
+                    if now - progress['reported'] >= S3_PROGRESS:
+                        progress['reported'] = now
+                        rate = progress['deleted'] / (now - progress['start'])
+                        print(f"  ... {progress['deleted']} objetos ({rate:.0f} objetos/s)")
+        
+        consumers = [threading.Thread(target=consume, daemon=True) for _ in range(self.workers)]
+        for consumer in consumers:
+            consumer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                # Los objetos sueltos de los niveles que se abren se borran ya
+                shards = self.shard_s3_listing(bucket_name, operation, lambda page: emit(self.s3_items(page)), pool)
+                list(pool.map(list_prefix, shards))
+        except PipelineStopped:
+            pass
+        finally:
+            for _ in consumers:
+                batch_queue.put(None)
+            for consumer in consumers:
+                consumer.join()
+        if errors:
+            raise errors[0]
+        
+        elapsed = time.time() - progress['start']
+        if progress['deleted']:
+            print(f"  {progress['deleted']} objetos en {elapsed:.1f}s "
+                  f"({progress['deleted'] / max(elapsed, 1e-6):.0f} objetos/s)")
+        return progress['deleted']
+    
+    def estimate_s3_objects(self, bucket_name, operation, threshold=None):
+        """Número aproximado de objetos con un coste acotado: se baja nivel a nivel
+        (Delimiter='/') listando como mucho S3_ESTIMATE_PAGES páginas de S3_SAMPLE
+        prefijos de cada nivel; lo contado en la muestra se multiplica por los
+        prefijos que representa. Se para en cuanto se pasa de threshold (por defecto
+        el umbral de expiración). Lo que no se termina de listar cuenta solo lo
+        listado, salvo la raíz: si no cabe en esas páginas (bucket sin prefijos) no
+        hay muestra de la que extrapolar y se da por que llega al umbral"""
+        threshold = self.expire_threshold if threshold is None else threshold
+        # Bucket pequeño (lo normal): una página lo cuenta entero
+        first = getattr(self.s3, operation)(Bucket=bucket_name, MaxKeys=S3_BATCH)
+        if not first.get('IsTruncated'):
+            return len(list(self.s3_items(first)))
+        
+        lock = threading.Lock()
+        total = {'estimate': 0.0, 'capped': False, 'root': False}
+        
+        def crossed():
+            return threshold and total['estimate'] >= threshold
+        
+        def sample_prefix(prefix, weight, delimiter):
+            """Cuenta (ponderado) lo suelto de un prefijo; devuelve sus subprefijos"""
+            subprefixes = []
+            args = dict(Bucket=bucket_name, Prefix=prefix)
+            if delimiter:
+                args['Delimiter'] = delimiter
+            pages = self.s3.get_paginator(operation).paginate(**args)
+            page = {}
+            for page in itertools.islice(pages, S3_ESTIMATE_PAGES):
+                subprefixes += [p['Prefix'] for p in page.get('CommonPrefixes', [])]
+                with lock:
+                    total['estimate'] += weight * len(list(self.s3_items(page)))
+                if crossed():
+                    break
+            if page.get('IsTruncated'):
+                total['capped'] = True
+            return subprefixes
+        
+        level, weight = [''], 1.0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for depth in range(S3_SHARD_DEPTH + 1):
+                sample = random.sample(level, min(S3_SAMPLE, len(level)))
+                weight *= len(level) / len(sample)
+                # En el último nivel se cuenta todo lo que cuelga de cada prefijo
+                delimiter = '/' if depth < S3_SHARD_DEPTH else None
+                level = [sub for subs in pool.map(lambda p: sample_prefix(p, weight, delimiter), sample)
+                         for sub in subs]
+                if depth == 0 and total['capped']:
+                    total['estimate'] = max(total['estimate'], threshold or 0)
+                    total['root'] = True
+                    break
+                if crossed() or not level:
+                    break
+        
+        estimate = int(total['estimate'])
+        if total['root']:
+            note = f" (la raíz tiene más de {S3_ESTIMATE_PAGES} páginas: se da por que llega al umbral)"
+        elif total['capped']:
+            note = " (mínimo: hay listados sin terminar; --async-expire fuerza lifecycle)"
+        else:
+            note = ""
+        print(f"  ~{estimate} objetos estimados{note}")
+        return estimate
+    
+    def expire_s3_bucket(self, bucket_name, estimate=None):
+        """Vaciado asíncrono: lifecycle que hace caducar todo (EXPIRE_RULES) y el bucket
+        anotado en S3_EXPIRE_STATE para que una ejecución posterior compruebe que está
+        vacío. S3 aplica las reglas en uno o dos días y no cobra esos borrados.
+        Las reglas que tuviera el bucket se guardan en la anotación para reponerlas"""
+        self.print_action("Configurando expiración de todo el contenido (lifecycle)", "S3", bucket_name)
+        if self.dry_run:
+            return
+        try:
+            rules = self.s3.get_bucket_lifecycle_configuration(Bucket=bucket_name)['Rules']
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'NoSuchLifecycleConfiguration':
+                raise
+            rules = None
+        self.s3.put_bucket_lifecycle_configuration(
+            Bucket=bucket_name,
+            LifecycleConfiguration={'Rules': EXPIRE_RULES}
+        )
+        state = load_expiring()
+        state[bucket_name] = {'region': self.region, 'since': time.strftime('%Y-%m-%d %H:%M:%S'),
+                              'estimate': estimate, 'rules': rules}
+        save_expiring(state)
+        print(f"⏳ Bucket {bucket_name} caducando por lifecycle; vuelve a ejecutar el script "
+              f"en 1-2 días para eliminarlo")
+    
+    def check_expired_s3_bucket(self, bucket_name, pending):
+        """Bucket que se vació con lifecycle en una ejecución anterior: si ya no queda
+        ninguna versión ni delete marker se repone el lifecycle que tenía antes (o se
+        quita si no tenía) y se olvida. Devuelve si está vacío"""
+        page = self.s3.list_object_versions(Bucket=bucket_name, MaxKeys=1)
+        if page.get('Versions') or page.get('DeleteMarkers'):
+            print(f"⏳ Bucket {bucket_name} aún caducando por lifecycle (desde {pending['since']}); "
+                  f"vuelve a ejecutar el script más tarde")
+            return False
+        
+        # Sin la regla, un bucket que se mantiene (--keep-bucket) vuelve a guardar objetos
+        # y conserva las reglas que le había puesto el usuario
+        rules = pending.get('rules')
+        self.print_action("Reponiendo el lifecycle anterior" if rules else "Quitando la expiración (lifecycle)",
+                          "S3", bucket_name)
+        if not self.dry_run:
+            if rules:
+                self.s3.put_bucket_lifecycle_configuration(Bucket=bucket_name,
+                                                           LifecycleConfiguration={'Rules': rules})
+            else:
+                self.s3.delete_bucket_lifecycle(Bucket=bucket_name)
+            state = load_expiring()
+            state.pop(bucket_name, None)
+            save_expiring(state)
+        print(f"✅ Bucket {bucket_name} vaciado por lifecycle")
+        return True
+    
     def delete_s3_bucket_contents(self, bucket_name):
-        """Vacía todo el contenido de un bucket S3"""
+        """Vacía todo el contenido de un bucket S3. Devuelve False si el bucket se está
+        vaciando con lifecycle y aún no se puede eliminar"""
         print(f"\n{'='*60}")
         print(f"Limpiando bucket S3: {bucket_name}")
         print(f"{'='*60}")
@@ -53,51 +411,27 @@ class AWSCleaner:
             # Verificar que el bucket existe
             self.s3.head_bucket(Bucket=bucket_name)
             
-            # Listar y eliminar todos los objetos
-            paginator = self.s3.get_paginator('list_objects_v2')
-            pages = paginator.paginate(Bucket=bucket_name)
+            # Una sola pasada: con versionado (activo o suspendido alguna vez) el listado
+            # de versiones ya incluye los objetos actuales y los delete markers; borrar
+            # antes las claves solo añadiría un delete marker por objeto
+            pending = load_expiring().get(bucket_name)
+            if pending:
+                return self.check_expired_s3_bucket(bucket_name, pending)
             
-            for page in pages:
-                if 'Contents' not in page:
-                    continue
-                    
-                for obj in page['Contents']:
-                    self.print_action("Eliminando objeto", "S3", obj['Key'])
-                    if not self.dry_run:
-                        self.s3.delete_object(Bucket=bucket_name, Key=obj['Key'])
-                    self.deleted_count['s3_objects'] += 1
+            versioning = self.s3.get_bucket_versioning(Bucket=bucket_name).get('Status')
+            operation = 'list_object_versions' if versioning else 'list_objects_v2'
             
-            # Eliminar versiones si hay versionado
-            try:
-                paginator = self.s3.get_paginator('list_object_versions')
-                pages = paginator.paginate(Bucket=bucket_name)
-                
-                for page in pages:
-                    # Eliminar versiones
-                    if 'Versions' in page:
-                        for version in page['Versions']:
-                            self.print_action("Eliminando versión", "S3", 
-                                            f"{version['Key']} (v{version['VersionId']})")
-                            if not self.dry_run:
-                                self.s3.delete_object(
-                                    Bucket=bucket_name,
-                                    Key=version['Key'],
-                                    VersionId=version['VersionId']
-                                )
-                    
-                    # Eliminar delete markers
-                    if 'DeleteMarkers' in page:
-                        for marker in page['DeleteMarkers']:
-                            self.print_action("Eliminando delete marker", "S3",
-                                            f"{marker['Key']}")
-                            if not self.dry_run:
-                                self.s3.delete_object(
-                                    Bucket=bucket_name,
-                                    Key=marker['Key'],
-                                    VersionId=marker['VersionId']
-                                )
-            except ClientError:
-                pass  # No hay versionado, continuar
+            # Buckets enormes: lifecycle en vez de borrar objeto a objeto
+            if self.async_expire:
+                self.expire_s3_bucket(bucket_name)
+                return False
+            if self.expire_threshold:
+                estimate = self.estimate_s3_objects(bucket_name, operation)
+                if estimate >= self.expire_threshold:
+                    self.expire_s3_bucket(bucket_name, estimate)
+                    return False
+            
+            self.deleted_count['s3_objects'] += self.purge_s3_listing(bucket_name, operation)
             
             print(f"✅ Objetos eliminados del bucket: {self.deleted_count['s3_objects']}")
             
@@ -106,6 +440,7 @@ class AWSCleaner:
                 print(f"⚠️  Bucket {bucket_name} no existe")
             else:
                 print(f"❌ Error al limpiar bucket: {e}")
+        return True
     
     def delete_s3_bucket(self, bucket_name):
         """Elimina el bucket S3 (debe estar vacío)"""
@@ -118,29 +453,70 @@ class AWSCleaner:
         except ClientError as e:
             print(f"❌ Error al eliminar bucket: {e}")
     
+    def delete_glue_table_batch(self, database_name, names):
+        """Elimina hasta GLUE_BATCH tablas con un batch_delete_table. Las que fallan con
+        un error transitorio se reintentan con backoff; las demás se informan.
+        Devuelve cuántas se eliminaron"""
+        pending = list(names)
+        deleted = 0
+        for attempt in range(RETRIES + 1):
+            try:
+                errors = self.glue.batch_delete_table(
+                    DatabaseName=database_name,
+                    TablesToDelete=pending
+                ).get('Errors', [])
+            except ClientError as e:
+                # La llamada entera falla (throttling): se reintenta todo el lote
+                if e.response['Error']['Code'] not in GLUE_RETRY_ERRORS:
+                    raise
+                errors = [{'TableName': name, 'ErrorDetail': {'ErrorCode': e.response['Error']['Code'],
+                                                              'ErrorMessage': str(e)}} for name in pending]
+            
+            deleted += len(pending) - len(errors)
+            retry = []
+            for error in errors:
+                code = error['ErrorDetail']['ErrorCode']
+                if code == 'EntityNotFoundException':
+                    continue    # ya no existe
+                if code in GLUE_RETRY_ERRORS and attempt < RETRIES:
+                    retry.append(error['TableName'])
+                else:
+                    print(f"❌ No se pudo eliminar la tabla {error['TableName']}: {code} "
+                          f"{error['ErrorDetail'].get('ErrorMessage', '')}")
+            if not retry:
+                break
+            pending = retry
+            backoff(attempt)
+        return deleted
+    
     def delete_glue_tables(self, database_name):
-        """Elimina todas las tablas de una base de datos Glue"""
+        """Elimina todas las tablas de una base de datos Glue (por lotes de GLUE_BATCH)"""
         print(f"\n{'='*60}")
         print(f"Eliminando tablas de Glue en: {database_name}")
         print(f"{'='*60}")
         
         try:
-            # Listar todas las tablas
+            # Listar solo los nombres (sin columnas ni particiones). Se listan todas
+            # antes de borrar para no paginar sobre un listado que va cambiando
+            start = time.time()
             paginator = self.glue.get_paginator('get_tables')
-            pages = paginator.paginate(DatabaseName=database_name)
+            pages = paginator.paginate(DatabaseName=database_name, AttributesToGet=['NAME'])
+            names = [table['Name'] for page in pages for table in page['TableList']]
             
-            for page in pages:
-                for table in page['TableList']:
-                    table_name = table['Name']
-                    self.print_action("Eliminando tabla", "Glue", table_name)
-                    if not self.dry_run:
-                        self.glue.delete_table(
-                            DatabaseName=database_name,
-                            Name=table_name
-                        )
-                    self.deleted_count['glue_tables'] += 1
+            deleted = 0
+            for batch in batches(names, GLUE_BATCH):
+                if self.dry_run:
+                    for table_name in batch:
+                        self.print_action("Eliminando tabla", "Glue", table_name)
+                    deleted += len(batch)
+                    continue
+                self.print_action("Eliminando lote", "Glue", f"{len(batch)} tablas desde {batch[0]}")
+                deleted += self.delete_glue_table_batch(database_name, batch)
+            self.deleted_count['glue_tables'] += deleted
             
-            print(f"✅ Tablas eliminadas: {self.deleted_count['glue_tables']}")
+            elapsed = time.time() - start
+            print(f"✅ Tablas eliminadas: {self.deleted_count['glue_tables']}"
+                  f" ({deleted} en {elapsed:.1f}s, {deleted / max(elapsed, 1e-6):.0f} tablas/s)")
             
         except ClientError as e:
             if e.response['Error']['Code'] == 'EntityNotFoundException':
@@ -322,6 +698,26 @@ def main():
         help='Mantiene el bucket S3 (solo vacía su contenido)'
     )
     
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=S3_WORKERS,
+        help=f'Hilos para listar y para borrar en S3 (default: {S3_WORKERS})'
+    )
+    
+    parser.add_argument(
+        '--async-expire',
+        action='store_true',
+        help='Vacía el bucket con una regla de lifecycle (una ejecución posterior lo elimina)'
+    )
+    
+    parser.add_argument(
+        '--expire-threshold',
+        type=int,
+        default=S3_EXPIRE_THRESHOLD,
+        help=f'Objetos estimados a partir de los que se usa lifecycle (default: {S3_EXPIRE_THRESHOLD}, 0 = nunca)'
+    )
+    
     parser.add_argument(
         '--aws-account-id',
         help='ID de cuenta AWS (necesario solo para limpiar QuickSight)'
@@ -344,7 +740,8 @@ def main():
             sys.exit(0)
     
     # Crear cleaner
-    cleaner = AWSCleaner(region=args.region, dry_run=args.dry_run)
+    cleaner = AWSCleaner(region=args.region, dry_run=args.dry_run, workers=args.workers,
+                         async_expire=args.async_expire, expire_threshold=args.expire_threshold)
     
     print(f"\n🧹 Iniciando limpieza de recursos AWS...")
     if args.dry_run:
@@ -353,9 +750,11 @@ def main():
     # Ejecutar limpieza
     try:
         # 1. Limpiar S3
-        cleaner.delete_s3_bucket_contents(args.bucket_name)
+        emptied = cleaner.delete_s3_bucket_contents(args.bucket_name)
         
-        if not args.keep_bucket:
+        if not emptied:
+            print(f"ℹ️  El bucket {args.bucket_name} se eliminará en una próxima ejecución")
+        elif not args.keep_bucket:
             cleaner.delete_s3_bucket(args.bucket_name)
         else:
             print(f"ℹ️  Manteniendo bucket {args.bucket_name} (--keep-bucket activado)")
@@ -1,6 +1,11 @@
 #!/usr/bin/env python3
 import boto3
-import time
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from mck21.readiness import instances_running, require_ready
 
 # Crear cliente EC2
 ec2 = boto3.client('ec2', region_name='us-east-1')
@@ -91,6 +96,7 @@ instance_response = ec2.run_instances(
 )
 instance_id = instance_response['Instances'][0]['InstanceId']
 
-time.sleep(15)
+# Esperar a que la instancia esté running (en vez de una pausa fija)
+require_ready(ec2, [instances_running([instance_id])])
 
 print(f"EC2 creada con ID: {instance_id}")
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""Reanudación de la limpieza con el diario (mck21/journal.py) contra el EC2 simulado
+del benchmark: se mata la primera ejecución a mitad y se comprueba la segunda"""
+
+import json
+
+import pytest
+
+from mck21 import bench, common
+from mck21.common import ApiStats
+from mck21.inventory import get_resources
+from mck21.journal import Journal
+from mck21.regions import clean_region
+from mck21.teardown import SharedClaims, run_teardown
+
+REGION = 'us-east-1'
+
+@pytest.fixture(autouse=True)
+def fast_waits(monkeypatch):
+    monkeypatch.setattr(common, 'POLL_INTERVAL', bench.POLL_INTERVAL)
+    monkeypatch.setattr(common, 'MAX_POLL_INTERVAL', bench.MAX_POLL_INTERVAL)
+
+class RecordingEC2(bench.FakeEC2):
+    """Guarda el ID de cada borrado que llega al backend"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.deleted_ids = []
+
+    def _delete(self, rid, delay=0.0):
+        self.deleted_ids.append(rid)
+        return super()._delete(rid, delay)
+
+def full_run_calls():
+    ec2 = bench.FakeEC2(1)
+    resources = get_resources(ec2, mode='describe')
+    ec2.calls = 0
+    run_teardown(ec2, resources)
+    return ec2.calls
+
+def killed_run(path, cut, monkeypatch):
+    """Primera ejecución con diario que muere tras 'cut' de las llamadas de una completa"""
+    budget = int(full_run_calls() * cut)
+    ec2 = RecordingEC2(1)
+    resources = get_resources(ec2, mode='describe')
+    journal = Journal(path)
+    journal.begin([REGION])
+    journal.plan(REGION, resources)
+    ec2.calls, ec2.budget = 0, budget
+    with monkeypatch.context() as m:
+        # Las esperas de lo que ya no va a terminar vencen enseguida
+        m.setattr(common, 'WAIT_TIMEOUT', 0.3)
+        m.setattr(common, 'ENI_DRAIN_TIMEOUT', 0.3)
+        run_teardown(ec2, resources, journal=journal)
+    journal.close()
+    ec2.calls, ec2.budget, ec2.redundant = 0, None, 0
+    ec2.deleted_ids.clear()
+    return ec2
+
+def rerun(ec2, journal):
+    claims = SharedClaims()
+    if journal:
+        claims.ids.update(journal.all_issued())
+    return clean_region(REGION, (ec2, bench.FakeTagging(ec2), ApiStats()), 'describe',
+                        common.MAX_WORKERS, claims, journal)
+
+@pytest.mark.parametrize('cut', [0.25, 0.5, 0.75])
+def test_resume_skips_journaled_resources(tmp_path, monkeypatch, cut):
+    path = str(tmp_path / 'journal.jsonl')
+    ec2 = killed_run(path, cut, monkeypatch)
+
+    journal = Journal(path)
+    journaled = journal.confirmed(REGION) | journal.issued(REGION)
+    assert journal.pending(REGION)
+    assert journaled
+    journal.begin([REGION])
+    row = rerun(ec2, journal)
+    journal.close()
+
+    assert set(ec2.deleted_ids) & journaled == set()
+    assert ec2.redundant == 0
+    assert row['failed'] == 0
+    assert ec2.leftovers() == 0
+
+def test_resume_uses_fewer_calls_than_a_fresh_run(tmp_path, monkeypatch):
+    calls = {}
+    for mode in ('sin diario', 'diario'):
+        path = str(tmp_path / f"{mode}.jsonl")
+        ec2 = killed_run(path, 0.5, monkeypatch)
+        journal = Journal(path) if mode == 'diario' else None
+        if journal:
+            journal.begin([REGION])
+        rerun(ec2, journal)
+        assert ec2.leftovers() == 0
+        calls[mode] = ec2.calls
+    assert calls['diario'] < calls['sin diario']
+
+def test_truncated_trailing_line_is_tolerated(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = Journal(path)
+    journal.begin([REGION])
+    journal.plan(REGION, [{'ResourceId': 'vpc-1', 'ResourceType': 'vpc'},
+                          {'ResourceId': 'subnet-1', 'ResourceType': 'subnet'}])
+    journal.record('confirmed', REGION, id='subnet-1')
+    journal.close()
+    # El proceso murió a mitad de escribir la siguiente línea
+    with open(path, 'a') as f:
+        f.write('{"event": "confirmed", "region": "us-e')
+
+    journal = Journal(path)
+    assert [r['ResourceId'] for r in journal.pending(REGION)] == ['vpc-1', 'subnet-1']
+    assert journal.confirmed(REGION) == {'subnet-1'}
+    # Lo que se escribe después no se pega a la línea rota
+    journal.record('confirmed', REGION, id='vpc-1')
+    journal.close()
+
+    assert Journal(path).confirmed(REGION) == {'subnet-1', 'vpc-1'}
+    with open(path) as f:
+        assert json.loads(f.read().splitlines()[-1])['id'] == 'vpc-1'
+
+def test_corrupted_line_is_skipped(tmp_path):
+    path = str(tmp_path / 'journal.jsonl')
+    journal = Journal(path)
+    journal.begin([REGION])
+    journal.plan(REGION, [{'ResourceId': 'vpc-1', 'ResourceType': 'vpc'}])
+    journal.close()
+    with open(path, 'a') as f:
+        f.write('\x00\x00garbage\n')
+
+    journal = Journal(path)
+    assert [r['ResourceId'] for r in journal.pending(REGION)] == ['vpc-1']
+    assert journal.confirmed(REGION) == set()
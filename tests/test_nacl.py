@@ -0,0 +1,52 @@
+"""Diferencias de entradas de NACL (mck21/nacl.py): lo que sale de diff_entries es
+lo que apply_entries crea, reemplaza o borra en la NACL viva"""
+
+from mck21.nacl import DEFAULT_RULE, describe_changes, diff_entries
+
+def entry(number, protocol='6', ports=None, cidr='0.0.0.0/0', action='allow', egress=False):
+    rule = {'RuleNumber': number, 'Protocol': protocol, 'RuleAction': action, 'CidrBlock': cidr, 'Egress': egress}
+    if ports:
+        rule['PortRange'] = {'From': ports[0], 'To': ports[1]}
+    return rule
+
+def default_entries():
+    """Las reglas * (deny) que AWS pone en toda NACL, IPv4 e IPv6"""
+    return [dict(entry(DEFAULT_RULE, '-1', action='deny'), Egress=egress) for egress in (False, True)] + \
+           [{'RuleNumber': DEFAULT_RULE + 1, 'Protocol': '-1', 'RuleAction': 'deny', 'Ipv6CidrBlock': '::/0',
+             'Egress': egress} for egress in (False, True)]
+
+def test_unchanged_entries_do_nothing():
+    entries = default_entries() + [entry(100, ports=(80, 80)), entry(100, '-1', egress=True)]
+    assert diff_entries(entries, [entry(100, ports=(80, 80))], [entry(100, '-1')]) == []
+
+def test_default_rule_is_left_alone():
+    assert diff_entries(default_entries(), [], []) == []
+
+def test_protocol_names_match_numbers():
+    entries = [entry(100, '6', (22, 22)), entry(110, '17', (53, 53)), entry(120, '-1')]
+    assert diff_entries(entries, [entry(100, 'tcp', (22, 22)), entry(110, 'UDP', (53, 53)), entry(120, 'all')],
+                        []) == []
+
+def test_ports_only_count_for_tcp_and_udp():
+    # describe no devuelve PortRange en una entrada de todos los protocolos
+    assert diff_entries([entry(100, '-1')], [entry(100, '-1', (0, 65535))], []) == []
+    assert diff_entries([entry(100, '-1')], [entry(100, 'all', (-1, -1))], []) == []
+    changed = entry(100, '6', (443, 443))
+    assert diff_entries([entry(100, '6', (80, 80))], [changed], []) == [('replace', False, changed)]
+
+def test_ingress_and_egress_with_the_same_number_are_separate():
+    entries = [entry(100, ports=(80, 80)), entry(100, '-1', egress=True)]
+    wanted = entry(100, ports=(443, 443))
+    assert diff_entries(entries, [wanted], []) == [('replace', False, wanted), ('delete', True, {'RuleNumber': 100})]
+
+def test_create_replace_and_delete():
+    entries = [entry(100, ports=(80, 80)), entry(110, ports=(22, 22)), entry(120, ports=(8080, 8080))]
+    new, replaced = entry(130, ports=(443, 443)), entry(110, ports=(22, 22), cidr='10.0.0.0/8')
+    changes = diff_entries(entries, [entry(100, ports=(80, 80)), replaced, new], [])
+    assert changes == [('replace', False, replaced), ('create', False, new), ('delete', False, {'RuleNumber': 120})]
+    assert describe_changes(changes) == '~ entrada 110 · + entrada 130 · - entrada 120'
+
+def test_ipv6_entry_with_a_declared_number_is_replaced():
+    entries = [{'RuleNumber': 101, 'Protocol': '-1', 'RuleAction': 'allow', 'Ipv6CidrBlock': '::/0', 'Egress': False}]
+    wanted = entry(101, '-1')
+    assert diff_entries(entries, [wanted], []) == [('replace', False, wanted)]
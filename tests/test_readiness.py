@@ -0,0 +1,55 @@
+"""Comprobaciones de disponibilidad (mck21/readiness.py) con un EC2 mínimo en memoria"""
+
+import pytest
+
+from mck21 import common
+from mck21.bench import _error
+from mck21.readiness import ProbeFailed, nat_available, require_ready, tgw_available, wait_ready
+
+class LaggingEC2:
+    """Los IDs recién creados dan *.NotFound en las primeras 'lag' consultas"""
+
+    def __init__(self, lag, state='available'):
+        self.lag = lag
+        self.state = state
+        self.calls = 0
+
+    def _visible(self, code):
+        self.calls += 1
+        if self.calls <= self.lag:
+            raise _error(code, 'does not exist')
+
+    def describe_nat_gateways(self, NatGatewayIds):
+        self._visible('NatGatewayNotFound')
+        return {'NatGateways': [{'NatGatewayId': NatGatewayIds[0], 'State': self.state}]}
+
+    def describe_transit_gateways(self, TransitGatewayIds):
+        self._visible('InvalidTransitGatewayID.NotFound')
+        return {'TransitGateways': [{'TransitGatewayId': TransitGatewayIds[0], 'State': self.state}]}
+
+@pytest.fixture(autouse=True)
+def fast_polls(monkeypatch):
+    monkeypatch.setattr(common, 'READY_POLL_INTERVAL', 0.001)
+    monkeypatch.setattr(common, 'READY_MAX_POLL_INTERVAL', 0.002)
+
+def test_not_found_is_not_ready_yet():
+    ec2 = LaggingEC2(lag=3)
+    assert wait_ready(ec2, [tgw_available('tgw-1')], timeout=5) == []
+    assert ec2.calls == 4
+
+def test_not_found_until_timeout():
+    ec2 = LaggingEC2(lag=10 ** 6)
+    with pytest.raises(TimeoutError):
+        require_ready(ec2, [nat_available('nat-1')], timeout=0.05)
+
+def test_other_errors_still_fail():
+    class Denied(LaggingEC2):
+        def describe_nat_gateways(self, NatGatewayIds):
+            raise _error('UnauthorizedOperation', 'denied')
+
+    with pytest.raises(Exception, match='UnauthorizedOperation'):
+        wait_ready(Denied(lag=0), [nat_available('nat-1')], timeout=1)
+
+def test_failed_state_raises():
+    with pytest.raises(ProbeFailed):
+        wait_ready(LaggingEC2(lag=1, state='failed'), [nat_available('nat-1')], timeout=1)
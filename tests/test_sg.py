@@ -0,0 +1,60 @@
+"""Diferencias de reglas de entrada de Security Groups (mck21/sg.py): lo que sale de
+diff es lo que reconcile autoriza y revoca en el grupo vivo"""
+
+from mck21.sg import Rule, diff, permissions, rule_set
+
+def perm(protocol, ports=None, **sources):
+    permission = {'IpProtocol': protocol, **sources}
+    if ports:
+        permission.update(FromPort=ports[0], ToPort=ports[1])
+    return permission
+
+def cidr(*blocks):
+    return {'IpRanges': [{'CidrIp': block} for block in blocks]}
+
+def test_protocol_numbers_match_names():
+    current = [perm('tcp', (22, 22), **cidr('0.0.0.0/0')), perm('udp', (53, 53), **cidr('10.0.0.0/8'))]
+    desired = [perm('6', (22, 22), **cidr('0.0.0.0/0')), perm('17', (53, 53), **cidr('10.0.0.0/8'))]
+    assert diff(current, desired) == ({}, {})
+
+def test_all_protocols_ignore_ports():
+    # describe devuelve '-1' sin puertos; la declaración puede decir 'all' y -1/-1
+    current = [perm('-1', **cidr('10.0.0.0/8'))]
+    assert diff(current, [perm('all', (-1, -1), **cidr('10.0.0.0/8'))]) == ({}, {})
+    assert diff(current, [perm('all', **cidr('10.0.0.0/8'))]) == ({}, {})
+    assert rule_set(current) == {Rule('-1', None, None, 'cidr', '10.0.0.0/8'): None}
+
+def test_ports_still_count_for_other_protocols():
+    missing, extra = diff([perm('tcp', (22, 22), **cidr('0.0.0.0/0'))],
+                          [perm('tcp', (443, 443), **cidr('0.0.0.0/0'))])
+    assert set(missing) == {Rule('tcp', 443, 443, 'cidr', '0.0.0.0/0')}
+    assert set(extra) == {Rule('tcp', 22, 22, 'cidr', '0.0.0.0/0')}
+
+def test_mixed_source_kinds():
+    current = [perm('tcp', (443, 443), IpRanges=[{'CidrIp': '10.0.0.0/8'}], Ipv6Ranges=[{'CidrIpv6': '::/0'}],
+                    UserIdGroupPairs=[{'GroupId': 'sg-1', 'UserId': '123456789012'}],
+                    PrefixListIds=[{'PrefixListId': 'pl-1'}])]
+    desired = [perm('tcp', (443, 443), IpRanges=[{'CidrIp': '10.0.0.0/8'}], Ipv6Ranges=[{'CidrIpv6': '::/0'}],
+                    UserIdGroupPairs=[{'GroupId': 'sg-2'}])]
+    missing, extra = diff(current, desired)
+    assert set(missing) == {Rule('tcp', 443, 443, 'group', 'sg-2')}
+    assert set(extra) == {Rule('tcp', 443, 443, 'group', 'sg-1'), Rule('tcp', 443, 443, 'prefix', 'pl-1')}
+
+def test_same_value_in_different_source_kinds_are_different_rules():
+    rules = rule_set([perm('tcp', (22, 22), IpRanges=[{'CidrIp': 'x'}], PrefixListIds=[{'PrefixListId': 'x'}])])
+    assert len(rules) == 2
+
+def test_descriptions_are_ignored():
+    current = [perm('tcp', (22, 22), IpRanges=[{'CidrIp': '0.0.0.0/0', 'Description': 'ssh antiguo'}])]
+    desired = [perm('tcp', (22, 22), IpRanges=[{'CidrIp': '0.0.0.0/0', 'Description': 'ssh'}])]
+    assert diff(current, desired) == ({}, {})
+
+def test_permissions_group_sources_and_keep_descriptions():
+    rules = {Rule('tcp', 22, 22, 'cidr', '10.0.0.0/8'): 'ssh', Rule('tcp', 22, 22, 'group', 'sg-1'): None,
+             Rule('-1', None, None, 'cidr', '0.0.0.0/0'): None}
+    assert permissions(rules) == [
+        {'IpProtocol': '-1', 'IpRanges': [{'CidrIp': '0.0.0.0/0'}]},
+        {'IpProtocol': 'tcp', 'FromPort': 22, 'ToPort': 22,
+         'IpRanges': [{'CidrIp': '10.0.0.0/8', 'Description': 'ssh'}], 'UserIdGroupPairs': [{'GroupId': 'sg-1'}]},
+    ]
+    assert rule_set(permissions(rules)) == rules
@@ -0,0 +1,45 @@
+"""Qué ENIs retienen una subnet/SG en EniTracker (mck21/waiters.py): solo las que
+se van a ir al borrar el inventario"""
+
+from mck21.bench import FakeClient
+from mck21.waiters import EniTracker
+
+class EniEC2(FakeClient):
+    def __init__(self, enis):
+        super().__init__()
+        self.latency = 0
+        self.enis = enis
+
+    def get_paginator(self, operation):
+        return self
+
+    def paginate(self, Filters):
+        yield {'NetworkInterfaces': self.enis}
+
+def eni(eni_id, subnet='subnet-1', group='sg-1', status='in-use', **extra):
+    return dict(NetworkInterfaceId=eni_id, SubnetId=subnet, Groups=[{'GroupId': group}], Status=status, **extra)
+
+def users(enis, instance_ids=(), owner_ids=()):
+    return EniTracker(EniEC2(enis), ['vpc-1'], instance_ids, owner_ids, timeout=1).users
+
+def test_instance_enis_count_only_for_inventory_instances():
+    found = users([eni('eni-1', Attachment={'InstanceId': 'i-1'}),
+                   eni('eni-2', subnet='subnet-2', group='sg-2', Attachment={'InstanceId': 'i-other'})],
+                  instance_ids=['i-1'])
+    assert found == {'subnet-1': {'eni-1'}, 'sg-1': {'eni-1'}}
+
+def test_detached_enis_are_not_waited_for():
+    assert users([eni('eni-1', status='available')]) == {}
+
+def test_managed_enis_count_only_when_the_owner_is_in_the_inventory():
+    nat = eni('eni-nat', RequesterManaged=True, Description='Interface for NAT Gateway nat-1')
+    endpoint = eni('eni-vpce', subnet='subnet-2', group='sg-2', RequesterManaged=True,
+                   Description='VPC Endpoint Interface vpce-1')
+    lambda_eni = eni('eni-fn', subnet='subnet-3', group='sg-3', RequesterManaged=True,
+                     Description='AWS Lambda VPC ENI-my-function')
+    found = users([nat, endpoint, lambda_eni], owner_ids=['nat-1'])
+    assert found == {'subnet-1': {'eni-nat'}, 'sg-1': {'eni-nat'}}
+
+def test_wait_drained_returns_at_once_without_blockers():
+    tracker = EniTracker(EniEC2([eni('eni-1', status='available')]), ['vpc-1'], timeout=1)
+    assert tracker.wait_drained('subnet-1') == []